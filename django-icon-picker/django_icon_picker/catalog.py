@@ -0,0 +1,158 @@
+# django-icon-picker/django_icon_picker/catalog.py
+"""
+Catalog of the icons available in each ``ICON_SETS`` entry.
+
+Icon metadata ships with the app as one JSON file per icon set,
+``data/<set id>.json``; a directory named by ``ICON_PICKER_CATALOG_PATH``
+is searched first, so projects can add or replace sets. A file looks like::
+
+    {
+        "id": "fontawesome5solid",
+        "prefix": "fas",
+        "name": "Font Awesome 5 Solid",
+        "format": "fas fa-{name}",
+        "icons": ["ad", "address-book", ...],
+        "labels": {"12": "Ambulance Car"},
+        "categories": {"Medical": [12, 230, ...]}
+    }
+
+``icons`` is sorted; ``labels`` only lists the icons (by position) whose
+label is not their title-cased name, and ``categories`` map to icon
+positions. Each file is loaded once per process, the first time its set
+is used (see django_icon_picker.registry), into an IconSetCatalog,
+which keeps names in a tuple and category members in ``array`` objects,
+so every set costs little more than its name strings. Sets without a data
+file have an empty catalog.
+"""
+import hashlib
+import json
+import os
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .registry import get_registry
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+class IconSetCatalog:
+    """Icon names, labels and categories of one icon set."""
+
+    def __init__(self, set_id, prefix, name, icons=(), labels=None, categories=None,
+                 value_format='{name}', version=''):
+        self.id = set_id
+        self.prefix = prefix
+        self.name = name
+        self.value_format = value_format
+        self.version = version
+        self.names = tuple(icons)
+        self._labels = {int(position): label for position, label in (labels or {}).items()}
+        self.categories = {
+            category: array('I', sorted(positions))
+            for category, positions in (categories or {}).items()
+        }
+        self._haystack = None
+        self._choices = None
+
+    @classmethod
+    def from_file(cls, path, set_id, prefix, name):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        return cls(
+            set_id,
+            data.get('prefix', prefix),
+            data.get('name', name),
+            icons=data.get('icons', ()),
+            labels=data.get('labels'),
+            categories=data.get('categories'),
+            value_format=data.get('format', '{name}'),
+            version=hashlib.sha256(raw).hexdigest()[:16],
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        position = bisect_left(self.names, name)
+        return position < len(self.names) and self.names[position] == name
+
+    def value(self, position):
+        """The field value of the icon at ``position``, e.g. ``fas fa-home``."""
+        return self.value_format.format(name=self.names[position])
+
+    def label(self, position):
+        label = self._labels.get(position)
+        if label is None:
+            label = self.names[position].replace('-', ' ').title()
+        return label
+
+    def select(self, category=None, query=''):
+        """
+        Positions of the icons in ``category`` whose name or label contains
+        ``query``. Raises KeyError for an unknown category.
+        """
+        positions = self.categories[category] if category else range(len(self.names))
+        query = query.strip().lower()
+        if not query:
+            return positions
+        if self._haystack is None:
+            self._haystack = tuple(
+                f'{name} {self.label(position).lower()}' for position, name in enumerate(self.names)
+            )
+        haystack = self._haystack
+        return [position for position in positions if query in haystack[position]]
+
+    def page(self, page=1, per_page=50, category=None, query=''):
+        """
+        Return ``(total, [(value, label), ...])`` for one page of the
+        matching icons; pages start at 1.
+        """
+        positions = self.select(category, query)
+        start = (page - 1) * per_page
+        return len(positions), [
+            (self.value(position), self.label(position))
+            for position in positions[start:start + per_page]
+        ]
+
+    def choices(self):
+        """``(value, label)`` pairs for every icon, for choice fields."""
+        if self._choices is None:
+            self._choices = tuple(
+                (self.value(position), self.label(position)) for position in range(len(self.names))
+            )
+        return self._choices
+
+    def describe(self):
+        return {
+            'id': self.id,
+            'prefix': self.prefix,
+            'name': self.name,
+            'total': len(self.names),
+            'categories': sorted(self.categories),
+        }
+
+
+def _data_file(set_id):
+    directories = [getattr(settings, 'ICON_PICKER_CATALOG_PATH', None), DATA_DIR]
+    for directory in filter(None, directories):
+        path = os.path.join(directory, f'{set_id}.json')
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_catalog(icon_set):
+    """Read the catalog of a registry IconSet from its data file."""
+    path = _data_file(icon_set.id)
+    if path is None:
+        return IconSetCatalog(icon_set.id, icon_set.prefix, icon_set.name)
+    return IconSetCatalog.from_file(path, icon_set.id, icon_set.prefix, icon_set.name)
+
+
+def get_catalog(set_id):
+    """Return the IconSetCatalog of ``set_id``, or None if it isn't configured."""
+    icon_set = get_registry().get(set_id)
+    return icon_set.catalog if icon_set is not None else None
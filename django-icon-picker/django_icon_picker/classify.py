@@ -0,0 +1,215 @@
+# django-icon-picker/django_icon_picker/classify.py
+"""
+Classification of stored icon values.
+
+Every IconField value is one of: an emoji (sequence), a path to a saved SVG
+file, an icon name (Iconify ``prefix:name`` or a class string such as
+``fas fa-home`` or ``zmdi zmdi-home``), or something unknown. The patterns
+below are compiled once at import time and ``classify`` is memoized, so
+rendering a changelist with thousands of rows only pays for each distinct
+value once.
+
+Class strings start with a Font Awesome style or the prefix of one of the
+configured ``DJANGO_ICON_SETS`` (``class_prefixes``); without that setting,
+the prefixes of the icon fonts it used to default to are known as well. ``SVG_PATH_PATTERN``
+and the names below are also the grammar django_icon_picker.utils
+validates values against, so every valid value classifies as its kind.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .registry import get_registry
+from .settings import DEFAULT_CLASS_PREFIXES
+
+# Codepoint ranges of characters that are emoji on their own
+EMOJI_RANGES = (
+    (0x231A, 0x231B),    # watch, hourglass
+    (0x2328, 0x2328),    # keyboard
+    (0x23CF, 0x23CF),    # eject button
+    (0x23E9, 0x23F3),    # media controls, alarm clock
+    (0x23F8, 0x23FA),    # pause, stop, record
+    (0x24C2, 0x24C2),    # circled M
+    (0x25AA, 0x25AB),    # small squares
+    (0x25B6, 0x25B6),    # play button
+    (0x25C0, 0x25C0),    # reverse button
+    (0x25FB, 0x25FE),    # medium squares
+    (0x2600, 0x26FF),    # miscellaneous symbols
+    (0x2700, 0x27BF),    # dingbats
+    (0x2934, 0x2935),    # curved arrows
+    (0x2B05, 0x2B07),    # arrows
+    (0x2B1B, 0x2B1C),    # large squares
+    (0x2B50, 0x2B50),    # star
+    (0x2B55, 0x2B55),    # hollow red circle
+    (0x3030, 0x3030),    # wavy dash
+    (0x303D, 0x303D),    # part alternation mark
+    (0x3297, 0x3297),    # Japanese "congratulations"
+    (0x3299, 0x3299),    # Japanese "secret"
+    (0x1F004, 0x1F004),  # mahjong red dragon
+    (0x1F0CF, 0x1F0CF),  # joker
+    (0x1F170, 0x1F251),  # enclosed alphanumerics and ideographs
+    (0x1F300, 0x1F64F),  # symbols & pictographs, emoticons, skin tones
+    (0x1F680, 0x1F6FF),  # transport & map symbols
+    (0x1F7E0, 0x1F7F0),  # geometric shapes extended
+    (0x1F900, 0x1F9FF),  # supplemental symbols
+    (0x1FA70, 0x1FAFF),  # symbols and pictographs extended-a
+)
+
+# Characters that are text by default and only become emoji with U+FE0F
+TEXT_PRESENTATION = '\u00A9\u00AE\u203C\u2049\u2122\u2139\u2194-\u2199\u21A9\u21AA'
+
+ZWJ = '\u200D'
+VARIATION_SELECTOR = '\uFE0F'
+TEXT_SELECTOR = '\uFE0E'
+SKIN_TONES = '\U0001F3FB-\U0001F3FF'
+REGIONAL_INDICATORS = '\U0001F1E6-\U0001F1FF'
+TAGS = '\U000E0020-\U000E007E'
+CANCEL_TAG = '\U000E007F'
+KEYCAP = '\u20E3'
+
+
+def _char_class(ranges):
+    return ''.join(
+        chr(start) if start == end else f'{chr(start)}-{chr(end)}'
+        for start, end in ranges
+    )
+
+
+PICTOGRAPHIC = _char_class(EMOJI_RANGES)
+
+# Anything that makes a value render as emoji
+EMOJI_RE = re.compile(
+    f'[{PICTOGRAPHIC}]'
+    f'|[{TEXT_PRESENTATION}]{VARIATION_SELECTOR}'
+    f'|[#*0-9]{VARIATION_SELECTOR}?{KEYCAP}'
+)
+
+# A single emoji: keycap, flag, or pictograph with optional presentation
+# selector, skin tone and tag sequence (subdivision flags such as Scotland)
+_EMOJI_ELEMENT = (
+    f'(?:[#*0-9]{VARIATION_SELECTOR}?{KEYCAP}'
+    f'|[{REGIONAL_INDICATORS}]{{2}}'
+    f'|(?:[{PICTOGRAPHIC}]|[{TEXT_PRESENTATION}]{VARIATION_SELECTOR})'
+    f'{TEXT_SELECTOR}?{VARIATION_SELECTOR}?[{SKIN_TONES}]?(?:[{TAGS}]+{CANCEL_TAG})?)'
+)
+
+# One or more emoji, each optionally joined into a ZWJ sequence
+EMOJI_SEQUENCE_RE = re.compile(f'(?:{_EMOJI_ELEMENT}(?:{ZWJ}{_EMOJI_ELEMENT})*)+')
+
+# Font Awesome style classes; their icon classes are named ``fa-<name>``
+FONT_AWESOME_STYLES = (
+    'fa', 'fas', 'far', 'fal', 'fab', 'fad', 'fat',
+    'fa-solid', 'fa-regular', 'fa-light', 'fa-thin', 'fa-duotone', 'fa-brands',
+)
+
+# Icon names and set prefixes: lowercase words joined by dashes
+NAME_PATTERN = r'[a-z0-9]+(?:-[a-z0-9]+)*'
+
+# A saved SVG file, relative to the storage or the site root; segments
+# can't start with a dot, so no '..' or '.'
+SVG_PATH_PATTERN = r'/?(?:[\w-][\w.-]*/)+[\w-][\w.-]*\.svg'
+
+NONE = 'none'
+EMOJI = 'emoji'
+SVG_FILE = 'svg_file'
+ICON_NAME = 'icon_name'
+UNKNOWN = 'unknown'
+
+
+def is_emoji(value):
+    """Check if the value contains an emoji."""
+    if not value or not isinstance(value, str):
+        return False
+    return EMOJI_RE.search(value) is not None
+
+
+def is_emoji_sequence(value):
+    """Check if the value consists solely of emoji."""
+    if not value or not isinstance(value, str):
+        return False
+    return EMOJI_SEQUENCE_RE.fullmatch(value) is not None
+
+
+def is_svg_file_path(value):
+    """Check if the value is a file path to an SVG."""
+    return bool(value) and isinstance(value, str) and value.endswith('.svg') and '/' in value
+
+
+@lru_cache(maxsize=1)
+def _class_prefixes(registry):
+    defaults = () if hasattr(settings, 'DJANGO_ICON_SETS') else DEFAULT_CLASS_PREFIXES
+    return tuple(dict.fromkeys((*FONT_AWESOME_STYLES, *registry.prefixes(), *defaults)))
+
+
+def class_prefixes():
+    """
+    Prefixes of class string icon values: the Font Awesome styles, the
+    prefix of every configured icon set and, without ``DJANGO_ICON_SETS``,
+    ``DEFAULT_CLASS_PREFIXES``.
+    """
+    return _class_prefixes(get_registry())
+
+
+def class_family(prefix):
+    """What a class prefix's icon classes start with: ``fa`` for Font Awesome, else the prefix."""
+    return 'fa' if prefix in FONT_AWESOME_STYLES else prefix
+
+
+def _is_class_string(value):
+    prefix, space, _ = value.partition(' ')
+    return bool(space) and prefix in class_prefixes()
+
+
+def is_icon_name(value):
+    """Check if the value is an icon name (like 'mdi:home' or 'fas fa-home')."""
+    if not value or not isinstance(value, str):
+        return False
+    if _is_class_string(value):
+        return True
+    return ':' in value and not is_emoji(value)
+
+
+@lru_cache(maxsize=4096)
+def _classify(value):
+    if is_emoji(value):
+        return EMOJI
+    if is_svg_file_path(value):
+        return SVG_FILE
+    if ':' in value or _is_class_string(value):
+        return ICON_NAME
+    return UNKNOWN
+
+
+@receiver(setting_changed)
+def _reset_classify(setting, **kwargs):
+    if setting == 'DJANGO_ICON_SETS':
+        _classify.cache_clear()
+
+
+def classify(value):
+    """
+    Determine the type of an icon value.
+
+    Returns one of ``'none'``, ``'emoji'``, ``'svg_file'``, ``'icon_name'``
+    or ``'unknown'``.
+    """
+    if not value:
+        return NONE
+    if not isinstance(value, str):
+        return UNKNOWN
+    return _classify(value)
+
+
+def icon_prefix(value):
+    """
+    Icon set prefix of an icon name: ``'mdi'`` for ``'mdi:home'``, ``'fas'``
+    for ``'fas fa-home'``; empty for anything that is not an icon name.
+    """
+    if classify(value) != ICON_NAME:
+        return ''
+    if ':' in value:
+        return value.split(':', 1)[0]
+    return value.split(' ', 1)[0]
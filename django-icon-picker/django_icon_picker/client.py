@@ -0,0 +1,162 @@
+# django-icon-picker/django_icon_picker/client.py
+"""
+Shared HTTP client for the upstream Iconify API.
+
+All server-side fetches go through one IconifyClient per process. It keeps a
+pooled, kept-alive ``requests.Session``, bounds every request with connect
+and read timeouts, and wraps the upstream in a circuit breaker: after
+``circuit_failure_threshold`` consecutive failures (connection errors,
+timeouts, 5xx) requests fail fast with UpstreamUnavailable for
+``circuit_reset_timeout`` seconds, then a single trial request decides
+whether the upstream is back. A hung Iconify therefore can no longer pin
+web workers.
+
+Everything is configured through ``ICON_PICKER_SETTINGS`` and
+``ICON_PICKER_ICONIFY_URL``; changing either (e.g. with override_settings
+pointing at a local stub server) replaces the shared client.
+"""
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+from .settings import get_picker_settings
+
+
+class UpstreamUnavailable(requests.RequestException):
+    """The circuit is open: the upstream failed repeatedly and is not tried."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open trial."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """Whether a request may be attempted now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            # Half open: let one request find out whether the upstream is back
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial = False
+
+
+class IconifyClient:
+    """Pooled, timeout-bounded access to the Iconify API."""
+
+    def __init__(self, base_url='https://api.iconify.design', connect_timeout=3.05,
+                 read_timeout=10, pool_size=10, failure_threshold=5, reset_timeout=30,
+                 session=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    def get(self, path, params=None):
+        """
+        GET ``path`` from the upstream.
+
+        Raises UpstreamUnavailable while the circuit is open and any other
+        ``requests.RequestException`` when the request itself fails.
+        """
+        return self.fetch(f"{self.base_url}/{path.lstrip('/')}", params=params)
+
+    def fetch(self, url, params=None, stream=False):
+        """
+        GET the absolute ``url`` through the pooled session and the circuit
+        breaker, raising like ``get``.
+        """
+        if not self.breaker.allow():
+            raise UpstreamUnavailable(f'{self.base_url} is unavailable, not retrying yet')
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout, stream=stream)
+        except BaseException:
+            # Not only RequestException: whatever ends a half-open trial must
+            # reopen the circuit, or it would stay in trial (open) for good
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get_svg(self, icon, color=None, size=None):
+        """Fetch ``icon`` (``prefix:name``) as SVG."""
+        params = {}
+        if color:
+            params['color'] = color
+        if size:
+            params['width'] = params['height'] = size
+        return self.get(f'{icon}.svg', params=params or None)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide IconifyClient, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                options = get_picker_settings()
+                _client = IconifyClient(
+                    base_url=getattr(settings, 'ICON_PICKER_ICONIFY_URL', 'https://api.iconify.design'),
+                    connect_timeout=options['connect_timeout'],
+                    read_timeout=options['read_timeout'],
+                    pool_size=options['pool_size'],
+                    failure_threshold=options['circuit_failure_threshold'],
+                    reset_timeout=options['circuit_reset_timeout'],
+                )
+    return _client
+
+
+@receiver(setting_changed)
+def _reset_client(setting, **kwargs):
+    global _client
+    if setting in ('ICON_PICKER_SETTINGS', 'ICON_PICKER_ICONIFY_URL'):
+        with _client_lock:
+            if _client is not None:
+                _client.close()
+            _client = None
@@ -0,0 +1,231 @@
+# django-icon-picker/django_icon_picker/downloads.py
+"""
+Background materialization of SVG files.
+
+Saving an icon through the admin used to download the SVG from Iconify
+inside the request. The DownloadQueue moves that work onto a bounded
+thread pool: the view computes the destination path, queues the job and
+returns immediately, while workers fetch the SVG (with retries and
+exponential backoff) and save it to the icon storage. Concurrent jobs for the same
+``(icon, color, size)`` share one upstream fetch.
+
+Job states are also written to the ``download_status_cache`` cache for
+``download_status_ttl`` seconds, so with several server processes the
+status endpoint can answer for jobs queued by any of them (given a shared
+cache backend).
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.cache import caches
+
+from . import storage
+from .client import UpstreamUnavailable, get_client
+from .icon_store import get_icon_store
+from .settings import get_picker_settings
+
+QUEUED = 'queued'
+DONE = 'done'
+FAILED = 'failed'
+
+# Finished jobs kept around for the status endpoint
+MAX_FINISHED_JOBS = 1024
+
+
+class DownloadError(Exception):
+    """The SVG could not be fetched."""
+
+    def __init__(self, message, retry=True):
+        super().__init__(message)
+        self.retry = retry
+
+
+class DownloadJob:
+    """Status of one SVG file being materialized."""
+
+    def __init__(self, file_path, icon, color, size=''):
+        self.file_path = file_path
+        self.icon = icon
+        self.color = color
+        self.size = size
+        self.status = QUEUED
+        self.error = ''
+        self.done = threading.Event()
+
+    def as_dict(self):
+        return {
+            'path': self.file_path,
+            'icon': self.icon,
+            'color': self.color,
+            'size': self.size,
+            'status': self.status,
+            'error': self.error,
+        }
+
+
+def _status_key(file_path):
+    return 'icon_picker:download:' + hashlib.sha256(file_path.encode('utf-8')).hexdigest()[:32]
+
+
+def _publish(job):
+    """Share ``job``'s state with the other server processes."""
+    options = get_picker_settings()
+    caches[options['download_status_cache']].set(
+        _status_key(job.file_path), job.as_dict(), options['download_status_ttl']
+    )
+
+
+def job_status(file_path):
+    """
+    The state of the download of ``file_path`` as a dict (see
+    ``DownloadJob.as_dict``): this process's job if it has one, else the
+    one published by another process, else None.
+    """
+    job = get_download_queue().status(file_path)
+    if job is not None:
+        return job.as_dict()
+    return caches[get_picker_settings()['download_status_cache']].get(_status_key(file_path))
+
+
+def fetch_svg(icon, color, size='', offline=False):
+    """
+    Fetch the SVG markup for ``icon`` in ``color``, ``size`` high (``1em``
+    if not given).
+
+    Icons installed in the local collection store are rendered without any
+    network access; everything else is requested from the Iconify API,
+    unless ``offline`` is set.
+    """
+    store = get_icon_store()
+    dimension = size or '1em'
+    svg = store.render_svg(icon, color=color, width=dimension, height=dimension) if store else None
+    if svg is not None:
+        return svg.encode('utf-8')
+    if offline:
+        raise DownloadError(f'{icon} is not installed locally', retry=False)
+
+    try:
+        response = get_client().get_svg(icon, color=color, size=size)
+    except UpstreamUnavailable as e:
+        # Backing off inside the job would only hold a worker; fail fast
+        raise DownloadError(str(e), retry=False)
+    except requests.RequestException as e:
+        raise DownloadError(str(e))
+    if response.status_code == 200:
+        return response.content
+    # Client errors (unknown icon, bad color) will not fix themselves
+    retry = response.status_code == 429 or response.status_code >= 500
+    raise DownloadError(f'Status code: {response.status_code} {response.reason}', retry=retry)
+
+
+def fetch_with_retry(icon, color, size='', retries=3, backoff=0.5, fetch=fetch_svg, **kwargs):
+    """Call ``fetch``, retrying retryable DownloadErrors up to ``retries`` times."""
+    attempt = 0
+    while True:
+        try:
+            return fetch(icon, color, size, **kwargs)
+        except DownloadError as e:
+            attempt += 1
+            if not e.retry or attempt > retries:
+                raise
+        # Exponential backoff with jitter so retries do not stampede
+        time.sleep(backoff * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+
+class DownloadQueue:
+    """
+    Bounded worker pool that materializes SVG files in the background.
+
+    ``submit`` never blocks on the network. Jobs for the same
+    ``(icon, color, size)`` that are in flight at the same time are served by a
+    single fetch.
+    """
+
+    def __init__(self, max_workers=4, retries=3, backoff=0.5, fetch=fetch_svg):
+        self.retries = retries
+        self.backoff = backoff
+        self.fetch = fetch
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='icon-picker-download'
+        )
+        # Re-entrant: a fetch that finished before submit() attaches its
+        # callbacks runs _release() right away, under submit()'s lock
+        self._lock = threading.RLock()
+        self._inflight = {}
+        self._jobs = OrderedDict()
+
+    def _fetch_with_retry(self, icon, color, size):
+        return fetch_with_retry(icon, color, size, self.retries, self.backoff, self.fetch)
+
+    def submit(self, icon, color, file_path, size=''):
+        """Queue ``icon`` in ``color`` to be written to ``file_path``."""
+        key = (icon, color, size)
+        with self._lock:
+            job = self._jobs.get(file_path)
+            if job is not None and job.status == QUEUED and (job.icon, job.color, job.size) == key:
+                return job
+            job = DownloadJob(file_path, icon, color, size)
+            self._jobs[file_path] = job
+            self._jobs.move_to_end(file_path)
+            self._prune()
+            _publish(job)
+
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch_with_retry, icon, color, size)
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, key=key: self._release(key, f))
+        future.add_done_callback(lambda f: self._complete(job, f))
+        return job
+
+    def _release(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _complete(self, job, future):
+        try:
+            storage.write(job.file_path, future.result())
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+        else:
+            job.status = DONE
+        _publish(job)
+        job.done.set()
+
+    def _prune(self):
+        while len(self._jobs) > MAX_FINISHED_JOBS:
+            path, job = next(iter(self._jobs.items()))
+            if job.status == QUEUED:
+                break
+            del self._jobs[path]
+
+    def status(self, file_path):
+        """Return the DownloadJob for ``file_path``, or None if unknown."""
+        with self._lock:
+            return self._jobs.get(file_path)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_download_queue():
+    """Return the process-wide DownloadQueue, creating it on first use."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                options = get_picker_settings()
+                _queue = DownloadQueue(
+                    max_workers=options['download_workers'],
+                    retries=options['download_retries'],
+                    backoff=options['download_backoff'],
+                )
+    return _queue
@@ -0,0 +1,33 @@
+# django-icon-picker/django_icon_picker/emoji_index.py
+"""
+The emoji search index used by the picker's emoji mode.
+
+``data/emoji.json`` is generated from the Unicode emoji data by the
+``build_emoji_index`` command and holds every fully qualified emoji
+(skin tone variants excluded) and an inverted index of pre-normalized
+search tokens::
+
+    {
+        "emoji": [["😀", "grinning face", "smile happy"], ...],
+        "tokens": {"grinning": [0, 3, ...], "happy": [0, 1, ...], ...}
+    }
+
+Entries are ``[emoji, name]`` or ``[emoji, name, tags]``; token postings
+are ascending positions in ``emoji``. The browser downloads the file once,
+from a URL carrying its content hash (so it can be cached forever), and
+expands the tokens into a prefix map, after which every keystroke is a
+single map lookup (see static/django_icon_picker/js/emoji_index.js).
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'emoji.json')
+
+
+@lru_cache(maxsize=None)
+def get_emoji_index():
+    """Return ``(content, version)``: the index file's bytes and content hash."""
+    with open(DATA_FILE, 'rb') as f:
+        content = f.read()
+    return content, hashlib.sha256(content).hexdigest()[:16]
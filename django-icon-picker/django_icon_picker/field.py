@@ -1,117 +1,167 @@
 # fields.py
+from django.conf import settings
 from django.db import models
-from .widgets import IconPicker
-from django.db.models.signals import pre_delete
-from django.utils.html import format_html
-import os
-import re
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.signals import post_delete, post_init
+from . import lookups, signals
+
+# Widgets, rendering and file handling are imported where they are used, so
+# importing the field (i.e. every models.py using it) stays cheap.
+
+
+class IconFieldDescriptor(DeferredAttribute):
+    """
+    Updates the field's type and prefix companions when the icon is
+    reassigned, like ImageField's dimension fields; the first assignment,
+    in ``__init__``, is handled by ``post_init``. Setting them in
+    ``pre_save`` alone came too late for companions declared before the
+    IconField, whose values were already read for the INSERT/UPDATE.
+    """
+
+    def __set__(self, instance, value):
+        assigned = self.field.attname in instance.__dict__
+        instance.__dict__[self.field.attname] = value
+        if assigned:
+            self.field.update_icon_metadata(instance, value)
 
 
 class IconField(models.CharField):
+    descriptor_class = IconFieldDescriptor
     description = "A custom field to store icon information, supporting both SVG icons and text emojis."
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, type_field=None, prefix_field=None, **kwargs):
+        """
+        ``type_field`` and ``prefix_field`` optionally name fields of the
+        model (e.g. indexed CharFields) that are kept in sync with the icon's
+        type (see ``get_icon_type``) and icon set prefix whenever it is
+        assigned, like ImageField's ``width_field``, so they can be filtered
+        in SQL.
+        """
+        self.type_field = type_field
+        self.prefix_field = prefix_field
         # Set default max_length to handle Unicode emojis and icon names
         kwargs["max_length"] = kwargs.get("max_length", 255)
         super().__init__(*args, **kwargs)
 
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.type_field:
+            kwargs["type_field"] = self.type_field
+        if self.prefix_field:
+            kwargs["prefix_field"] = self.prefix_field
+        return name, path, args, kwargs
+
     def formfield(self, **kwargs):
         widget = kwargs.get('widget')
         attrs = widget().attrs if widget else {}
         attrs.update({"model_name": self.model.__name__.lower()})
-        kwargs["widget"] = IconPicker(attrs=attrs)
+        from .widgets import IconPicker, LazyIconPicker
+        widget_class = LazyIconPicker if getattr(settings, "ICON_PICKER_LAZY_WIDGET", False) else IconPicker
+        kwargs["widget"] = widget_class(attrs=attrs)
         return super().formfield(**kwargs)
 
     def contribute_to_class(self, cls, name, **kwargs):
         super().contribute_to_class(cls, name, **kwargs)
-        pre_delete.connect(self._delete_file, sender=cls)
+        post_delete.connect(self._delete_file, sender=cls)
+        if not cls._meta.abstract:
+            signals.track_model(cls)
+            if self.type_field or self.prefix_field:
+                post_init.connect(self._fill_icon_metadata, sender=cls)
+
+    def _fill_icon_metadata(self, instance, **kwargs):
+        """
+        Fill in empty companion fields of a new instance. Like ImageField,
+        values that are already set (e.g. loaded from the database) are
+        kept, so backfill_icon_metadata still sees stale rows.
+        """
+        if self.attname not in instance.__dict__:
+            return
+        for name, computed in self.icon_metadata(instance.__dict__[self.attname]).items():
+            if name in instance.__dict__ and not instance.__dict__[name]:
+                setattr(instance, name, computed)
+
+    def pre_save(self, model_instance, add):
+        value = super().pre_save(model_instance, add)
+        self.update_icon_metadata(model_instance, value)
+        return value
+
+    def update_icon_metadata(self, instance, value=None):
+        """
+        Set ``instance``'s type and prefix fields from its icon value.
+        Returns whether anything changed.
+
+        ``save(update_fields=[...])`` only writes the companion fields when
+        they are listed too; ``QuerySet.update()`` and ``bulk_update()``
+        bypass this, see the ``backfill_icon_metadata`` command.
+        """
+        if not (self.type_field or self.prefix_field):
+            return False
+        if value is None:
+            value = instance.__dict__.get(self.attname)
+        changed = False
+        for name, computed in self.icon_metadata(value).items():
+            # Read from __dict__: a deferred companion is not worth a query
+            if instance.__dict__.get(name) != computed:
+                setattr(instance, name, computed)
+                changed = True
+        return changed
+
+    def icon_metadata(self, value):
+        """``{companion field name: value}`` of the type and prefix fields for ``value``."""
+        from . import classify
+        metadata = {}
+        if self.type_field:
+            metadata[self.type_field] = classify.classify(value)
+        if self.prefix_field:
+            metadata[self.prefix_field] = classify.icon_prefix(value)
+        return metadata
+
+    def _delete_file(self, sender, instance, using=None, **kwargs):
+        """
+        Only delete SVG files, not emoji values. Files are shared between
+        rows, so they are only removed once nothing references them.
+        """
+        self.release_icon(getattr(instance, self.attname), using=using)
 
-    def _delete_file(self, sender, instance, **kwargs):
-        """Only delete SVG files, not emoji values"""
-        file_path = getattr(instance, self.attname)
-        if file_path and self.is_svg_file_path(file_path) and os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except OSError:
-                pass
+    def release_icon(self, value, using=None):
+        """
+        Drop a row's reference to ``value``: when the row is deleted, and
+        when a save replaces it (see django_icon_picker.signals).
+        ``QuerySet.update()`` bypasses this; ``icon_report
+        --delete-orphaned`` removes what it leaves behind.
+        """
+        from . import svg_files
+        svg_files.release_file(value, using=using)
 
     def is_emoji(self, value):
         """Check if the value is an emoji"""
-        if not value:
-            return False
-        # Unicode ranges for emojis
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002600-\U000026FF"  # miscellaneous symbols
-            "\U00002700-\U000027BF"  # dingbats
-            "\U0001F900-\U0001F9FF"  # supplemental symbols
-            "\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-a
-            "]+",
-            flags=re.UNICODE
-        )
-        return bool(emoji_pattern.search(value))
+        from . import classify
+        return classify.is_emoji(value)
 
     def is_svg_file_path(self, value):
         """Check if the value is a file path to an SVG"""
-        return value and isinstance(value, str) and value.endswith('.svg') and '/' in value
+        from . import classify
+        return classify.is_svg_file_path(value)
 
     def is_icon_name(self, value):
-        """Check if the value is an icon name (like 'mdi:home')"""
-        return value and isinstance(value, str) and ':' in value and not self.is_emoji(value)
+        """Check if the value is an icon name (like 'mdi:home' or 'fas fa-home')"""
+        from . import classify
+        return classify.is_icon_name(value)
 
     def get_icon_type(self, value):
         """Determine the type of icon value"""
-        if not value:
-            return 'none'
-        elif self.is_emoji(value):
-            return 'emoji'
-        elif self.is_svg_file_path(value):
-            return 'svg_file'
-        elif self.is_icon_name(value):
-            return 'icon_name'
-        else:
-            return 'unknown'
-
-    def get_display_html(self, value, css_class="", style="", alt_text=""):
+        from . import classify
+        return classify.classify(value)
+
+    def get_display_html(self, value, css_class="", style="", alt_text="", color=None):
         """
         Get HTML representation of the icon value.
         This is a helper method for use in templates or admin.
         """
         if not value:
             return ""
-
-        icon_type = self.get_icon_type(value)
-        
-        if icon_type == 'emoji':
-            return format_html(
-                '<span class="emoji-display {}" style="font-size: 1.2em; {}" title="{}">{}</span>',
-                css_class,
-                style,
-                alt_text or f"Emoji: {value}",
-                value
-            )
-        elif icon_type == 'svg_file':
-            return format_html(
-                '<img src="{}" class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" alt="{}"/>',
-                f"/{value}",
-                css_class,
-                style,
-                alt_text or "Icon"
-            )
-        elif icon_type == 'icon_name':
-            return format_html(
-                '<img src="https://api.iconify.design/{}.svg" class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" alt="{}"/>',
-                value,
-                css_class,
-                style,
-                alt_text or f"Icon: {value}"
-            )
-        else:
-            return format_html('<span class="icon-unknown {}" style="{}">{}</span>', css_class, style, value)
+        from .rendering import render_icon_html
+        return render_icon_html(value, css_class, style, alt_text, color)
 
     def to_python(self, value):
         """Convert the value to a Python string, handling Unicode properly"""
@@ -124,3 +174,6 @@ class IconField(models.CharField):
         if value is None:
             return value
         return str(value)
+
+
+lookups.register(IconField)
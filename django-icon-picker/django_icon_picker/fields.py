@@ -1,14 +1,12 @@
 # django-icon-picker/django_icon_picker/fields.py
-import json
-import os
 from django import forms
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.utils.html import format_html
-from django.conf import settings
-from .widgets import IconPickerWidget
-from .settings import ICON_SETS, ICON_PICKER_PATH
-from .utils import download_svg_icon, validate_icon_format
+from . import lookups, signals
+from .settings import ICON_PICKER_PATH
+
+# Widgets, the catalog, rendering and the download helpers are imported
+# where they are used, so importing the field stays cheap.
 
 
 class IconField(models.CharField):
@@ -44,8 +42,14 @@ class IconField(models.CharField):
         kwargs.setdefault('max_length', 255)
         super().__init__(*args, **kwargs)
     
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            signals.track_model(cls)
+    
     def formfield(self, **kwargs):
         """Return the form field for this model field."""
+        from .widgets import IconPickerWidget
         defaults = {
             'widget': IconPickerWidget(
                 icon_set=self.icon_set,
@@ -70,106 +74,43 @@ class IconField(models.CharField):
                     f'Icon must start with prefix: {self.required_prefix}'
                 )
         
+        from .utils import validate_icon_format
         if value and not validate_icon_format(value):
             raise ValidationError('Invalid icon format')
     
     # Backward compatibility methods from original field
     def is_emoji(self, value):
         """Check if the value is an emoji"""
-        if not value:
-            return False
-        # Unicode ranges for emojis
-        import re
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map symbols
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002600-\U000026FF"  # miscellaneous symbols
-            "\U00002700-\U000027BF"  # dingbats
-            "\U0001F900-\U0001F9FF"  # supplemental symbols
-            "\U0001FA70-\U0001FAFF"  # symbols and pictographs extended-a
-            "]+",
-            flags=re.UNICODE
-        )
-        return bool(emoji_pattern.search(value))
+        from . import classify
+        return classify.is_emoji(value)
     
     def is_svg_file_path(self, value):
         """Check if the value is a file path to an SVG"""
-        return value and isinstance(value, str) and value.endswith('.svg') and '/' in value
+        from . import classify
+        return classify.is_svg_file_path(value)
     
     def is_icon_name(self, value):
         """Check if the value is an icon name (like 'mdi:home' or 'fas fa-home')"""
-        if not value or not isinstance(value, str):
-            return False
-        # Font Awesome style
-        if any(value.startswith(prefix) for prefix in ['fas ', 'far ', 'fab ', 'fal ']):
-            return True
-        # Iconify style
-        return ':' in value and not self.is_emoji(value)
+        from . import classify
+        return classify.is_icon_name(value)
     
     def get_icon_type(self, value):
         """Determine the type of icon value"""
-        if not value:
-            return 'none'
-        elif self.is_emoji(value):
-            return 'emoji'
-        elif self.is_svg_file_path(value):
-            return 'svg_file'
-        elif self.is_icon_name(value):
-            return 'icon_name'
-        else:
-            return 'unknown'
+        from . import classify
+        return classify.classify(value)
     
-    def get_display_html(self, value, css_class="", style="", alt_text=""):
+    def get_display_html(self, value, css_class="", style="", alt_text="", color=None):
         """
         Get HTML representation of the icon value.
         This method provides backward compatibility while supporting new icon types.
         """
         if not value:
             return ""
+        from .rendering import render_icon_html
+        return render_icon_html(value, css_class, style, alt_text, color)
 
-        icon_type = self.get_icon_type(value)
-        
-        if icon_type == 'emoji':
-            return format_html(
-                '<span class="emoji-display {}" style="font-size: 1.2em; {}" title="{}">{}</span>',
-                css_class,
-                style,
-                alt_text or f"Emoji: {value}",
-                value
-            )
-        elif icon_type == 'svg_file':
-            return format_html(
-                '<img src="{}" class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" alt="{}"/>',
-                f"/{value}",
-                css_class,
-                style,
-                alt_text or "Icon"
-            )
-        elif icon_type == 'icon_name':
-            # Handle both Iconify and Font Awesome formats
-            if ':' in value:
-                # Iconify format (mdi:home)
-                return format_html(
-                    '<img src="https://api.iconify.design/{}.svg" class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" alt="{}"/>',
-                    value,
-                    css_class,
-                    style,
-                    alt_text or f"Icon: {value}"
-                )
-            else:
-                # Font Awesome format (fas fa-home)
-                return format_html(
-                    '<i class="{} icon-display {}" style="{}" title="{}"></i>',
-                    value,
-                    css_class,
-                    style,
-                    alt_text or f"Icon: {value}"
-                )
-        else:
-            return format_html('<span class="icon-unknown {}" style="{}">{}</span>', css_class, style, value)
+
+lookups.register(IconField)
 
 
 class IconFormField(forms.CharField):
@@ -186,6 +127,7 @@ class IconFormField(forms.CharField):
         
         super().__init__(*args, **kwargs)
         
+        from .widgets import IconPickerWidget
         self.widget = IconPickerWidget(
             icon_set=icon_set,
             template=template,
@@ -200,6 +142,7 @@ class IconFormField(forms.CharField):
         value = super().clean(value)
         
         if value:
+            from .utils import download_svg_icon, validate_icon_format
             # Handle SVG file upload if enabled
             if self.allow_svg and value.endswith('.svg') and ICON_PICKER_PATH:
                 try:
@@ -234,28 +177,40 @@ class IconChoiceField(forms.ChoiceField):
         kwargs['choices'] = choices
         
         super().__init__(*args, **kwargs)
+        from .widgets import IconPickerWidget
         self.widget = IconPickerWidget(icon_set=self.icon_set)
     
     def _get_icon_choices(self):
-        """Generate choices from the specified icon set."""
-        # This would be populated from icon data files
-        return [
-            ('', '-- Select an icon --'),
-            ('fas fa-home', 'Home'),
-            ('fas fa-user', 'User'),
-            ('fas fa-search', 'Search'),
-            ('fas fa-cog', 'Settings'),
-            ('fas fa-heart', 'Heart'),
-        ]
+        """Generate choices from the specified icon set's catalog."""
+        from .catalog import get_catalog
+        catalog = get_catalog(self.icon_set)
+        return [('', '-- Select an icon --'), *(catalog.choices() if catalog else ())]
 
 
 class SVGIconField(models.FileField):
-    """Specialized field for SVG icon uploads."""
+    """
+    Specialized field for SVG icon uploads.
+
+    New uploads are optimized (see django_icon_picker.optimize) before
+    they are saved to the field's storage.
+    """
     
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('upload_to', 'icons/svg/')
         super().__init__(*args, **kwargs)
     
+    def pre_save(self, model_instance, add):
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed and file.name.lower().endswith('.svg'):
+            from django.core.files.base import ContentFile
+            from .optimize import optimize_and_record
+            file.seek(0)
+            content = file.read()
+            if isinstance(content, str):
+                content = content.encode('utf-8')
+            file.file = ContentFile(optimize_and_record(content), name=file.name)
+        return super().pre_save(model_instance, add)
+    
     def clean(self, *args, **kwargs):
         """Validate that uploaded file is a valid SVG."""
         data = super().clean(*args, **kwargs)
@@ -288,11 +243,9 @@ def render_icon(icon_value, css_classes='', attributes=None, template='default')
     
     attributes = attributes or {}
     
-    # Create a temporary field instance to use its methods
-    field = IconField()
-    
-    return field.get_display_html(
-        icon_value, 
+    from .rendering import render_icon_html
+    return render_icon_html(
+        icon_value,
         css_class=css_classes,
         style=attributes.get('style', ''),
         alt_text=attributes.get('alt', '')
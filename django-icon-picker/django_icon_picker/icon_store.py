@@ -0,0 +1,356 @@
+# django-icon-picker/django_icon_picker/icon_store.py
+"""
+Local mirror of Iconify icon collections.
+
+Iconify publishes every icon set as a single JSON file (``mdi.json``,
+``fa-solid.json``, ...). ``manage.py import_icon_collections`` converts those
+files into a compact on-disk index, one minified file per prefix, and this
+module renders SVG markup from it so icons never have to be fetched from
+api.iconify.design while a request is being served.
+"""
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+INDEX_FILENAME = 'index.json'
+
+# Iconify defaults for icons that do not declare their own view box
+DEFAULT_SIZE = 16
+
+SVG_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+    'viewBox="{left} {top} {view_width} {view_height}">{body}</svg>'
+)
+
+
+def _number(value):
+    """Format a dimension the way Iconify does (no trailing '.0')."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _apply_transformations(body, box, h_flip=False, v_flip=False, rotate=0):
+    """
+    Apply alias transformations to an icon body.
+
+    Mirrors the logic used by Iconify so aliases such as ``mdi:arrow-left``
+    (a flipped ``arrow-right``) render identically to the public API.
+    ``box`` is a ``[left, top, width, height]`` list and is updated in place.
+    """
+    left, top, width, height = box
+    transforms = []
+    rotation = rotate
+    if h_flip:
+        if v_flip:
+            rotation += 2
+        else:
+            transforms.append(f'translate({_number(width + left)} {_number(-top)})')
+            transforms.append('scale(-1 1)')
+            top = left = 0
+    elif v_flip:
+        transforms.append(f'translate({_number(-left)} {_number(height + top)})')
+        transforms.append('scale(1 -1)')
+        top = left = 0
+
+    rotation %= 4
+    if rotation == 1:
+        center = height / 2 + top
+        transforms.insert(0, f'rotate(90 {_number(center)} {_number(center)})')
+    elif rotation == 2:
+        transforms.insert(
+            0, f'rotate(180 {_number(width / 2 + left)} {_number(height / 2 + top)})'
+        )
+    elif rotation == 3:
+        center = width / 2 + left
+        transforms.insert(0, f'rotate(-90 {_number(center)} {_number(center)})')
+
+    if rotation % 2 == 1:
+        left, top = top, left
+        width, height = height, width
+
+    box[:] = [left, top, width, height]
+    if transforms:
+        body = f'<g transform="{" ".join(transforms)}">{body}</g>'
+    return body
+
+
+def compact_collection(data):
+    """
+    Convert an Iconify JSON collection into the compact index format.
+
+    The compact format keeps one body string per icon and stores a view box
+    only when it differs from the collection default. Aliases that merely
+    point at another icon are kept as name references; aliases carrying
+    flips or rotations are materialized into icons of their own.
+    """
+    prefix = data['prefix']
+    default_box = [
+        data.get('left', 0),
+        data.get('top', 0),
+        data.get('width', DEFAULT_SIZE),
+        data.get('height', DEFAULT_SIZE),
+    ]
+    source_icons = data.get('icons', {})
+    source_aliases = data.get('aliases', {})
+
+    icons = {}
+    boxes = {}
+
+    def icon_box(entry, base=None):
+        base = base or default_box
+        return [
+            entry.get('left', base[0]),
+            entry.get('top', base[1]),
+            entry.get('width', base[2]),
+            entry.get('height', base[3]),
+        ]
+
+    for name, entry in source_icons.items():
+        box = icon_box(entry)
+        body = _apply_transformations(
+            entry['body'], box,
+            entry.get('hFlip', False), entry.get('vFlip', False), entry.get('rotate', 0),
+        )
+        icons[name] = body
+        if box != default_box:
+            boxes[name] = box
+
+    aliases = {}
+    for name in source_aliases:
+        # Walk the alias chain, accumulating transformations on the way
+        h_flip = v_flip = False
+        rotate = 0
+        overrides = {}
+        current, seen = name, set()
+        while current in source_aliases and current not in seen:
+            seen.add(current)
+            alias = source_aliases[current]
+            h_flip ^= bool(alias.get('hFlip', False))
+            v_flip ^= bool(alias.get('vFlip', False))
+            rotate += alias.get('rotate', 0)
+            for key in ('left', 'top', 'width', 'height'):
+                if key in alias and key not in overrides:
+                    overrides[key] = alias[key]
+            current = alias.get('parent')
+        if current not in source_icons:
+            continue
+
+        if not (h_flip or v_flip or rotate % 4 or overrides):
+            aliases[name] = current
+            continue
+
+        parent = source_icons[current]
+        box = icon_box(overrides, icon_box(parent))
+        body = _apply_transformations(parent['body'], box, h_flip, v_flip, rotate)
+        icons[name] = body
+        if box != default_box:
+            boxes[name] = box
+
+    compact = {
+        'prefix': prefix,
+        'name': data.get('info', {}).get('name', prefix),
+        'box': default_box,
+        'icons': icons,
+    }
+    if boxes:
+        compact['boxes'] = boxes
+    if aliases:
+        compact['aliases'] = aliases
+    return compact
+
+
+class IconStore:
+    """
+    Read/write access to a directory of compact Iconify collections.
+
+    Collections are loaded lazily, one prefix at a time, and kept in memory
+    for the lifetime of the process. ``generation`` changes whenever the
+    index is (re)loaded, so derived caches know when to rebuild.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.generation = 0
+        self._index = None
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _collection_path(self, prefix):
+        return os.path.join(self.path, f'{prefix}.json')
+
+    @property
+    def index(self):
+        """Mapping of installed prefix -> {'name': ..., 'total': ...}."""
+        if self._index is None:
+            try:
+                with open(os.path.join(self.path, INDEX_FILENAME), encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                # Nothing imported yet: look again next time, so a later
+                # import_icon_collections run is picked up without a restart
+                return {}
+            with self._lock:
+                if self._index is None:
+                    self._index = index
+                    self.generation += 1
+        return self._index
+
+    def reset(self):
+        """Forget the loaded index and collections, e.g. after another store wrote them."""
+        with self._lock:
+            self._index = None
+            self._collections.clear()
+            self.generation += 1
+
+    def prefixes(self):
+        return sorted(self.index)
+
+    def has_prefix(self, prefix):
+        return prefix in self.index
+
+    def get_collection(self, prefix):
+        """Return the compact collection for ``prefix`` or None."""
+        if prefix not in self.index:
+            return None
+        collection = self._collections.get(prefix)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(prefix)
+                if collection is None:
+                    with open(self._collection_path(prefix), encoding='utf-8') as f:
+                        collection = json.load(f)
+                    self._collections[prefix] = collection
+        return collection
+
+    def get_icon(self, icon):
+        """
+        Look up an Iconify ``prefix:name`` identifier.
+
+        Returns a ``(body, [left, top, width, height])`` tuple or None when the
+        icon is not installed locally.
+        """
+        if not icon or ':' not in icon:
+            return None
+        prefix, name = icon.split(':', 1)
+        collection = self.get_collection(prefix)
+        if collection is None:
+            return None
+        name = collection.get('aliases', {}).get(name, name)
+        body = collection['icons'].get(name)
+        if body is None:
+            return None
+        box = collection.get('boxes', {}).get(name, collection['box'])
+        return body, box
+
+    def has_icon(self, icon):
+        return self.get_icon(icon) is not None
+
+    def render_svg(self, icon, color=None, width='1em', height='1em'):
+        """
+        Render a standalone SVG document for ``icon``.
+
+        ``color`` replaces ``currentColor`` in the body, matching the
+        ``?color=`` parameter of the Iconify API. Returns None when the icon
+        is not installed locally.
+        """
+        found = self.get_icon(icon)
+        if found is None:
+            return None
+        body, box = found
+        if color:
+            body = body.replace('currentColor', color)
+        left, top, view_width, view_height = box
+        return SVG_TEMPLATE.format(
+            width=width,
+            height=height,
+            left=_number(left),
+            top=_number(top),
+            view_width=_number(view_width),
+            view_height=_number(view_height),
+            body=body,
+        )
+
+    def import_collection(self, data):
+        """
+        Write an Iconify JSON collection into the store.
+
+        Returns the number of icons (including aliases) that were installed.
+        """
+        compact = compact_collection(data)
+        prefix = compact['prefix']
+        os.makedirs(self.path, exist_ok=True)
+
+        target = self._collection_path(prefix)
+        tmp_path = f'{target}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(compact, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, target)
+
+        total = len(compact['icons']) + len(compact.get('aliases', {}))
+        index = dict(self.index)
+        index[prefix] = {'name': compact['name'], 'total': total}
+        index_path = os.path.join(self.path, INDEX_FILENAME)
+        with open(f'{index_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(f'{index_path}.tmp', index_path)
+
+        with self._lock:
+            self._index = index
+            self._collections.pop(prefix, None)
+            self.generation += 1
+        return total
+
+
+_stores = {}
+
+
+def get_icon_store():
+    """
+    Return the IconStore for ``ICON_PICKER_COLLECTIONS_PATH``.
+
+    Returns None when no local collection mirror is configured.
+    """
+    path = getattr(settings, 'ICON_PICKER_COLLECTIONS_PATH', None)
+    if not path:
+        return None
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, IconStore(path))
+    return store
+
+
+@receiver(setting_changed)
+def _reset_stores(setting, **kwargs):
+    if setting == 'ICON_PICKER_COLLECTIONS_PATH':
+        for store in list(_stores.values()):
+            store.reset()
+
+
+def render_inline_icon(value, css_class='', style='', alt_text='', color=None):
+    """
+    Render an Iconify icon as inline ``<svg>`` markup from the local mirror.
+
+    Returns None when no mirror is configured or the icon is not installed,
+    so callers can fall back to the remote ``<img>`` representation.
+    """
+    store = get_icon_store()
+    if store is None:
+        return None
+    svg = store.render_svg(value, color=color)
+    if svg is None:
+        return None
+    # Collections are imported by site administrators, so bodies are trusted
+    attributes = format_html(
+        ' class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" role="img" aria-label="{}"',
+        css_class,
+        style,
+        alt_text or f"Icon: {value}",
+    )
+    return mark_safe(svg.replace('<svg', f'<svg{attributes}', 1))
@@ -0,0 +1,240 @@
+# django-icon-picker/django_icon_picker/lookups.py
+"""
+Query lookups and transforms for IconField.
+
+They let icon values be filtered, grouped and ordered by structure in SQL
+instead of loading rows into Python::
+
+    Model.objects.filter(icon__is_emoji=True)
+    Model.objects.filter(icon__prefix='mdi')
+    Model.objects.filter(icon__icon_set='fontawesome5solid')
+    Model.objects.values('icon__icon_type').annotate(Count('pk'))
+
+``icon_type`` and ``prefix`` compile to a ``CASE`` expression matching
+django_icon_picker.classify, with one exception: SQL only looks for emoji
+at the start of the value (the way the picker stores them), or for an
+emoji presentation selector or keycap anywhere in it. When the field has
+``type_field``/``prefix_field`` companion columns, those are read
+instead, so the filters use their indexes. ``prefix`` and ``icon_set``
+equality filters compile to ``LIKE 'prefix:%'`` prefix matches.
+
+Pattern matches are case-sensitive, like classify, on every backend:
+SQLite's ``LIKE`` ignores ASCII case, so ``GLOB`` is used there, and MySQL
+compares with ``LIKE BINARY``.
+"""
+import re
+
+from django.db.models import CharField, Transform
+from django.db.models.expressions import Col
+from django.db.models.lookups import Exact, Lookup
+
+# Codepoint of the first character of an SQL string expression, per vendor;
+# MySQL's ORD() returns the UTF-8 bytes, so it goes through UTF-32.
+CODEPOINT_SQL = {
+    'sqlite': 'UNICODE(SUBSTR(%s, 1, 1))',
+    'postgresql': 'ASCII(SUBSTR(%s, 1, 1))',
+    'mysql': 'ORD(CONVERT(SUBSTR(%s, 1, 1) USING utf32))',
+}
+STRPOS_SQL = {
+    'postgresql': 'STRPOS(%s, %%s)',
+}
+
+# Case-sensitive pattern match per vendor: operator, wildcard, and the
+# characters escaped in the literal parts (and how)
+MATCH_SQL = {
+    'sqlite': ('GLOB', '*', re.compile(r'[*?[]'), r'[\g<0>]'),
+    'mysql': ('LIKE BINARY', '%', re.compile(r'[%_\\]'), r'\\\g<0>'),
+}
+DEFAULT_MATCH_SQL = ('LIKE', '%', re.compile(r'[%_\\]'), r'\\\g<0>')
+
+# Stands for "any characters" in the parts of a pattern given to _match_sql
+ANY = None
+
+
+def _match_sql(connection, lhs_sql, *parts):
+    """
+    ``(sql, param)`` testing the value of ``lhs_sql`` against ``parts``:
+    literal strings, and ``ANY`` for any run of characters.
+    """
+    operator, wildcard, special, escaped = MATCH_SQL.get(connection.vendor, DEFAULT_MATCH_SQL)
+    pattern = ''.join(wildcard if part is ANY else special.sub(escaped, part) for part in parts)
+    return f'{lhs_sql} {operator} %s', pattern
+
+
+def _companion(lhs, attribute):
+    """The Col of the field's ``type_field``/``prefix_field``, if it has one."""
+    name = getattr(getattr(lhs, 'target', None), attribute, None)
+    if not name or not isinstance(lhs, Col):
+        return None
+    return lhs.target.model._meta.get_field(name).get_col(lhs.alias)
+
+
+def _emoji_sql(connection, lhs_sql, lhs_params):
+    from .classify import EMOJI_RANGES, KEYCAP, VARIATION_SELECTOR
+
+    codepoint = CODEPOINT_SQL.get(connection.vendor, 'ASCII(SUBSTR(%s, 1, 1))') % lhs_sql
+    # Newest ranges first: most emoji are past U+1F300 and stop the ORs early
+    ranges = ' OR '.join(
+        f'{codepoint} BETWEEN {start} AND {end}' for start, end in reversed(EMOJI_RANGES)
+    )
+    selector_sql, selector = _match_sql(connection, lhs_sql, ANY, VARIATION_SELECTOR, ANY)
+    keycap_sql, keycap = _match_sql(connection, lhs_sql, ANY, KEYCAP, ANY)
+    sql = f'({codepoint} >= {EMOJI_RANGES[0][0]} AND ({ranges}) OR {selector_sql} OR {keycap_sql})'
+    params = (
+        list(lhs_params) * (len(EMOJI_RANGES) + 1)
+        + list(lhs_params) + [selector]
+        + list(lhs_params) + [keycap]
+    )
+    return sql, params
+
+
+def _type_sql(connection, lhs_sql, lhs_params):
+    from . import classify
+
+    emoji_sql, emoji_params = _emoji_sql(connection, lhs_sql, lhs_params)
+    svg_sql, svg = _match_sql(connection, lhs_sql, ANY, '.svg')
+    path_sql, path = _match_sql(connection, lhs_sql, ANY, '/', ANY)
+    names = [
+        _match_sql(connection, lhs_sql, ANY, ':', ANY),
+        *(_match_sql(connection, lhs_sql, prefix, ' ', ANY) for prefix in classify.class_prefixes()),
+    ]
+    name_sql = ' OR '.join(sql for sql, _ in names)
+    name_params = []
+    for _, pattern in names:
+        name_params += [*lhs_params, pattern]
+    sql = (
+        f'CASE WHEN {lhs_sql} IS NULL OR {lhs_sql} = %s THEN %s'
+        f' WHEN {emoji_sql} THEN %s'
+        f' WHEN {svg_sql} AND {path_sql} THEN %s'
+        f' WHEN {name_sql} THEN %s'
+        f' ELSE %s END'
+    )
+    params = [
+        *lhs_params, *lhs_params, '', classify.NONE,
+        *emoji_params, classify.EMOJI,
+        *lhs_params, svg, *lhs_params, path, classify.SVG_FILE,
+        *name_params, classify.ICON_NAME,
+        classify.UNKNOWN,
+    ]
+    return sql, params
+
+
+class IconType(Transform):
+    """``icon__icon_type``: the value's type, see classify.classify."""
+
+    lookup_name = 'icon_type'
+    output_field = CharField()
+
+    def as_sql(self, compiler, connection):
+        column = _companion(self.lhs, 'type_field')
+        if column is not None:
+            return compiler.compile(column)
+        lhs_sql, lhs_params = compiler.compile(self.lhs)
+        return _type_sql(connection, lhs_sql, lhs_params)
+
+
+class IconPrefix(Transform):
+    """``icon__prefix``: the icon set prefix of an icon name, see classify.icon_prefix."""
+
+    lookup_name = 'prefix'
+    output_field = CharField()
+
+    def as_sql(self, compiler, connection):
+        from .classify import ICON_NAME
+
+        column = _companion(self.lhs, 'prefix_field')
+        if column is not None:
+            return compiler.compile(column)
+        lhs_sql, lhs_params = compiler.compile(self.lhs)
+        type_sql, type_params = _type_sql(connection, lhs_sql, lhs_params)
+        # The prefix ends at the colon of Iconify names, at the first space
+        # of class strings
+        position = STRPOS_SQL.get(connection.vendor, 'INSTR(%s, %%s)') % lhs_sql
+        sql = (
+            f'CASE WHEN {type_sql} = %s THEN'
+            f' CASE WHEN {position} > 0 THEN SUBSTR({lhs_sql}, 1, {position} - 1)'
+            f' ELSE SUBSTR({lhs_sql}, 1, {position} - 1) END'
+            f' ELSE %s END'
+        )
+        params = [
+            *type_params, ICON_NAME,
+            *lhs_params, ':', *lhs_params, *lhs_params, ':',
+            *lhs_params, *lhs_params, ' ',
+            '',
+        ]
+        return sql, params
+
+
+def _starts_with_any(compiler, connection, lhs, prefixes):
+    lhs_sql, lhs_params = compiler.compile(lhs)
+    matches = [_match_sql(connection, lhs_sql, prefix, ANY) for prefix in prefixes]
+    params = []
+    for _, pattern in matches:
+        params += [*lhs_params, pattern]
+    return '(%s)' % ' OR '.join(sql for sql, _ in matches), params
+
+
+@IconPrefix.register_lookup
+class IconPrefixExact(Exact):
+    """``icon__prefix='mdi'`` as ``LIKE 'mdi:%'`` (or GLOB), which can use an index."""
+
+    def as_sql(self, compiler, connection):
+        from .classify import class_prefixes
+
+        prefix = self.rhs
+        if not isinstance(prefix, str) or not prefix or _companion(self.lhs.lhs, 'prefix_field'):
+            return super().as_sql(compiler, connection)
+        prefixes = [f'{prefix}:']
+        if prefix in class_prefixes():
+            prefixes.append(f'{prefix} ')
+        return _starts_with_any(compiler, connection, self.lhs.lhs, prefixes)
+
+
+class IsEmoji(Lookup):
+    """``icon__is_emoji=True``: the value is (or contains) an emoji."""
+
+    lookup_name = 'is_emoji'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        if not isinstance(self.rhs, bool):
+            raise ValueError('The QuerySet value for an is_emoji lookup must be True or False.')
+        return self.rhs
+
+    def as_sql(self, compiler, connection):
+        from .classify import EMOJI
+
+        type_sql, type_params = compiler.compile(IconType(self.lhs))
+        operator = '=' if self.rhs else '<>'
+        return f'{type_sql} {operator} %s', [*type_params, EMOJI]
+
+
+class InIconSet(Lookup):
+    """
+    ``icon__icon_set='fontawesome5solid'``: the value belongs to a
+    configured icon set, i.e. starts with its prefix (``fas fa-...`` or
+    ``fas:...``). Raises ValueError for an unknown set id.
+    """
+
+    lookup_name = 'icon_set'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        from .registry import get_registry
+
+        icon_set = get_registry().get(self.rhs)
+        if icon_set is None:
+            raise ValueError(f'Unknown icon set: {self.rhs!r}')
+        return icon_set.prefix
+
+    def as_sql(self, compiler, connection):
+        return _starts_with_any(compiler, connection, self.lhs, [f'{self.rhs} ', f'{self.rhs}:'])
+
+
+LOOKUPS = (IconType, IconPrefix, IsEmoji, InIconSet)
+
+
+def register(field_class):
+    """Register the icon lookups and transforms on ``field_class``."""
+    for lookup in LOOKUPS:
+        field_class.register_lookup(lookup)
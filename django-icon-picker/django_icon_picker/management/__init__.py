@@ -0,0 +1 @@
+# Management commands for django_icon_picker
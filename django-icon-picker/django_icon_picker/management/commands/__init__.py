@@ -0,0 +1 @@
+# Commands directory for Django management commands
@@ -0,0 +1,96 @@
+"""
+Management command to fill in the type and prefix columns of IconFields.
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the type_field/prefix_field columns of IconFields, e.g. after '
+        'adding them to a model with existing rows, loading fixtures or running '
+        'QuerySet.update()'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help='Models to backfill as app_label.ModelName (default: every model with such columns)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows read and written per query (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+
+        for model in self.get_models(options['models']):
+            fields = self.metadata_fields(model)
+            if not fields:
+                if options['models']:
+                    raise CommandError(
+                        f'{model._meta.label} has no IconField with type_field or prefix_field'
+                    )
+                continue
+            scanned, updated = self.backfill(model, fields, batch_size)
+            self.stdout.write(f'{model._meta.label}: updated {updated} of {scanned} rows')
+
+        self.stdout.write(self.style.SUCCESS('Backfill complete'))
+
+    def get_models(self, labels):
+        if not labels:
+            return apps.get_models()
+        try:
+            return [apps.get_model(label) for label in labels]
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+    def metadata_fields(self, model):
+        return [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, 'type_field', None) or getattr(field, 'prefix_field', None)
+        ]
+
+    def backfill(self, model, fields, batch_size):
+        """
+        Walk the table in primary key order, one batch at a time, and write
+        back only the rows whose columns are out of date: one UPDATE per
+        distinct set of column values in the batch.
+
+        Rows are read as values, so what is compared is what is stored.
+        """
+        columns = [
+            name for field in fields for name in (field.type_field, field.prefix_field) if name
+        ]
+        queryset = model._base_manager.order_by('pk').values(
+            'pk', *[field.attname for field in fields], *columns
+        )
+        scanned = updated = 0
+        last_pk = None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            stale = defaultdict(list)
+            for row in batch:
+                values = {}
+                for field in fields:
+                    values.update(field.icon_metadata(row[field.attname]))
+                if any(row[name] != value for name, value in values.items()):
+                    stale[tuple(values.items())].append(row['pk'])
+            for values, pks in stale.items():
+                model._base_manager.filter(pk__in=pks).update(**dict(values))
+            scanned += len(batch)
+            updated += sum(map(len, stale.values()))
+            last_pk = batch[-1]['pk']
+        return scanned, updated
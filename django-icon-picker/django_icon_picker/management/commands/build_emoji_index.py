@@ -0,0 +1,101 @@
+"""
+Management command to regenerate the packaged emoji search index (data/emoji.json).
+"""
+import json
+import os
+import re
+import unicodedata
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_icon_picker.emoji_index import DATA_FILE, get_emoji_index
+
+SKIN_TONES = re.compile('[\U0001F3FB-\U0001F3FF]')
+VARIATION_SELECTOR = '\uFE0F'
+ZWJ = '\u200D'
+STOPWORDS = {'a', 'an', 'and', 'at', 'in', 'of', 'on', 'the', 'with'}
+
+
+def tokenize(text):
+    """Lowercase, accent-free words of ``text``, as the picker's JavaScript splits queries."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [word for word in re.split(r'[^a-z0-9]+', text) if word and word not in STOPWORDS]
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the emoji search index shipped with the picker from the Unicode emoji '
+        'data of the "emoji" package and the gemoji categories and tags of the '
+        '"emojis" package (both only needed to run this command)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=DATA_FILE,
+            help='File to write (default: the data/emoji.json packaged with the app)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import emoji
+            from emojis import db as gemoji
+        except ImportError:
+            raise CommandError('Install the "emoji" and "emojis" packages to build the index.')
+
+        # gemoji lists emoji in Unicode's emoji-test.txt order, grouped by
+        # category; its alias map keeps that order, get_categories() does not
+        entries_by_char = {
+            entry.emoji: entry
+            for category in gemoji.get_categories()
+            for entry in gemoji.get_emojis_by_category(category)
+        }
+        known = {}
+        for char in gemoji.get_emoji_aliases().values():
+            known.setdefault(char.replace(VARIATION_SELECTOR, ''), entries_by_char[char])
+
+        fully_qualified = emoji.STATUS['fully_qualified']
+        unicode_data = {
+            char: data for char, data in emoji.EMOJI_DATA.items()
+            if data['status'] == fully_qualified and not SKIN_TONES.search(char)
+        }
+        # Newer emoji gemoji doesn't know yet go last, in code point order
+        order = {key: position for position, key in enumerate(known)}
+        chars = sorted(
+            unicode_data,
+            key=lambda char: (order.get(char.replace(VARIATION_SELECTOR, ''), len(order)), char),
+        )
+
+        entries = []
+        tokens = {}
+        for position, char in enumerate(chars):
+            data = unicode_data[char]
+            stripped = char.replace(VARIATION_SELECTOR, '')
+            gemoji_entry = known.get(stripped) or known.get(stripped.split(ZWJ)[0])
+            name = data['en'].strip(':').replace('_', ' ')
+            tags = list(gemoji_entry.tags) if gemoji_entry and known.get(stripped) else []
+            entries.append([char, name, ' '.join(tags)] if tags else [char, name])
+
+            words = tokenize(name)
+            for alias in data.get('alias', ()):
+                words += tokenize(alias.strip(':').replace('_', ' '))
+            if gemoji_entry is not None:
+                words += tokenize(' '.join([*gemoji_entry.aliases, *tags, gemoji_entry.category]))
+            for word in dict.fromkeys(words):
+                tokens.setdefault(word, []).append(position)
+
+        index = {
+            'source': f'Unicode emoji data from emoji {emoji.__version__}, categories and tags from gemoji',
+            'emoji': entries,
+            'tokens': dict(sorted(tokens.items())),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(options['output'])), exist_ok=True)
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+            f.write('\n')
+        # Pages rendered by this process link the new version from now on
+        get_emoji_index.cache_clear()
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(entries)} emoji and {len(tokens)} search tokens to {options['output']}"
+        ))
@@ -0,0 +1,100 @@
+"""
+Management command to regenerate the packaged Font Awesome 5 catalogs (data/fontawesome5*.json).
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_icon_picker.catalog import DATA_DIR
+
+# Set id -> (Font Awesome style, class prefix, set name)
+FONT_AWESOME_SETS = {
+    'fontawesome5solid': ('solid', 'fas', 'Font Awesome 5 Solid'),
+    'fontawesome5regular': ('regular', 'far', 'Font Awesome 5 Regular'),
+    'fontawesome5brands': ('brands', 'fab', 'Font Awesome 5 Brands'),
+}
+
+PACKAGE_METADATA = ('static', 'fontawesomefree', 'js-packages', '@fortawesome', 'fontawesome-free', 'metadata')
+
+
+def build_catalog(set_id, icons, categories, version):
+    """The catalog file contents (see django_icon_picker.catalog) of one style."""
+    style, prefix, name = FONT_AWESOME_SETS[set_id]
+    names = sorted(icon for icon, data in icons.items() if style in data['styles'])
+    positions = {icon: position for position, icon in enumerate(names)}
+    members = {}
+    for category in categories.values():
+        found = sorted(positions[icon] for icon in category['icons'] if icon in positions)
+        if found:
+            members[category['label']] = found
+    return {
+        'id': set_id,
+        'prefix': prefix,
+        'name': name,
+        'format': f'{prefix} fa-{{name}}',
+        'source': f'Font Awesome Free {version} (https://fontawesome.com/license/free)',
+        'icons': names,
+        'labels': {
+            str(position): icons[icon]['label']
+            for position, icon in enumerate(names)
+            if icons[icon]['label'] != icon.replace('-', ' ').title()
+        },
+        'categories': dict(sorted(members.items())),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the Font Awesome 5 catalogs shipped with the picker from the icons.yml '
+        'and categories.yml metadata of Font Awesome Free, as found in the '
+        '"fontawesomefree" package (only needed to run this command)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metadata',
+            help='Font Awesome metadata directory (default: the one of the installed "fontawesomefree" package)',
+        )
+        parser.add_argument(
+            '--fa-version',
+            default='5.15.4',
+            help='Font Awesome version recorded in the files (default: 5.15.4)',
+        )
+        parser.add_argument(
+            '--output-dir',
+            default=DATA_DIR,
+            help='Directory to write to (default: the data directory packaged with the app)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import yaml
+        except ImportError:
+            raise CommandError('Install the "PyYAML" package to build the catalogs.')
+        metadata = options['metadata']
+        if metadata is None:
+            try:
+                import fontawesomefree
+            except ImportError:
+                raise CommandError('Install the "fontawesomefree" package or pass --metadata.')
+            metadata = os.path.join(os.path.dirname(fontawesomefree.__file__), *PACKAGE_METADATA)
+
+        try:
+            with open(os.path.join(metadata, 'icons.yml'), encoding='utf-8') as f:
+                icons = yaml.safe_load(f)
+            with open(os.path.join(metadata, 'categories.yml'), encoding='utf-8') as f:
+                categories = yaml.safe_load(f)
+        except OSError as e:
+            raise CommandError(f'Cannot read the Font Awesome metadata: {e}')
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for set_id in FONT_AWESOME_SETS:
+            catalog = build_catalog(set_id, icons, categories, options['fa_version'])
+            path = os.path.join(options['output_dir'], f'{set_id}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(catalog, f, ensure_ascii=False, separators=(',', ':'))
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {len(catalog['icons'])} icons in {len(catalog['categories'])} categories to {path}"
+            ))
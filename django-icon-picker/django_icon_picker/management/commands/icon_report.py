@@ -0,0 +1,216 @@
+"""
+Management command to report icon usage and check saved SVG files.
+"""
+import csv
+import json
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from django_icon_picker import classify, optimize, storage
+from django_icon_picker.svg_files import icon_columns, saved_files, source_path
+
+
+class ColumnReport:
+    """Histograms of one IconField column, filled one value at a time."""
+
+    def __init__(self, model, name):
+        self.model = model
+        self.name = name
+        self.rows = 0
+        self.types = Counter()
+        self.prefixes = Counter()
+        self.icons = Counter()
+        self.missing_files = Counter()
+
+    def add(self, value, file_exists):
+        self.rows += 1
+        icon_type = classify.classify(value)
+        self.types[icon_type] += 1
+        if icon_type == classify.NONE:
+            return
+        self.icons[value] += 1
+        if icon_type == classify.ICON_NAME:
+            self.prefixes[classify.icon_prefix(value)] += 1
+        elif icon_type == classify.SVG_FILE and not file_exists(value):
+            self.missing_files[value] += 1
+
+    def as_dict(self, top):
+        return {
+            'model': self.model._meta.label,
+            'field': self.name,
+            'rows': self.rows,
+            'types': dict(self.types.most_common()),
+            'prefixes': dict(self.prefixes.most_common()),
+            'icons': self.icons.most_common(top or None),
+            'distinct_icons': len(self.icons),
+            'missing_files': self.missing_files.most_common(),
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Report how often each icon, icon type and icon set prefix is used per IconField, '
+        'and find saved SVG files that are missing or no longer referenced. Rows are '
+        'streamed, so memory use depends on the number of distinct values, not of rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help='Models to report on as app_label.ModelName (default: every model with an IconField)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['text', 'json', 'csv'],
+            default='text',
+            help='Output format (default: text)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Most used icons listed per field; 0 lists them all (default: 20)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched per round trip (default: 2000)',
+        )
+        parser.add_argument(
+            '--skip-files',
+            action='store_true',
+            help='Do not check saved SVG files in the icon storage',
+        )
+        parser.add_argument(
+            '--delete-orphaned',
+            action='store_true',
+            help=(
+                'Delete the saved SVG files no row references, e.g. after QuerySet.update() '
+                'replaced icons. Run it while no icons are being picked: a file chosen in an '
+                'unsaved form is not referenced yet.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+        if options['top'] < 0:
+            raise CommandError('--top must not be negative')
+        check_files = not options['skip_files'] and bool(getattr(settings, 'ICON_PICKER_PATH', None))
+
+        all_columns = icon_columns()
+        columns = self.get_columns(all_columns, options['models'])
+
+        # Each distinct path is only looked up in the storage once
+        checked = {}
+
+        def file_exists(path):
+            exists = checked.get(path)
+            if exists is None:
+                exists = checked[path] = not check_files or not storage.is_managed(path) or storage.exists(path)
+            return exists
+
+        reports = []
+        for model, name in columns:
+            report = ColumnReport(model, name)
+            values = model._base_manager.order_by().values_list(name, flat=True)
+            for value in values.iterator(chunk_size=options['chunk_size']):
+                report.add(value, file_exists)
+            reports.append(report)
+
+        orphaned = None
+        if options['delete_orphaned'] and not check_files:
+            raise CommandError('--delete-orphaned needs ICON_PICKER_PATH and cannot be combined with --skip-files')
+        if check_files:
+            # A color variant keeps its source file in use
+            referenced = {source_path(path) for path in checked}
+            for model, name in all_columns:
+                if (model, name) not in columns:
+                    referenced.update(map(source_path, self.stored_files(model, name)))
+            orphaned = [path for path in saved_files() if path not in referenced]
+            if options['delete_orphaned']:
+                for path in orphaned:
+                    storage.delete(path)
+
+        data = {
+            'fields': [report.as_dict(options['top']) for report in reports],
+            'orphaned_files': orphaned,
+            'deleted_orphaned': options['delete_orphaned'],
+            'optimization': optimize.totals(),
+        }
+        getattr(self, f"write_{options['format']}")(data)
+
+    def get_columns(self, columns, labels):
+        if not labels:
+            return columns
+        try:
+            models = {apps.get_model(label) for label in labels}
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        for model in models:
+            if not any(column_model is model for column_model, _ in columns):
+                raise CommandError(f'{model._meta.label} has no IconField')
+        return [(model, name) for model, name in columns if model in models]
+
+    def stored_files(self, model, name):
+        """Distinct SVG file paths stored in a column that is not being streamed."""
+        return (
+            model._base_manager.filter(**{f'{name}__icon_type': classify.SVG_FILE})
+            .order_by()
+            .values_list(name, flat=True)
+            .distinct()
+            .iterator()
+        )
+
+    def write_json(self, data):
+        self.stdout.write(json.dumps(data, ensure_ascii=False, indent=2))
+
+    def write_csv(self, data):
+        writer = csv.writer(self.stdout, lineterminator='\n')
+        writer.writerow(['model', 'field', 'histogram', 'key', 'count'])
+        for field in data['fields']:
+            label = field['model'], field['field']
+            writer.writerow([*label, 'rows', '', field['rows']])
+            for histogram in ('types', 'prefixes'):
+                for key, count in field[histogram].items():
+                    writer.writerow([*label, histogram, key, count])
+            for histogram in ('icons', 'missing_files'):
+                for key, count in field[histogram]:
+                    writer.writerow([*label, histogram, key, count])
+        for path in data['orphaned_files'] or ():
+            writer.writerow(['', '', 'orphaned_files', path, ''])
+        for key, count in data['optimization'].items():
+            writer.writerow(['', '', 'optimization', key, count])
+
+    def write_text(self, data):
+        for field in data['fields']:
+            self.stdout.write(self.style.SUCCESS(f"{field['model']}.{field['field']}: {field['rows']} rows"))
+            types = ', '.join(f'{key} {count}' for key, count in field['types'].items())
+            self.stdout.write(f'  types: {types}')
+            if field['prefixes']:
+                prefixes = ', '.join(f'{key} {count}' for key, count in field['prefixes'].items())
+                self.stdout.write(f'  prefixes: {prefixes}')
+            if field['icons']:
+                self.stdout.write(f"  most used ({field['distinct_icons']} distinct):")
+                for value, count in field['icons']:
+                    self.stdout.write(f'    {count:>8}  {value}')
+            for path, count in field['missing_files']:
+                self.stdout.write(self.style.WARNING(f'  missing file: {path} ({count} rows)'))
+        totals = data['optimization']
+        if totals['files']:
+            self.stdout.write(
+                f"Optimized {totals['files']} SVG file(s) on save: {totals['original']} -> "
+                f"{totals['optimized']} bytes ({totals['saved']} saved)"
+            )
+        if data['orphaned_files'] is None:
+            return
+        label = 'Deleted orphaned file' if data['deleted_orphaned'] else 'Orphaned file'
+        for path in data['orphaned_files']:
+            self.stdout.write(self.style.WARNING(f'{label}: {path}'))
+        verb = 'deleted' if data['deleted_orphaned'] else 'orphaned'
+        self.stdout.write(f"{len(data['orphaned_files'])} {verb} file(s)")
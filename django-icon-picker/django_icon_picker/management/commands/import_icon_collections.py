@@ -0,0 +1,90 @@
+"""
+Management command to import Iconify JSON collections into the local icon store.
+"""
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from django_icon_picker.icon_store import IconStore, get_icon_store
+from django_icon_picker.registry import get_registry
+
+
+class Command(BaseCommand):
+    help = (
+        'Import Iconify JSON collection files (e.g. mdi.json) into the local '
+        'icon store configured by ICON_PICKER_COLLECTIONS_PATH'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='Iconify collection JSON files, or directories containing them',
+        )
+        parser.add_argument(
+            '--path',
+            dest='store_path',
+            help='Store directory (defaults to ICON_PICKER_COLLECTIONS_PATH)',
+        )
+        parser.add_argument(
+            '--configured-only',
+            action='store_true',
+            help='Only import collections whose prefix is listed in DJANGO_ICON_SETS',
+        )
+
+    def handle(self, *args, **options):
+        if options['store_path']:
+            store = IconStore(options['store_path'])
+        else:
+            store = get_icon_store()
+            if store is None:
+                raise CommandError(
+                    'ICON_PICKER_COLLECTIONS_PATH is not set; pass --path to choose '
+                    'where the collections should be stored.'
+                )
+
+        configured = get_registry().prefixes()
+        imported = 0
+        for file_path in self.collect_files(options['paths']):
+            try:
+                with open(file_path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Could not read {file_path}: {e}')
+
+            prefix = data.get('prefix') if isinstance(data, dict) else None
+            if not prefix or 'icons' not in data:
+                self.stdout.write(
+                    self.style.WARNING(f'Skipping {file_path}: not an Iconify collection')
+                )
+                continue
+            if options['configured_only'] and prefix not in configured:
+                continue
+
+            total = store.import_collection(data)
+            imported += 1
+            self.stdout.write(f'Imported {prefix}: {total} icons')
+
+        # Another IconStore may have the same directory loaded in this process
+        configured_store = get_icon_store()
+        if configured_store is not None and configured_store is not store and (
+            os.path.abspath(configured_store.path) == os.path.abspath(store.path)
+        ):
+            configured_store.reset()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Imported {imported} collection(s) into {store.path}')
+        )
+
+    def collect_files(self, paths):
+        """Expand directories into the JSON files they contain."""
+        for path in paths:
+            if os.path.isdir(path):
+                for filename in sorted(os.listdir(path)):
+                    if filename.endswith('.json'):
+                        yield os.path.join(path, filename)
+            elif os.path.exists(path):
+                yield path
+            else:
+                raise CommandError(f'No such file or directory: {path}')
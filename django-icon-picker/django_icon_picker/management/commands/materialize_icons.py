@@ -0,0 +1,221 @@
+"""
+Management command to write the SVG files of the icon names stored in IconFields.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from django_icon_picker import classify, storage
+from django_icon_picker.downloads import fetch_with_retry
+from django_icon_picker.recolor import normalize_color
+from django_icon_picker.settings import get_picker_settings
+from django_icon_picker.svg_files import icon_columns, icon_file_path, source_file, source_path
+
+
+def materialize(icon, color, size, file_path, retries, backoff, offline):
+    """Render or download one SVG and save it; runs in the worker pool."""
+    content = fetch_with_retry(icon, color, size, retries, backoff, offline=offline)
+    return storage.write(file_path, content)
+
+
+def is_complete(file_path):
+    """Whether a saved SVG was written in full (not cut short by an interrupted run)."""
+    try:
+        return storage.read(file_path).rstrip().endswith(b'</svg>')
+    except OSError:
+        return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the shared SVG files of the Iconify icon names stored in IconFields, '
+        'e.g. after loading fixtures. Files that already exist are skipped, so an '
+        'interrupted run can simply be started again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models',
+            nargs='*',
+            help='Models to scan as app_label.ModelName (default: every model with an IconField)',
+        )
+        parser.add_argument(
+            '--color',
+            action='append',
+            dest='colors',
+            help='Icon color; repeat for several (default: ICON_PICKER_COLOR)',
+        )
+        parser.add_argument('--size', default='', help='Icon height, e.g. 24 or 2em (default: 1em)')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Parallel fetches (default: ICON_PICKER_SETTINGS["download_workers"])',
+        )
+        parser.add_argument(
+            '--processes',
+            action='store_true',
+            help='Use worker processes instead of threads, for CPU bound local rendering',
+        )
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Only render icons installed in the local collection store; never call the Iconify API',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Also rewrite existing files that are truncated, e.g. by an interrupted run',
+        )
+        parser.add_argument(
+            '--update-rows',
+            action='store_true',
+            help='Replace the icon names in the rows with the saved file paths, as the picker does',
+        )
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'ICON_PICKER_PATH', None):
+            raise CommandError('ICON_PICKER_PATH is not set; there is nowhere to save SVG files.')
+        colors = options['colors'] or [getattr(settings, 'ICON_PICKER_COLOR', '#00bcc9')]
+        try:
+            for color in colors:
+                normalize_color(color)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['update_rows'] and len(colors) > 1:
+            raise CommandError('--update-rows needs a single --color')
+        picker_settings = get_picker_settings()
+        workers = options['workers'] or picker_settings['download_workers']
+        if workers < 1:
+            raise CommandError('--workers must be positive')
+        size = options['size']
+
+        columns = self.get_columns(options['models'])
+        column_icons = {column: self.stored_icons(*column) for column in columns}
+
+        # Rows sharing an icon share its file, so each (icon, color) is done
+        # once; with ICON_PICKER_RECOLOR all colors share the icon's source file
+        jobs = {}
+        for icons in column_icons.values():
+            for icon in icons:
+                for color in colors:
+                    file_path, fetch_color = source_file(icon, color, size)
+                    jobs.setdefault(file_path, (icon, fetch_color))
+        pending = {
+            file_path: job for file_path, job in jobs.items()
+            if not storage.exists(file_path) or (options['verify'] and not is_complete(file_path))
+        }
+        self.stdout.write(
+            f'{len(jobs)} SVG file(s) for {sum(map(len, column_icons.values()))} icon name(s) '
+            f'in {len(columns)} column(s): {len(pending)} to write'
+        )
+
+        failed = self.run(pending, size, workers, options, picker_settings)
+        if options['update_rows']:
+            self.update_rows(column_icons, colors[0], size, failed)
+        self.report_missing(columns)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Wrote {len(pending) - len(failed)} file(s), {len(jobs) - len(pending)} already present'
+            )
+        )
+        if failed:
+            raise CommandError(
+                f'{len(failed)} file(s) could not be written; run the command again to retry them'
+            )
+
+    def get_columns(self, labels):
+        columns = icon_columns()
+        if not labels:
+            return columns
+        try:
+            models = {apps.get_model(label) for label in labels}
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        for model in models:
+            if not any(column_model is model for column_model, _ in columns):
+                raise CommandError(f'{model._meta.label} has no IconField')
+        return [(model, name) for model, name in columns if model in models]
+
+    def stored_icons(self, model, name):
+        """Distinct Iconify names (``prefix:name``) stored in one column."""
+        return list(
+            model._base_manager.filter(**{f'{name}__icon_type': classify.ICON_NAME, f'{name}__contains': ':'})
+            .order_by()
+            .values_list(name, flat=True)
+            .distinct()
+        )
+
+    def run(self, pending, size, workers, options, picker_settings):
+        """Materialize ``pending`` in the worker pool; returns the failed file paths."""
+        if not pending:
+            return set()
+        if options['processes']:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='icon-picker-materialize')
+
+        failed = set()
+        step = max(1, len(pending) // 10)
+        with executor:
+            futures = {
+                executor.submit(
+                    materialize, icon, color, size, file_path,
+                    picker_settings['download_retries'], picker_settings['download_backoff'],
+                    options['offline'],
+                ): file_path
+                for file_path, (icon, color) in pending.items()
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                file_path = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.add(file_path)
+                    icon, color = pending[file_path]
+                    self.stderr.write(f'  {icon} ({color or "currentColor"}): {e}')
+                if done % step == 0 or done == len(pending):
+                    self.stdout.write(f'  {done}/{len(pending)} done, {len(failed)} failed')
+        return failed
+
+    def update_rows(self, column_icons, color, size, failed):
+        """Point rows at their saved files; ``update()`` skips pre_save, so set the companions too."""
+        updated = 0
+        for (model, name), icons in column_icons.items():
+            field = model._meta.get_field(name)
+            for icon in icons:
+                file_path = icon_file_path(icon, color, size)
+                if source_path(file_path) in failed:
+                    continue
+                values = {name: file_path}
+                if getattr(field, 'type_field', None):
+                    values[field.type_field] = classify.classify(file_path)
+                if getattr(field, 'prefix_field', None):
+                    values[field.prefix_field] = classify.icon_prefix(file_path)
+                updated += model._base_manager.filter(**{name: icon}).update(**values)
+        self.stdout.write(f'Pointed {updated} row(s) at their saved files')
+
+    def report_missing(self, columns):
+        """Warn about stored file paths whose file is gone; their icon name is lost."""
+        missing = [
+            file_path
+            for model, name in columns
+            for file_path in model._base_manager.filter(**{f'{name}__icon_type': classify.SVG_FILE})
+            .order_by()
+            .values_list(name, flat=True)
+            .distinct()
+            if storage.is_managed(file_path) and not storage.exists(file_path)
+        ]
+        if missing:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(missing)} saved file(s) referenced by rows are missing and cannot be '
+                    f'rebuilt from their path, e.g. {missing[0]}'
+                )
+            )
@@ -0,0 +1,100 @@
+"""
+Management command to optimize saved SVG files and measure the bytes saved.
+"""
+import gzip
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from django_icon_picker import optimize, storage
+from django_icon_picker.settings import get_picker_settings
+from django_icon_picker.svg_files import saved_files
+
+
+class Command(BaseCommand):
+    help = (
+        'Optimize the SVG files saved before optimization on save was enabled (or at '
+        'another level), and report their size before and after. Given directories, '
+        'only measure the SVG files in them, e.g. to compare levels on your own icons.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directories',
+            nargs='*',
+            help='Directories of SVG files to measure instead of the icon storage (never modified)',
+        )
+        parser.add_argument(
+            '--level',
+            type=int,
+            choices=[optimize.OFF, optimize.SAFE, optimize.PRECISION],
+            help='Optimization level (default: ICON_PICKER_SETTINGS["svg_optimize"])',
+        )
+        parser.add_argument(
+            '--precision',
+            type=int,
+            help='Decimals kept by level 2 (default: ICON_PICKER_SETTINGS["svg_precision"])',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the savings without rewriting any file',
+        )
+
+    def handle(self, *args, **options):
+        picker_settings = get_picker_settings()
+        level = picker_settings['svg_optimize'] if options['level'] is None else options['level']
+        precision = picker_settings['svg_precision'] if options['precision'] is None else options['precision']
+        if precision < 0:
+            raise CommandError('--precision must not be negative')
+
+        if options['directories']:
+            files = self.directory_files(options['directories'])
+            rewrite = False
+        else:
+            if not getattr(settings, 'ICON_PICKER_PATH', None):
+                raise CommandError('ICON_PICKER_PATH is not set')
+            files = ((path, storage.read(path)) for path in saved_files())
+            rewrite = not options['dry_run']
+
+        count = changed = original = optimized = original_gz = optimized_gz = 0
+        elapsed = 0.0
+        for path, content in files:
+            started = time.perf_counter()
+            result = optimize.optimize_svg(content, level, precision)
+            elapsed += time.perf_counter() - started
+            count += 1
+            original += len(content)
+            optimized += len(result)
+            original_gz += len(gzip.compress(content, mtime=0))
+            optimized_gz += len(gzip.compress(result, mtime=0))
+            if result != content:
+                changed += 1
+                if rewrite:
+                    storage.write(path, result, raw=True)
+                    optimize.record(len(content), len(result))
+
+        if not count:
+            self.stdout.write('No SVG files found')
+            return
+        verb = 'Optimized' if rewrite else 'Would optimize'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {changed} of {count} SVG file(s) at level {level} in {elapsed * 1000:.0f} ms '
+            f'({elapsed * 1e6 / count:.0f} µs per file)'
+        ))
+        self.stdout.write(f'  bytes: {original} -> {optimized} ({self.percent(original, optimized)})')
+        self.stdout.write(f'  gzip:  {original_gz} -> {optimized_gz} ({self.percent(original_gz, optimized_gz)})')
+
+    def directory_files(self, directories):
+        for directory in directories:
+            root = Path(directory)
+            if not root.is_dir():
+                raise CommandError(f'{directory} is not a directory')
+            for path in sorted(root.rglob('*.svg')):
+                yield str(path), path.read_bytes()
+
+    @staticmethod
+    def percent(before, after):
+        return f'-{(before - after) * 100 / before:.1f}%' if before else '0%'
@@ -0,0 +1,48 @@
+# django-icon-picker/django_icon_picker/managers.py
+"""
+QuerySet helpers for models with an IconField::
+
+    class Category(models.Model):
+        icon = IconField()
+
+        objects = IconQuerySet.as_manager()
+
+    Category.objects.usage_counts()[:10]    # most used icons
+    Category.objects.type_counts()          # emoji vs. icon names vs. SVGs
+    Category.objects.prefix_counts()        # rows per icon set prefix
+
+Every helper is a single ``GROUP BY`` query built on the lookups in
+django_icon_picker.lookups, returning ``values()`` dicts keyed by the
+grouped expression (e.g. ``icon__icon_type``) and ``count``. ``field``
+names the IconField to group by and defaults to the model's first one.
+"""
+from django.db.models import Count, QuerySet
+
+
+class IconQuerySet(QuerySet):
+
+    def _icon_field(self, field):
+        if field:
+            return field
+        from .field import IconField as LegacyIconField
+        from .fields import IconField
+        for model_field in self.model._meta.concrete_fields:
+            if isinstance(model_field, (IconField, LegacyIconField)):
+                return model_field.name
+        raise ValueError(f'{self.model.__name__} has no IconField')
+
+    def _counts(self, key):
+        return self.values(key).annotate(count=Count('pk')).order_by('-count', key)
+
+    def usage_counts(self, field=None):
+        """``{'icon': value, 'count': n}`` per distinct icon, most used first."""
+        return self._counts(self._icon_field(field))
+
+    def type_counts(self, field=None):
+        """``{'icon__icon_type': type, 'count': n}`` per type, see classify.classify."""
+        return self._counts(f'{self._icon_field(field)}__icon_type')
+
+    def prefix_counts(self, field=None):
+        """``{'icon__prefix': prefix, 'count': n}`` per icon set prefix of the icon names."""
+        field = self._icon_field(field)
+        return self.exclude(**{f'{field}__prefix': ''})._counts(f'{field}__prefix')
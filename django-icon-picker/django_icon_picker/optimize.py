@@ -0,0 +1,251 @@
+# django-icon-picker/django_icon_picker/optimize.py
+"""
+SVG optimization on save.
+
+Saved icons are served far more often than they are written, so every
+SVG going into the icon storage (downloads, local renders, sprites) and
+every ``SVGIconField`` upload is optimized once, on the way in. The
+``svg_optimize`` setting picks how far that goes:
+
+* ``0``: store files byte for byte;
+* ``1`` (default): lossless clean-up. The XML declaration, doctype,
+  comments (except ``<!--! ... -->`` license notices), ``<metadata>`` and
+  editor namespaces (Inkscape, Sodipodi, Illustrator, Sketch, ...) are
+  removed and whitespace between tags is collapsed;
+* ``2``: also rounds coordinates to ``svg_precision`` decimals and
+  rewrites path data with the fewest separators.
+
+The bytes before and after are added to counters in the ``svg_stats_cache``
+cache, which ``icon_report`` and ``optimize_icons`` print. Use a shared
+cache backend to get totals across processes.
+"""
+import re
+
+from django.core.cache import caches
+
+from .settings import get_picker_settings
+
+OFF = 0
+SAFE = 1
+PRECISION = 2
+
+EDITOR_NAMESPACES = {
+    'http://www.inkscape.org/namespaces/inkscape',
+    'http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd',
+    'http://inkscape.sourceforge.net/DTD/sodipodi-0.dtd',
+    'http://www.bohemiancoding.com/sketch/ns',
+    'http://www.serif.com/',
+    'http://www.vector.evaxdesign.sk',
+    'http://ns.adobe.com/AdobeIllustrator/10.0/',
+    'http://ns.adobe.com/AdobeSVGViewerExtensions/3.0/',
+    'http://ns.adobe.com/Extensibility/1.0/',
+    'http://ns.adobe.com/Flows/1.0/',
+    'http://ns.adobe.com/GenericCustomNamespace/1.0/',
+    'http://ns.adobe.com/Graphs/1.0/',
+    'http://ns.adobe.com/ImageReplacement/1.0/',
+    'http://ns.adobe.com/SaveForWeb/1.0/',
+    'http://ns.adobe.com/Variables/1.0/',
+    'http://ns.adobe.com/XPath/1.0/',
+    # Only used inside <metadata>
+    'http://purl.org/dc/elements/1.1/',
+    'http://creativecommons.org/ns#',
+    'http://web.resource.org/cc/',
+    'http://www.w3.org/1999/02/22-rdf-syntax-ns#',
+}
+
+XML_DECLARATION_RE = re.compile(r'^\s*<\?xml\b[^>]*\?>\s*')
+DOCTYPE_RE = re.compile(r'<!DOCTYPE[^>\[]*>\s*', re.IGNORECASE)
+COMMENT_RE = re.compile(r'<!--(?!!).*?-->', re.DOTALL)
+METADATA_RE = re.compile(r'<metadata\b[^>]*?(?:/>|>.*?</metadata\s*>)', re.DOTALL)
+NAMESPACE_RE = re.compile(r'\sxmlns:([\w.-]+)\s*=\s*(["\'])(.*?)\2')
+TAG_RE = re.compile(r'<[^!?][^>]*>')
+# Whitespace inside <text> may be rendered, so documents with text keep theirs
+TEXT_RE = re.compile(r'<(?:[\w-]+:)?text\b|xml:space', re.IGNORECASE)
+
+NUMBER_RE = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+PATH_TOKEN_RE = re.compile(r'\s*,?\s*(?:([MmZzLlHhVvCcSsQqTtAa])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))')
+ARC_FLAG_RE = re.compile(r'\s*,?\s*([01])')
+ARC_FLAG_ARGUMENTS = (3, 4)
+NUMERIC_ATTRIBUTES = (
+    'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy',
+    'width', 'height', 'stroke-width', 'opacity', 'fill-opacity', 'stroke-opacity', 'offset',
+)
+ATTRIBUTE_RE = re.compile(
+    r'(\s)(d|points|transform|{})\s*=\s*(["\'])(.*?)\3'.format('|'.join(map(re.escape, NUMERIC_ATTRIBUTES)))
+)
+
+STATS_KEYS = ('files', 'original', 'optimized')
+
+
+def format_number(token, precision):
+    """``token`` rounded to ``precision`` decimals, without redundant zeros."""
+    if '.' not in token and 'e' not in token.lower():
+        return token.lstrip('+')
+    text = f'{round(float(token), precision):.{precision}f}'.rstrip('0').rstrip('.')
+    if text in ('', '-0'):
+        return '0'
+    if text.startswith('0.'):
+        return text[1:]
+    if text.startswith('-0.'):
+        return f'-{text[2:]}'
+    return text
+
+
+def _join(numbers, flags=()):
+    """
+    Numbers with only the separators the SVG grammar needs; the
+    one-character arc flags at the ``flags`` positions end themselves.
+    """
+    parts = []
+    previous = ''
+    for position, number in enumerate(numbers):
+        if parts and not (
+            position - 1 in flags
+            or number[0] == '-'
+            or (number[0] == '.' and ('.' in previous or 'e' in previous.lower()))
+        ):
+            parts.append(' ')
+        parts.append(number)
+        previous = number
+    return ''.join(parts)
+
+
+def optimize_path(data, precision):
+    """
+    Rounded, compact path data; ``data`` itself if it does not parse.
+
+    Arc flags are read one character at a time, as in ``a1 1 0 01.5 2``.
+    """
+    commands = []
+    position = 0
+    command = None
+    arguments = 0
+    while True:
+        if command in ('A', 'a') and arguments % 7 in ARC_FLAG_ARGUMENTS:
+            match = ARC_FLAG_RE.match(data, position)
+            if match is None:
+                break
+            commands[-1][1].append(match.group(1))
+            position = match.end()
+            arguments += 1
+            continue
+        match = PATH_TOKEN_RE.match(data, position)
+        if match is None:
+            break
+        position = match.end()
+        if match.group(1):
+            command = match.group(1)
+            arguments = 0
+            commands.append((command, []))
+        elif command is None:
+            return data
+        else:
+            commands[-1][1].append(format_number(match.group(2), precision))
+            arguments += 1
+    if data[position:].strip():
+        return data
+    return ''.join(command + _join(numbers, _flag_positions(command, numbers)) for command, numbers in commands)
+
+
+def _flag_positions(command, numbers):
+    if command not in ('A', 'a'):
+        return ()
+    return {position for position in range(len(numbers)) if position % 7 in ARC_FLAG_ARGUMENTS}
+
+
+def _optimize_attribute(name, value, precision):
+    if name == 'd':
+        return optimize_path(value, precision)
+    if name == 'points':
+        return _join([format_number(number, precision) for number in NUMBER_RE.findall(value)])
+    if name == 'transform':
+        return NUMBER_RE.sub(lambda match: format_number(match.group(), precision), value)
+    if NUMBER_RE.fullmatch(value.strip()):
+        return format_number(value.strip(), precision)
+    return value
+
+
+def _strip_namespace(svg, prefix):
+    escaped = re.escape(prefix)
+    svg = re.sub(rf'<{escaped}:[\w.-]+\b[^>]*?/>', '', svg)
+    svg = re.sub(rf'<({escaped}:[\w.-]+)\b[^>]*>.*?</\1\s*>', '', svg, flags=re.DOTALL)
+    svg = re.sub(rf'\s{escaped}:[\w.-]+\s*=\s*(["\']).*?\1', '', svg)
+    return re.sub(rf'\sxmlns:{escaped}\s*=\s*(["\']).*?\1', '', svg)
+
+
+def _collapse_tag(match):
+    tag = re.sub(r'\s+', ' ', match.group())
+    return tag.replace(' />', '/>').replace(' >', '>')
+
+
+def optimize_svg(content, level=None, precision=None):
+    """
+    Return the optimized SVG ``content`` (bytes).
+
+    ``level`` and ``precision`` default to the ``svg_optimize`` and
+    ``svg_precision`` settings. Content that is not UTF-8 text is
+    returned unchanged.
+    """
+    options = get_picker_settings()
+    level = options['svg_optimize'] if level is None else level
+    precision = options['svg_precision'] if precision is None else precision
+    if level < SAFE:
+        return content
+    try:
+        svg = content.decode('utf-8')
+    except UnicodeDecodeError:
+        return content
+
+    declaration = XML_DECLARATION_RE.match(svg)
+    if declaration and not re.search(r'encoding\s*=\s*["\'](?!utf-8["\'])', declaration.group(), re.IGNORECASE):
+        svg = svg[declaration.end():]
+    svg = DOCTYPE_RE.sub('', svg)
+    svg = COMMENT_RE.sub('', svg)
+    svg = METADATA_RE.sub('', svg)
+    for prefix, _, uri in NAMESPACE_RE.findall(svg):
+        if uri in EDITOR_NAMESPACES:
+            svg = _strip_namespace(svg, prefix)
+    if level >= PRECISION:
+        svg = ATTRIBUTE_RE.sub(
+            lambda match: '{}{}={}{}{}'.format(
+                match.group(1), match.group(2), match.group(3),
+                _optimize_attribute(match.group(2), match.group(4), precision), match.group(3),
+            ),
+            svg,
+        )
+    if not TEXT_RE.search(svg):
+        svg = re.sub(r'>\s+<', '><', svg)
+        svg = TAG_RE.sub(_collapse_tag, svg)
+    optimized = svg.strip().encode('utf-8')
+    # Never store something bigger than what came in
+    return optimized if len(optimized) < len(content) else content
+
+
+def record(original, optimized):
+    """Add one optimized file's byte counts to the running totals."""
+    cache = caches[get_picker_settings()['svg_stats_cache']]
+    for key, value in zip(STATS_KEYS, (1, original, optimized)):
+        cache_key = f'icon_picker:optimize:{key}'
+        cache.add(cache_key, 0, None)
+        try:
+            cache.incr(cache_key, value)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(cache_key, value, None)
+
+
+def totals():
+    """``{'files', 'original', 'optimized', 'saved'}`` over every optimized save."""
+    cache = caches[get_picker_settings()['svg_stats_cache']]
+    values = cache.get_many([f'icon_picker:optimize:{key}' for key in STATS_KEYS])
+    result = {key: values.get(f'icon_picker:optimize:{key}', 0) for key in STATS_KEYS}
+    result['saved'] = result['original'] - result['optimized']
+    return result
+
+
+def optimize_and_record(content):
+    """Optimize ``content`` per the settings and account for it."""
+    optimized = optimize_svg(content)
+    if get_picker_settings()['svg_optimize'] >= SAFE:
+        record(len(content), len(optimized))
+    return optimized
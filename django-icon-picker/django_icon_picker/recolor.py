@@ -0,0 +1,161 @@
+# django-icon-picker/django_icon_picker/recolor.py
+"""
+Recolorable SVG files.
+
+Iconify bakes the color into each download, so every color an editor
+picks used to be another upstream fetch and another file. With
+``ICON_PICKER_RECOLOR = True`` an icon is stored once per size, as the
+``currentColor`` SVG (the *source* file), and rows point at a *variant*
+path that names the color next to the source's hash::
+
+    {ICON_PICKER_PATH}/icons/ab/abcdef....svg          source, stored
+    {ICON_PICKER_PATH}/icons/ab/abcdef....ff0000.svg   variant, rendered
+
+Variants never exist in the storage. Reading one substitutes the color
+for ``currentColor`` in the source (as Iconify's ``?color=`` does), and
+the result is kept in a process-wide LRU bounded by its size in bytes
+(``render_cache_bytes``).
+
+Colors are normalized first, so ``#FFF``, ``#ffffff`` and ``fff`` are
+one color and one variant. With the setting off, paths are never read as
+variants: a stored file that happens to look like one is just a file.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .settings import get_picker_settings
+
+HEX_RE = re.compile(r'#?([0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})')
+NAME_RE = re.compile(r'[a-zA-Z]+')
+
+# <32 hex digit source key>.<color>.svg, see svg_files.icon_key
+VARIANT_RE = re.compile(r'^(?P<source>(?:.*/)?[0-9a-f]{32})\.(?P<color>[0-9a-f]{6}|[0-9a-f]{8}|[a-z]+)\.svg$')
+SOURCE_RE = re.compile(r'^(?:.*/)?[0-9a-f]{32}\.svg$')
+
+
+def normalize_color(color):
+    """
+    Canonical form of a CSS color: ``#rrggbb``/``#rrggbbaa`` in lower case
+    for hex colors (with or without ``#``), the lower cased name for named
+    colors and '' for none or ``currentColor``.
+
+    Raises ValueError for anything else.
+    """
+    color = (color or '').strip()
+    if not color or color.lower() == 'currentcolor':
+        return ''
+    match = HEX_RE.fullmatch(color)
+    if match:
+        digits = match.group(1).lower()
+        if len(digits) <= 4:
+            digits = ''.join(digit * 2 for digit in digits)
+        if digits.endswith('ff') and len(digits) == 8:
+            digits = digits[:6]
+        return f'#{digits}'
+    if NAME_RE.fullmatch(color):
+        return color.lower()
+    raise ValueError(f'Invalid color: {color!r}')
+
+
+def variant_path(source_path, color):
+    """Path of ``source_path`` (a ``.svg`` file) rendered in ``color``."""
+    color = normalize_color(color)
+    if not color:
+        return source_path
+    return f"{source_path[:-len('.svg')]}.{color.lstrip('#')}.svg"
+
+
+def _enabled():
+    return getattr(settings, 'ICON_PICKER_RECOLOR', False)
+
+
+def split_variant(path):
+    """
+    ``(source path, color)`` of a variant path, ``(path, None)`` for
+    anything else and whenever ICON_PICKER_RECOLOR is off.
+    """
+    match = VARIANT_RE.match(path) if _enabled() else None
+    if match is None:
+        return path, None
+    color = match.group('color')
+    if len(color) in (6, 8) and HEX_RE.fullmatch(color):
+        color = f'#{color}'
+    return f"{match.group('source')}.svg", color
+
+
+def variant_prefix(path):
+    """
+    What the variant paths of source file ``path`` start with; None for
+    other paths and whenever ICON_PICKER_RECOLOR is off.
+    """
+    return f"{path[:-len('.svg')]}." if _enabled() and SOURCE_RE.match(path) else None
+
+
+def recolor(content, color):
+    """Substitute ``color`` for ``currentColor`` in SVG ``content`` (bytes)."""
+    return content.replace(b'currentColor', color.encode('ascii')) if color else content
+
+
+class RenderCache:
+    """Recolored SVGs by ``(source path, color)``, least recently used first out."""
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def render(self, source_path, color, read):
+        """Return ``source_path`` in ``color``, calling ``read()`` for the source on a miss."""
+        key = (source_path, color)
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return content
+            self.misses += 1
+        content = recolor(read(), color)
+        with self._lock:
+            if key not in self._entries and len(content) <= self.max_bytes:
+                self._entries[key] = content
+                self.size += len(content)
+                while self.size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return content
+
+    def discard(self, source_path):
+        """Forget every rendering of ``source_path``, e.g. after it was rewritten."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == source_path]:
+                self.size -= len(self._entries.pop(key))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Return the process-wide RenderCache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RenderCache(get_picker_settings()['render_cache_bytes'])
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_cache(setting, **kwargs):
+    global _cache
+    if setting == 'ICON_PICKER_SETTINGS':
+        with _cache_lock:
+            _cache = None
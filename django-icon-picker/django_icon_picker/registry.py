@@ -0,0 +1,112 @@
+# django-icon-picker/django_icon_picker/registry.py
+"""
+Process-wide registry of the configured icon sets.
+
+``DJANGO_ICON_SETS`` is parsed once into IconSet objects indexed by id and
+by prefix, so "which set owns ``fas``" is a dict lookup. A set's icon list
+(its catalog, see django_icon_picker.catalog) is only loaded the first time
+it is asked for, so building the registry never touches icon data. The
+registry is rebuilt when ``DJANGO_ICON_SETS`` or ``ICON_PICKER_CATALOG_PATH``
+change, e.g. under ``override_settings``.
+"""
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .settings import DEFAULT_ICON_SETS
+
+_catalog_lock = threading.Lock()
+
+
+class IconSet:
+    """One ``(id, prefix, name[, version])`` entry of ``DJANGO_ICON_SETS``."""
+
+    __slots__ = ('id', 'prefix', 'name', 'version', '_catalog')
+
+    def __init__(self, set_id, prefix, name, version='latest'):
+        self.id = set_id
+        self.prefix = prefix
+        self.name = name
+        self.version = version
+        self._catalog = None
+
+    def __repr__(self):
+        return f'<IconSet {self.id} ({self.prefix})>'
+
+    @property
+    def catalog(self):
+        """The set's IconSetCatalog, loaded on first access."""
+        if self._catalog is None:
+            with _catalog_lock:
+                if self._catalog is None:
+                    from .catalog import load_catalog
+                    self._catalog = load_catalog(self)
+        return self._catalog
+
+    def as_dict(self):
+        return {'id': self.id, 'prefix': self.prefix, 'name': self.name, 'version': self.version}
+
+
+class IconSetRegistry:
+    """The configured icon sets, in order, indexed by id and prefix."""
+
+    def __init__(self, icon_sets):
+        self.sets = tuple(IconSet(*entry) for entry in icon_sets)
+        self._by_id = {icon_set.id: icon_set for icon_set in self.sets}
+        self._by_prefix = {}
+        for icon_set in self.sets:
+            # The first set listed for a prefix owns it
+            self._by_prefix.setdefault(icon_set.prefix, icon_set)
+        self._dicts = tuple(icon_set.as_dict() for icon_set in self.sets)
+
+    def __iter__(self):
+        return iter(self.sets)
+
+    def __len__(self):
+        return len(self.sets)
+
+    def __contains__(self, set_id):
+        return set_id in self._by_id
+
+    def get(self, set_id):
+        """The IconSet with id ``set_id``, or None."""
+        return self._by_id.get(set_id)
+
+    def for_prefix(self, prefix):
+        """The IconSet owning ``prefix`` (e.g. ``fas``), or None."""
+        return self._by_prefix.get(prefix)
+
+    def prefixes(self):
+        return self._by_prefix.keys()
+
+    def default(self):
+        """The first configured set, or None when there are none."""
+        return self.sets[0] if self.sets else None
+
+    def as_dicts(self):
+        """Metadata of every set, as sent to the widget's JavaScript."""
+        return self._dicts
+
+
+_registry = None
+_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide IconSetRegistry, building it on first use."""
+    global _registry
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                _registry = IconSetRegistry(getattr(settings, 'DJANGO_ICON_SETS', DEFAULT_ICON_SETS))
+    return _registry
+
+
+@receiver(setting_changed)
+def _reset_registry(setting, **kwargs):
+    global _registry
+    if setting in ('DJANGO_ICON_SETS', 'ICON_PICKER_CATALOG_PATH'):
+        with _lock:
+            _registry = None
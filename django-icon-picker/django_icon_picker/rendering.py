@@ -0,0 +1,113 @@
+# django-icon-picker/django_icon_picker/rendering.py
+"""
+HTML rendering of icon values.
+
+``render_icon_html`` turns a single stored value into markup and memoizes
+the fragment, so a value that appears on many rows is only formatted once.
+``render_icons`` renders a whole column (e.g. one field across a queryset)
+in a single pass, classifying and formatting each distinct value once.
+
+The memo is keyed on the icon store's generation, so newly imported
+collections show up, and is cleared when a setting the markup depends on
+(paths, storage, URLs, recoloring) changes.
+"""
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.html import format_html
+
+from . import storage
+from .classify import EMOJI, ICON_NAME, NONE, SVG_FILE, classify
+from .icon_store import get_icon_store, render_inline_icon
+
+# Settings the rendered markup depends on
+RENDER_SETTINGS = {
+    'ICON_PICKER_PATH', 'ICON_PICKER_STORAGE', 'ICON_PICKER_RECOLOR', 'ICON_PICKER_COLLECTIONS_PATH',
+    'STORAGES', 'ROOT_URLCONF', 'FORCE_SCRIPT_NAME', 'DJANGO_ICON_SETS',
+}
+
+
+def render_icon_html(value, css_class="", style="", alt_text="", color=None):
+    """
+    Get HTML representation of an icon value.
+
+    Emojis render as text, saved SVG files and Iconify names as images (or
+    inline SVG when the icon is installed locally) and Font Awesome class
+    strings as ``<i>`` tags.
+    """
+    store = get_icon_store()
+    return _render_icon_html(value, css_class, style, alt_text, color, store.generation if store else None)
+
+
+@lru_cache(maxsize=4096)
+def _render_icon_html(value, css_class, style, alt_text, color, store_generation):
+    icon_type = classify(value)
+
+    if icon_type == NONE:
+        return ""
+    elif icon_type == EMOJI:
+        return format_html(
+            '<span class="emoji-display {}" style="font-size: 1.2em; {}" title="{}">{}</span>',
+            css_class,
+            style,
+            alt_text or f"Emoji: {value}",
+            value
+        )
+    elif icon_type == SVG_FILE:
+        return format_html(
+            '<img src="{}" class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" alt="{}"/>',
+            storage.url(value),
+            css_class,
+            style,
+            alt_text or "Icon"
+        )
+    elif icon_type == ICON_NAME and ':' in value:
+        # Iconify format (mdi:home), rendered locally when mirrored
+        local_html = render_inline_icon(value, css_class, style, alt_text, color)
+        if local_html is not None:
+            return local_html
+        return format_html(
+            '<img src="https://api.iconify.design/{}.svg" class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" alt="{}"/>',
+            value,
+            css_class,
+            style,
+            alt_text or f"Icon: {value}"
+        )
+    elif icon_type == ICON_NAME:
+        # Font Awesome format (fas fa-home)
+        return format_html(
+            '<i class="{} icon-display {}" style="{}" title="{}"></i>',
+            value,
+            css_class,
+            style,
+            alt_text or f"Icon: {value}"
+        )
+    else:
+        return format_html('<span class="icon-unknown {}" style="{}">{}</span>', css_class, style, value)
+
+
+@receiver(setting_changed)
+def _reset_rendered(setting, **kwargs):
+    if setting in RENDER_SETTINGS:
+        _render_icon_html.cache_clear()
+
+
+def render_icons(values, css_class="", style="", alt_text="", color=None):
+    """
+    Render a column of icon values in one pass.
+
+    Returns a list of HTML fragments in the same order as ``values``. Each
+    distinct value is classified and formatted once, however many rows
+    share it.
+    """
+    rendered = {}
+    result = []
+    for value in values:
+        html = rendered.get(value)
+        if html is None:
+            html = rendered[value] = render_icon_html(
+                str(value) if value else "", css_class, style, alt_text, color
+            )
+        result.append(html)
+    return result
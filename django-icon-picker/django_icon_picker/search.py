@@ -0,0 +1,238 @@
+# django-icon-picker/django_icon_picker/search.py
+"""
+In-memory search index over the locally installed icon collections.
+
+The index is built from the IconStore, again whenever collections are
+imported, and answers the same kind of queries as
+``https://api.iconify.design/search``: every keyword must appear in the
+icon name, optionally restricted to a set of prefixes. Icon names are
+split into ``-`` separated tokens; keywords of three characters or more
+find their tokens through a trigram inverted index over the (much
+smaller) token vocabulary, shorter keywords use a precomputed index of
+one- and two-character token prefixes.
+"""
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+
+from .icon_store import get_icon_store
+
+DEFAULT_LIMIT = 64
+MAX_LIMIT = 999
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Candidates of the smallest posting list taken in the first round; rounds
+# double in size after that
+FIRST_CHUNK = 64
+# Binary search each candidate instead of slicing a list spanning this
+# many times more ids than there are candidates
+PROBE_RATIO = 16
+
+
+def _intersect(postings, lo=0, hi=None):
+    """
+    Yield ids in ``[lo, hi)`` present in every ascending posting array.
+
+    The smallest array is walked in growing chunks and each chunk is
+    intersected, at C speed, with only the slice of the other arrays
+    spanning the same ids, so a caller that stops after one page of
+    results never touches the rest of the lists.
+    """
+    postings = sorted(postings, key=len)
+    driver, others = postings[0], postings[1:]
+    position = bisect_left(driver, lo)
+    last = len(driver) if hi is None else bisect_left(driver, hi, position)
+    if not others:
+        yield from driver[position:last]
+        return
+
+    chunk = FIRST_CHUNK
+    while position < last:
+        end = min(last, position + chunk)
+        low, high = driver[position], driver[end - 1] + 1
+        candidates = set(driver[position:end])
+        for other in others:
+            start = bisect_left(other, low)
+            stop = bisect_left(other, high, start)
+            if stop - start > PROBE_RATIO * len(candidates):
+                # Few candidates spread over a long stretch: look them up
+                candidates = {
+                    icon_id for icon_id in candidates
+                    if (found := bisect_left(other, icon_id, start, stop)) < stop and other[found] == icon_id
+                }
+            else:
+                candidates.intersection_update(other[start:stop])
+            if not candidates:
+                break
+        yield from sorted(candidates)
+        position = end
+        chunk *= 2
+
+
+class IconSearchIndex:
+    """
+    Token/trigram inverted index over ``prefix:name`` icon identifiers.
+
+    Icon ids are positions in the sorted ``icons`` list, so posting lists
+    are ascending arrays and results come back grouped by prefix in
+    alphabetical order.
+    """
+
+    def __init__(self, icons):
+        self.icons = sorted(set(icons))
+        self.names = []
+        self.prefix_ranges = {}
+        self.exact = {}
+        tokens = {}
+        short = {}
+
+        for icon_id, icon in enumerate(self.icons):
+            prefix, name = icon.split(':', 1)
+            self.names.append(name)
+            start, _ = self.prefix_ranges.get(prefix, (icon_id, icon_id))
+            self.prefix_ranges[prefix] = (start, icon_id + 1)
+            self.exact.setdefault(name, []).append(icon_id)
+            name_tokens = set(name.split('-'))
+            for token in name_tokens:
+                tokens.setdefault(token, []).append(icon_id)
+            for token_prefix in {token[:n] for token in name_tokens for n in (1, 2)}:
+                short.setdefault(token_prefix, []).append(icon_id)
+
+        self.token_list = sorted(tokens)
+        self.token_postings = [array('I', tokens[token]) for token in self.token_list]
+        token_trigrams = {}
+        for token_id, token in enumerate(self.token_list):
+            for trigram in _trigrams(token):
+                token_trigrams.setdefault(trigram, []).append(token_id)
+        self.token_trigrams = {key: array('I', ids) for key, ids in token_trigrams.items()}
+        self.short_prefixes = {key: array('I', ids) for key, ids in short.items()}
+        # Autocomplete sends the same keywords over and over
+        self.keyword_postings = lru_cache(maxsize=2048)(self._keyword_postings)
+
+    def __len__(self):
+        return len(self.icons)
+
+    @classmethod
+    def from_store(cls, store):
+        icons = []
+        for prefix in store.prefixes():
+            collection = store.get_collection(prefix)
+            icons.extend(f'{prefix}:{name}' for name in collection['icons'])
+            icons.extend(f'{prefix}:{name}' for name in collection.get('aliases', {}))
+        return cls(icons)
+
+    def _keyword_postings(self, keyword):
+        """Return the ascending ids of icons with a token matching ``keyword``."""
+        if len(keyword) < 3:
+            # Short keyword: names having a token that starts with it
+            return self.short_prefixes.get(keyword)
+
+        trigram_postings = []
+        for trigram in _trigrams(keyword):
+            token_ids = self.token_trigrams.get(trigram)
+            if token_ids is None:
+                return None
+            trigram_postings.append(token_ids)
+        token_ids = [
+            token_id for token_id in _intersect(trigram_postings)
+            if keyword in self.token_list[token_id]
+        ]
+        if not token_ids:
+            return None
+        if len(token_ids) == 1:
+            return self.token_postings[token_ids[0]]
+        merged = heapq.merge(*(self.token_postings[token_id] for token_id in token_ids))
+        # A name can contain several matching tokens; drop duplicates
+        postings = array('I')
+        previous = None
+        for icon_id in merged:
+            if icon_id != previous:
+                postings.append(icon_id)
+                previous = icon_id
+        return postings
+
+    def search(self, query, prefixes=None, limit=DEFAULT_LIMIT, start=0):
+        """
+        Return ``(icons, has_more)`` for ``query``.
+
+        ``prefixes`` restricts results to the given icon set prefixes. A
+        query written as ``prefix:keyword`` is treated the same way.
+        """
+        query = ' '.join(query.lower().split())
+        if ':' in query:
+            query_prefix, query = query.split(':', 1)
+            prefixes = [query_prefix]
+        keywords = [keyword for keyword in query.replace(' ', '-').split('-') if keyword]
+        if not keywords:
+            return [], False
+
+        if prefixes:
+            ranges = sorted(self.prefix_ranges[p] for p in prefixes if p in self.prefix_ranges)
+            if not ranges:
+                return [], False
+        else:
+            ranges = [(0, len(self.icons))]
+
+        postings = []
+        for keyword in dict.fromkeys(keywords):
+            keyword_postings = self.keyword_postings(keyword)
+            if keyword_postings is None:
+                return [], False
+            postings.append(keyword_postings)
+
+        def matches(icon_id):
+            name = self.names[icon_id]
+            return all(keyword in name for keyword in keywords)
+
+        wanted = start + limit + 1
+        # Exact name matches rank first, then the rest in alphabetical order
+        exact = [
+            icon_id for icon_id in self.exact.get('-'.join(keywords), ())
+            if any(lo <= icon_id < hi for lo, hi in ranges)
+        ]
+        found = list(exact)
+        seen = set(exact)
+        for lo, hi in ranges:
+            if len(found) >= wanted:
+                break
+            for icon_id in _intersect(postings, lo, hi):
+                if icon_id in seen or not matches(icon_id):
+                    continue
+                found.append(icon_id)
+                if len(found) >= wanted:
+                    break
+
+        page = found[start:start + limit]
+        return [self.icons[i] for i in page], len(found) > start + limit
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_search_index():
+    """
+    Return the process-wide search index for the configured icon store.
+
+    Returns None when no local collection mirror is configured.
+    """
+    store = get_icon_store()
+    if store is None:
+        return None
+    # Rebuilt when the store's index changes, e.g. after an import
+    store.index
+    generation, index = _indexes.get(store.path, (None, None))
+    if generation != store.generation:
+        with _lock:
+            generation, index = _indexes.get(store.path, (None, None))
+            if generation != store.generation:
+                generation = store.generation
+                index = IconSearchIndex.from_store(store)
+                _indexes[store.path] = generation, index
+    return index
@@ -0,0 +1,163 @@
+# django-icon-picker/django_icon_picker/search_proxy.py
+"""
+Caching proxy in front of the Iconify search API.
+
+Without local collections the picker searched ``api.iconify.design``
+straight from the browser, so every editor typing "home" paid the full
+upstream round trip. The ``icon_picker:search_proxy`` view answers the
+same requests from a Django cache instead:
+
+* queries are normalized (case, whitespace, prefix order) before they
+  become cache keys, so "Home " and "home" share an entry;
+* an entry is fresh for ``search_ttl`` seconds and is then served stale
+  for up to ``search_stale_ttl`` more seconds while one background
+  request revalidates it (stale-while-revalidate);
+* identical lookups that miss at the same time share one upstream call.
+
+The cache is the ``search_cache`` alias of ``CACHES`` and the upstream
+call goes through the shared IconifyClient; both can be swapped for a
+LocMemCache and a stub ``fetch`` in tests.
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .settings import get_picker_settings
+
+HIT = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+# How long one process may hold the right to revalidate an entry
+REVALIDATE_LOCK_TIMEOUT = 30
+
+
+class SearchError(Exception):
+    """The upstream answered the search with an error status."""
+
+
+def fetch_search(query, prefixes, limit, start):
+    """Run a search against the Iconify API and return its JSON payload."""
+    from .client import get_client
+    params = {'query': query, 'limit': limit, 'start': start}
+    if prefixes:
+        params['prefixes'] = ','.join(prefixes)
+    response = get_client().get('search', params=params)
+    if response.status_code != 200:
+        raise SearchError(f'Status code: {response.status_code} {response.reason}')
+    return response.json()
+
+
+def normalize(query, prefixes=(), limit=64, start=0):
+    """The canonical form of a search, as keyword arguments for ``fetch``."""
+    return {
+        'query': ' '.join(query.lower().split()),
+        'prefixes': sorted({prefix.strip().lower() for prefix in prefixes if prefix.strip()}),
+        'limit': limit,
+        'start': start,
+    }
+
+
+class SearchProxy:
+    """Cache-backed, request-coalescing front for an upstream search function."""
+
+    def __init__(self, fetch=fetch_search, cache_alias='default', ttl=3600, stale_ttl=86400,
+                 clock=time.time):
+        self.fetch = fetch
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='icon-picker-search')
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def cache_key(params):
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+        return f'icon_picker:search:{digest[:32]}'
+
+    def search(self, query, prefixes=(), limit=64, start=0):
+        """
+        Return ``(payload, state)``, where ``state`` is HIT, STALE or MISS.
+
+        Raises whatever ``fetch`` raises when there is nothing cached to
+        fall back on.
+        """
+        params = normalize(query, prefixes, limit, start)
+        key = self.cache_key(params)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry['fresh_until'] > self.clock():
+                return entry['payload'], HIT
+            # One process revalidates; everyone keeps getting the stale copy
+            if self.cache.add(f'{key}:revalidate', True, REVALIDATE_LOCK_TIMEOUT):
+                future, leader = self._join(key)
+                if leader:
+                    self._executor.submit(self._run, key, params, future)
+            return entry['payload'], STALE
+
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, params, future)
+        return future.result(), MISS
+
+    def _join(self, key):
+        """The in-flight Future for ``key`` and whether the caller must run it."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _run(self, key, params, future):
+        try:
+            payload = self.fetch(**params)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            entry = {'payload': payload, 'fresh_until': self.clock() + self.ttl}
+            self.cache.set(key, entry, self.ttl + self.stale_ttl)
+            future.set_result(payload)
+        finally:
+            self.cache.delete(f'{key}:revalidate')
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def get_search_proxy():
+    """Return the process-wide SearchProxy, creating it on first use."""
+    global _proxy
+    if _proxy is None:
+        with _proxy_lock:
+            if _proxy is None:
+                options = get_picker_settings()
+                _proxy = SearchProxy(
+                    cache_alias=options['search_cache'],
+                    ttl=options['search_ttl'],
+                    stale_ttl=options['search_stale_ttl'],
+                )
+    return _proxy
+
+
+@receiver(setting_changed)
+def _reset_proxy(setting, **kwargs):
+    global _proxy
+    if setting == 'ICON_PICKER_SETTINGS':
+        with _proxy_lock:
+            _proxy = None
@@ -1,19 +1,20 @@
 # django-icon-picker/django_icon_picker/settings.py
 from django.conf import settings
 
-# Default icon sets configuration
+# Default icon sets configuration: the sets whose catalog ships with the
+# app (see django_icon_picker.catalog)
 DEFAULT_ICON_SETS = [
     ('fontawesome5regular', 'far', 'Font Awesome 5 Regular', 'latest'),
     ('fontawesome5solid', 'fas', 'Font Awesome 5 Solid', 'latest'),
     ('fontawesome5brands', 'fab', 'Font Awesome 5 Brands', 'latest'),
-    ('materialdesign', 'zmdi', 'Material Design'),
-    ('ionicons', 'ion', 'Ionicons Icons'),
-    ('octicons', 'octicon', 'Octicons'),
-    ('typicons', 'typcn', 'Typicons'),
-    ('weathericons', 'wi', 'Weather Icons'),
-    ('glyphicons', 'glyphicon', 'Glyphicons'),
 ]
 
+# Class prefixes of the icon fonts DEFAULT_ICON_SETS listed before (Material
+# Design, Ionicons, Octicons, Typicons, Weather Icons, Glyphicons). They have
+# no catalog, so the picker no longer offers them, but values using them stay
+# valid while DJANGO_ICON_SETS is not set.
+DEFAULT_CLASS_PREFIXES = ('zmdi', 'ion', 'octicon', 'typcn', 'wi', 'glyphicon')
+
 # User can override this in their Django settings
 ICON_SETS = getattr(settings, 'DJANGO_ICON_SETS', DEFAULT_ICON_SETS)
 
@@ -23,6 +24,44 @@ ICON_COLOR = getattr(settings, 'ICON_PICKER_COLOR', '#00bcc9')
 # Path for SVG icon storage (optional)
 ICON_PICKER_PATH = getattr(settings, 'ICON_PICKER_PATH', None)
 
+# Directory holding the local mirror of Iconify collections (optional).
+# Populated by ``manage.py import_icon_collections``; when set, icons are
+# rendered from disk instead of being fetched from api.iconify.design.
+ICON_PICKER_COLLECTIONS_PATH = getattr(settings, 'ICON_PICKER_COLLECTIONS_PATH', None)
+
+# Directory of icon set catalog files (<set id>.json) searched before the
+# ones packaged with the app (see django_icon_picker.catalog)
+ICON_PICKER_CATALOG_PATH = getattr(settings, 'ICON_PICKER_CATALOG_PATH', None)
+
+# Keep per-model SVG sprite files in ICON_PICKER_PATH/sprites up to date
+# as icons are saved (see django_icon_picker.sprites)
+ICON_PICKER_SPRITES = getattr(settings, 'ICON_PICKER_SPRITES', False)
+
+# Storage for saved SVG files and sprites (see django_icon_picker.storage):
+# a STORAGES alias or a {"BACKEND": ..., "OPTIONS": ...} dict. Defaults to
+# the filesystem under ICON_PICKER_PATH.
+ICON_PICKER_STORAGE = getattr(settings, 'ICON_PICKER_STORAGE', None)
+
+# Local directory keeping a copy of every icon read from or written to the
+# storage, so hot icons are served from disk
+ICON_PICKER_STORAGE_CACHE = getattr(settings, 'ICON_PICKER_STORAGE_CACHE', None)
+
+# Also write .gz (and .br, with the brotli package) copies of saved SVGs,
+# served by the icon view to clients that accept them
+ICON_PICKER_PRECOMPRESS = getattr(settings, 'ICON_PICKER_PRECOMPRESS', False)
+
+# Base URL of the Iconify API used to download SVGs that are not installed
+# locally (point it at a self-hosted Iconify API or a test server)
+ICON_PICKER_ICONIFY_URL = getattr(settings, 'ICON_PICKER_ICONIFY_URL', 'https://api.iconify.design')
+
+# Send the picker's Iconify searches through the caching search_proxy view
+# when no local collections are installed (see django_icon_picker.search_proxy)
+ICON_PICKER_SEARCH_PROXY = getattr(settings, 'ICON_PICKER_SEARCH_PROXY', False)
+
+# Render IconField form fields with LazyIconPicker: a bare input sharing a
+# single, lazily built picker modal with every other field on the page
+ICON_PICKER_LAZY_WIDGET = getattr(settings, 'ICON_PICKER_LAZY_WIDGET', False)
+
 # Template choices for different icon rendering styles
 ICON_TEMPLATES = getattr(settings, 'DJANGO_ICON_TEMPLATES', [
     ('default', 'Default Template'),
@@ -30,8 +69,9 @@ ICON_TEMPLATES = getattr(settings, 'DJANGO_ICON_TEMPLATES', [
     ('custom', 'Custom Template'),
 ])
 
-# Advanced settings
-ICON_PICKER_SETTINGS = getattr(settings, 'ICON_PICKER_SETTINGS', {
+# Advanced settings. Keys missing from the user's ICON_PICKER_SETTINGS keep
+# their defaults.
+DEFAULT_ICON_PICKER_SETTINGS = {
     'search_enabled': True,
     'categories_enabled': True,
     'recent_icons_enabled': True,
@@ -40,7 +80,48 @@ ICON_PICKER_SETTINGS = getattr(settings, 'ICON_PICKER_SETTINGS', {
     'lazy_loading': True,
     'icons_per_page': 50,
     'search_debounce': 300,  # milliseconds
-})
+    # Browser-side search scheduling (see static/django_icon_picker/js/icon_search.js)
+    'search_cache_size': 100,  # searches kept in memory per page
+    'search_persist': False,  # also keep them in IndexedDB for search_ttl seconds
+    'search_prefetch': True,  # fetch the next page of results in the background
+    # Upstream HTTP client (see django_icon_picker.client)
+    'connect_timeout': 3.05,  # seconds
+    'read_timeout': 10,  # seconds
+    'pool_size': 10,  # kept-alive connections to the Iconify API
+    'circuit_failure_threshold': 5,  # consecutive failures before failing fast
+    'circuit_reset_timeout': 30,  # seconds before trying the upstream again
+    'download_workers': 4,  # background SVG download threads
+    'download_retries': 3,
+    'download_backoff': 0.5,  # seconds, doubled after every failed attempt
+    'download_status_cache': 'default',  # CACHES alias shared by the server processes
+    'download_status_ttl': 3600,  # seconds a download's state is reported
+    # Iconify search proxy (see django_icon_picker.search_proxy)
+    'search_cache': 'default',  # CACHES alias
+    'search_ttl': 3600,  # seconds a cached result is fresh
+    'search_stale_ttl': 86400,  # seconds it is then served while being refreshed
+    # Recolored SVG variants (see django_icon_picker.recolor)
+    'render_cache_bytes': 4 * 1024 * 1024,  # recolored SVGs kept in memory
+    # SVG optimization on save (see django_icon_picker.optimize)
+    'svg_optimize': 1,  # 0 off, 1 lossless clean-up, 2 also rounds coordinates
+    'svg_precision': 3,  # decimals kept by level 2
+    'svg_stats_cache': 'default',  # CACHES alias of the bytes saved counters
+}
+
+
+# The advanced settings the picker's browser code is configured with; the
+# others (timeouts, cache aliases, ...) never leave the server
+BROWSER_SETTINGS = (
+    'search_enabled', 'categories_enabled', 'recent_icons_enabled', 'favorites_enabled',
+    'preview_enabled', 'lazy_loading', 'icons_per_page', 'search_debounce',
+)
+
+
+def get_picker_settings():
+    """ICON_PICKER_SETTINGS merged over the defaults, read at call time."""
+    return {**DEFAULT_ICON_PICKER_SETTINGS, **getattr(settings, 'ICON_PICKER_SETTINGS', {})}
+
+
+ICON_PICKER_SETTINGS = get_picker_settings()
 
 # CDN URLs for different icon libraries
 ICON_CDN_URLS = getattr(settings, 'ICON_CDN_URLS', {
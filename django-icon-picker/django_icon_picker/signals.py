@@ -0,0 +1,90 @@
+# django-icon-picker/django_icon_picker/signals.py
+"""
+Model signal handlers installed by the icon fields.
+
+Defining a model with an IconField connects these handlers, so this module
+stays free of heavy imports: the sprite code (storage, icon store,
+rendering) is only imported when a handler actually has work to do.
+
+Instances remember the icon values they were loaded (or last saved) with,
+so a save can tell which values it replaced: IconFields that own files
+release the old file (see ``IconField.release_icon``) and model sprites
+drop icons no row uses any more.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_init, post_save
+
+# Model -> its icon fields, filled on first use
+_icon_fields = {}
+
+SAVED_ATTRIBUTE = '_icon_picker_saved'
+
+
+def icon_fields(model):
+    """The concrete icon fields of ``model``."""
+    fields = _icon_fields.get(model)
+    if fields is None:
+        fields = _icon_fields[model] = [
+            field for field in model._meta.concrete_fields if hasattr(field, 'get_icon_type')
+        ]
+    return fields
+
+
+def _loaded_values(model, instance):
+    # Deferred fields are left out: reading them would cost a query each
+    return {
+        field.attname: instance.__dict__[field.attname]
+        for field in icon_fields(model)
+        if field.attname in instance.__dict__
+    }
+
+
+def remember_icons(sender, instance, **kwargs):
+    """post_init handler: note the icon values the instance starts with."""
+    instance.__dict__[SAVED_ATTRIBUTE] = _loaded_values(sender, instance)
+
+
+def replaced_icons(sender, instance, created=False, update_fields=None):
+    """
+    ``{attname: previous value}`` of the icon fields whose stored value
+    the save of ``instance`` just changed, and remember the new values.
+    """
+    previous = instance.__dict__.get(SAVED_ATTRIBUTE, {})
+    current = _loaded_values(sender, instance)
+    instance.__dict__[SAVED_ATTRIBUTE] = current
+    if created:
+        return {}
+    return {
+        name: value
+        for name, value in previous.items()
+        if name in current and current[name] != value
+        and (update_fields is None or name in update_fields)
+    }
+
+
+def icons_saved(sender, instance, created=False, raw=False, using=None, update_fields=None, **kwargs):
+    """post_save handler: release replaced icons and keep the sprite current."""
+    replaced = replaced_icons(sender, instance, created, update_fields)
+    if raw:
+        return
+    for field in icon_fields(sender):
+        if field.attname in replaced and hasattr(field, 'release_icon'):
+            field.release_icon(replaced[field.attname], using=using)
+    if getattr(settings, 'ICON_PICKER_SPRITES', False):
+        from . import sprites
+        sprites.update_sprite(sender, instance, replaced=replaced, using=using)
+
+
+def icons_deleted(sender, instance, using=None, **kwargs):
+    """post_delete handler: drop the deleted row's icons from the sprite."""
+    if getattr(settings, 'ICON_PICKER_SPRITES', False):
+        from . import sprites
+        sprites.update_sprite(sender, instance, deleted=True, using=using)
+
+
+def track_model(model):
+    """Keep ``model``'s files and sprite up to date as its icons change."""
+    label = model._meta.label_lower
+    post_init.connect(remember_icons, sender=model, dispatch_uid=f'icon_picker_init_{label}')
+    post_save.connect(icons_saved, sender=model, dispatch_uid=f'icon_picker_sprite_{label}')
+    post_delete.connect(icons_deleted, sender=model, dispatch_uid=f'icon_picker_delete_{label}')
@@ -0,0 +1,299 @@
+# django-icon-picker/django_icon_picker/sprites.py
+"""
+SVG sprite sheets for pages that show many icons.
+
+Instead of one ``<img>`` request per row, the distinct icons of a page (or
+of a whole model) are collected into a single ``<svg>`` of ``<symbol>``
+elements and each row references its symbol with ``<use href="#...">``.
+The sprite can be inlined into the page or saved to the icon storage
+under ``ICON_PICKER_PATH/sprites/`` as a file named by its content hash,
+so it can be cached forever. With ``ICON_PICKER_SPRITES = True`` a model's
+sprite file is rebuilt from the icons its rows currently use whenever a
+save adds an icon the sprite lacks, or a save or delete drops one it has.
+
+Only icons whose SVG is available locally can be sprited: Iconify icons
+installed in the local collection store and SVG files saved under
+``ICON_PICKER_PATH``. Everything else (emojis, remote-only icons, SVG paths
+elsewhere) falls back to the regular rendering, which references files by
+URL. Collections are imported by site administrators and trusted; saved
+files may come from any URL entered in a form, so they are rebuilt from an
+allow-list of SVG elements and attributes before they reach the page.
+"""
+import hashlib
+import json
+import re
+import threading
+from functools import partial
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from . import optimize, storage
+from .classify import ICON_NAME, SVG_FILE, classify
+from .icon_store import get_icon_store
+from .rendering import render_icon_html
+from .signals import icon_fields, track_model  # noqa: F401 (re-exported)
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+DIMENSION_RE = re.compile(r'[\d.]+')
+LOCAL_URL_RE = re.compile(r'url\(\s*["\']?#[\w.:-]+["\']?\s*\)')
+
+# Sprite rebuilds re-read the rows they are built from until these stop
+# changing under them, at most this many times
+REBUILD_ATTEMPTS = 3
+
+# Serializes sprite rebuilds in this process
+_rebuild_lock = threading.Lock()
+
+# What a saved SVG file may bring into a sprite. Anything else (scripts,
+# event handlers, foreignObject, animation, styles, external references)
+# is dropped along with its children.
+SAFE_ELEMENTS = {
+    'g', 'path', 'circle', 'ellipse', 'line', 'polyline', 'polygon', 'rect', 'text', 'tspan',
+    'defs', 'linearGradient', 'radialGradient', 'stop', 'clipPath', 'mask', 'use', 'title', 'desc',
+}
+SAFE_ATTRIBUTES = {
+    'id', 'd', 'points', 'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'fx', 'fy',
+    'dx', 'dy', 'width', 'height', 'transform', 'opacity', 'color', 'display', 'visibility',
+    'fill', 'fill-opacity', 'fill-rule', 'stroke', 'stroke-dasharray', 'stroke-dashoffset',
+    'stroke-linecap', 'stroke-linejoin', 'stroke-miterlimit', 'stroke-opacity', 'stroke-width',
+    'clip-path', 'clip-rule', 'clipPathUnits', 'mask', 'maskUnits', 'maskContentUnits',
+    'gradientUnits', 'gradientTransform', 'spreadMethod', 'offset', 'stop-color', 'stop-opacity',
+    'vector-effect', 'paint-order', 'shape-rendering', 'font-family', 'font-size', 'font-weight',
+    'text-anchor', 'dominant-baseline', 'href',
+}
+
+
+def symbol_id(value):
+    """Stable, HTML-safe id for the symbol of an icon value."""
+    return 'ip-' + hashlib.sha1(value.encode('utf-8')).hexdigest()[:12]
+
+
+def _safe_markup(element):
+    """``element`` serialized with only allow-listed elements and attributes."""
+    namespace, _, tag = element.tag.rpartition('}')
+    if namespace != f'{{{SVG_NS}' or tag not in SAFE_ELEMENTS:
+        return ''
+    attributes = []
+    for name, value in element.attrib.items():
+        if name == XLINK_HREF:
+            name = 'href'
+        if name not in SAFE_ATTRIBUTES:
+            continue
+        if name == 'href' and not value.startswith('#'):
+            continue
+        if 'url(' in value and not LOCAL_URL_RE.fullmatch(value.strip()):
+            continue
+        attributes.append(f' {name}={quoteattr(value)}')
+    children = ''.join(_safe_markup(child) + escape(child.tail or '') for child in element)
+    return f"<{tag}{''.join(attributes)}>{escape(element.text or '')}{children}</{tag}>"
+
+
+def _svg_file_symbol(path):
+    if not storage.is_managed(path):
+        return None
+    try:
+        root = ElementTree.fromstring(storage.read(path))
+    except (OSError, SuspiciousFileOperation, ElementTree.ParseError):
+        return None
+    if root.tag != f'{{{SVG_NS}}}svg':
+        return None
+    body = ''.join(_safe_markup(child) for child in root)
+    viewbox = root.get('viewBox')
+    if viewbox:
+        return escape(viewbox, {'"': '&quot;'}), body
+    width = DIMENSION_RE.match(root.get('width', ''))
+    height = DIMENSION_RE.match(root.get('height', ''))
+    if not (width and height):
+        return None
+    return f'0 0 {width.group()} {height.group()}', body
+
+
+def get_symbol(value):
+    """
+    Return ``(viewbox, body)`` for an icon value, or None if the icon's SVG
+    is not available locally.
+    """
+    icon_type = classify(value)
+    if icon_type == SVG_FILE:
+        return _svg_file_symbol(value)
+    if icon_type == ICON_NAME and ':' in value:
+        store = get_icon_store()
+        found = store.get_icon(value) if store else None
+        if found is None:
+            return None
+        body, box = found
+        return ' '.join(str(n) for n in box), body
+    return None
+
+
+class Sprite:
+    """A set of icon symbols, renderable inline or served as a file."""
+
+    def __init__(self, symbols, url=''):
+        # value -> (symbol id, viewBox, body)
+        self.symbols = symbols
+        self.url = url
+
+    @classmethod
+    def from_values(cls, values, url=''):
+        symbols = {}
+        for value in values:
+            if not value or value in symbols:
+                continue
+            symbol = get_symbol(value)
+            if symbol is not None:
+                symbols[value] = (symbol_id(value),) + symbol
+        return cls(symbols, url)
+
+    def __contains__(self, value):
+        return value in self.symbols
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @cached_property
+    def svg(self):
+        """The sprite document; hidden, so it can be inlined anywhere."""
+        symbols = ''.join(
+            f'<symbol id="{sid}" viewBox="{viewbox}">{body}</symbol>'
+            for sid, viewbox, body in sorted(self.symbols.values())
+        )
+        return mark_safe(
+            '<svg xmlns="http://www.w3.org/2000/svg" style="display: none;" aria-hidden="true">'
+            f'{symbols}</svg>'
+        )
+
+    def use(self, value, css_class="", style="", alt_text=""):
+        """Render a reference to ``value``'s symbol, or the regular HTML."""
+        if value not in self.symbols:
+            return render_icon_html(value, css_class, style, alt_text)
+        return format_html(
+            '<svg class="icon-display {}" style="width: 1.2em; height: 1.2em; {}" role="img" aria-label="{}">'
+            '<use href="{}#{}"></use></svg>',
+            css_class,
+            style,
+            alt_text or (f"Icon: {value}" if classify(value) == ICON_NAME else "Icon"),
+            self.url,
+            self.symbols[value][0],
+        )
+
+
+def _sprite_dir():
+    return f"{getattr(settings, 'ICON_PICKER_PATH')}/sprites"
+
+
+def _manifest_path(model):
+    return f'{_sprite_dir()}/{model._meta.label_lower}.json'
+
+
+def icon_field_names(model):
+    """Names of the IconFields declared on ``model``."""
+    return [field.attname for field in icon_fields(model)]
+
+
+def _stored_values(model):
+    values = set()
+    for name in icon_field_names(model):
+        values.update(model._default_manager.values_list(name, flat=True).distinct())
+    return values
+
+
+def write_sprite(model, values):
+    """
+    Build the sprite file for ``model`` from ``values`` and update its
+    manifest. Returns the new Sprite.
+
+    The file is named after the hash of its optimized content, which is
+    what is stored.
+    """
+    sprite_dir = _sprite_dir()
+    sprite = Sprite.from_values(sorted(set(v for v in values if v)))
+
+    content = optimize.optimize_and_record(sprite.svg.encode('utf-8'))
+    filename = f'{model._meta.label_lower}-{hashlib.sha256(content).hexdigest()[:16]}.svg'
+    file_path = f'{sprite_dir}/{filename}'
+    if not storage.exists(file_path):
+        storage.write(file_path, content, raw=True)
+
+    previous = _read_manifest(model)
+    manifest = {'file': filename, 'values': sorted(sprite.symbols)}
+    storage.write(_manifest_path(model), json.dumps(manifest, ensure_ascii=False).encode('utf-8'))
+
+    if previous and previous['file'] != filename:
+        storage.delete(f"{sprite_dir}/{previous['file']}")
+
+    sprite.url = storage.url(file_path)
+    return sprite
+
+
+def _read_manifest(model):
+    try:
+        return json.loads(storage.read(_manifest_path(model)))
+    except (OSError, ValueError):
+        return None
+
+
+def rebuild_model_sprite(model):
+    """
+    Rebuild ``model``'s sprite from every icon value currently stored.
+
+    Rebuilds in this process take turns. One in another process can still
+    finish last with rows read before a later change; reading the rows
+    again after writing catches that, and the rebuild is repeated from the
+    new rows, so the last sprite written matches the table.
+    """
+    with _rebuild_lock:
+        values = _stored_values(model)
+        for _ in range(REBUILD_ATTEMPTS):
+            sprite = write_sprite(model, values)
+            current = _stored_values(model)
+            if current == values:
+                break
+            values = current
+        return sprite
+
+
+def get_model_sprite(model):
+    """
+    Return the Sprite described by ``model``'s manifest, building it if
+    missing. Without ``ICON_PICKER_PATH`` the sprite can only be inlined.
+    """
+    if not getattr(settings, 'ICON_PICKER_PATH', None):
+        return Sprite.from_values(_stored_values(model))
+    manifest = _read_manifest(model)
+    if manifest is None:
+        return rebuild_model_sprite(model)
+    # Rows only reference the file, so symbol bodies are not needed here
+    symbols = {value: (symbol_id(value), '', '') for value in manifest['values']}
+    return Sprite(symbols, url=storage.url(f"{_sprite_dir()}/{manifest['file']}"))
+
+
+def update_sprite(sender, instance, replaced=None, deleted=False, using=None):
+    """
+    Keep ``sender``'s sprite in step with a saved or deleted ``instance``
+    (see django_icon_picker.signals).
+
+    ``replaced`` holds the icon values the save overwrote. A save that
+    neither adds an icon missing from the sprite nor drops one in it costs
+    a manifest read; anything else rebuilds the sprite from the rows once
+    the transaction commits, so icons no row uses any more are pruned.
+    """
+    if not getattr(settings, 'ICON_PICKER_PATH', None):
+        return
+    values = {value for value in (getattr(instance, name) for name in icon_field_names(sender)) if value}
+    manifest = _read_manifest(sender)
+    if manifest is not None:
+        known = set(manifest['values'])
+        dropped = values if deleted else set((replaced or {}).values())
+        added = set() if deleted else {value for value in values - known if get_symbol(value) is not None}
+        if not (added or dropped & known):
+            return
+    transaction.on_commit(partial(rebuild_model_sprite, sender), using=using)
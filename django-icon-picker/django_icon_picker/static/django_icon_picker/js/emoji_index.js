@@ -0,0 +1,91 @@
+// Emoji search over the server-built index (django_icon_picker.emoji_index),
+// shared by icon_picker.js and icon_picker_lazy.js. The index is fetched
+// once from a content-hashed URL and its tokens expanded into a prefix map,
+// so each keystroke costs one map lookup per query word (and one set lookup
+// per candidate for every further word).
+window.IconPickerEmoji = (function () {
+  const STOPWORDS = new Set(["a", "an", "and", "at", "in", "of", "on", "the", "with"]);
+  const loading = {};
+
+  function words(text) {
+    // Same normalization as build_emoji_index.tokenize
+    return text
+      .toLowerCase()
+      .normalize("NFKD")
+      .replace(/[\u0300-\u036f]/g, "")
+      .split(/[^a-z0-9]+/)
+      .filter((word) => word && !STOPWORDS.has(word));
+  }
+
+  function build(data) {
+    const items = data.emoji.map(([emoji, name, tags]) => ({
+      emoji: emoji,
+      name: name,
+      keywords: tags ? tags.split(" ") : [],
+    }));
+    const byEmoji = new Map(items.map((item, position) => [item.emoji, position]));
+    const prefixes = new Map();
+    for (const [token, positions] of Object.entries(data.tokens)) {
+      for (let length = 1; length <= token.length; length++) {
+        const prefix = token.slice(0, length);
+        let set = prefixes.get(prefix);
+        if (!set) {
+          set = new Set();
+          prefixes.set(prefix, set);
+        }
+        positions.forEach((position) => set.add(position));
+      }
+    }
+    // Sorted once here, so results keep the Unicode order without sorting per
+    // keystroke; the sets stay for the membership tests of multi-word queries
+    const postings = new Map();
+    prefixes.forEach((set, prefix) => postings.set(prefix, Int32Array.from(set).sort()));
+    return { items: items, byEmoji: byEmoji, postings: postings, members: prefixes };
+  }
+
+  function load(url) {
+    if (!loading[url]) {
+      loading[url] = fetch(url)
+        .then((response) => (response.ok ? response.json() : Promise.reject(response.statusText)))
+        .then(build);
+      loading[url].catch(() => delete loading[url]);
+    }
+    return loading[url];
+  }
+
+  function search(index, query, limit) {
+    query = query.trim();
+    if (!query) {
+      return index.items.slice(0, limit);
+    }
+    const exact = index.byEmoji.get(query) ?? index.byEmoji.get(query + "\uFE0F");
+    if (exact !== undefined) {
+      return [index.items[exact]];
+    }
+    const prefixes = [];
+    for (const word of words(query)) {
+      if (!index.postings.has(word)) {
+        return [];
+      }
+      prefixes.push(word);
+    }
+    if (!prefixes.length) {
+      return [];
+    }
+    // Walk the shortest list and stop once `limit` matches are found
+    prefixes.sort((a, b) => index.postings.get(a).length - index.postings.get(b).length);
+    const others = prefixes.slice(1).map((prefix) => index.members.get(prefix));
+    const results = [];
+    for (const position of index.postings.get(prefixes[0])) {
+      if (others.every((set) => set.has(position))) {
+        results.push(index.items[position]);
+        if (results.length >= limit) {
+          break;
+        }
+      }
+    }
+    return results;
+  }
+
+  return { load: load, search: search, words: words };
+})();
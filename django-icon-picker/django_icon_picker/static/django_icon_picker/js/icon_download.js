@@ -0,0 +1,29 @@
+// Saving a chosen icon as an SVG file, shared by icon_picker.js and
+// icon_picker_lazy.js.
+//
+// The download-svg view never waits for the network: it answers 200 with
+// the file's path when the file exists (or was rendered from the local
+// collections) and 202 with the path while a background worker downloads
+// it. Either way the path is final, so save() resolves with it straight
+// away and the form can be submitted without waiting for the download;
+// the download-status endpoint reports how it went. On any error save()
+// resolves with null and the field keeps the icon name, which renders from
+// Iconify.
+window.IconPickerDownload = (function () {
+  // Resolve with the saved file's path, or null to keep the icon name
+  async function save(options) {
+    try {
+      const response = await fetch(`${options.downloadUrl}?${new URLSearchParams(options.params)}`);
+      if (!response.ok) {
+        throw new Error(`${response.status} ${await response.text()}`);
+      }
+      const path = await response.text();
+      return path.endsWith(".svg") ? path : null;
+    } catch (error) {
+      console.error("Error saving icon:", error);
+      return null;
+    }
+  }
+
+  return { save: save };
+})();
@@ -0,0 +1,272 @@
+// Shared, lazily created picker for LazyIconPicker widgets.
+//
+// Fields only carry a data-icon-picker attribute with their options. A
+// single delegated click handler opens one modal shared by every field on
+// the page; the modal is built on first use and the emoji index is fetched
+// the first time the emoji tab is opened.
+(function () {
+  "use strict";
+
+  const ICONIFY_URL = "https://api.iconify.design";
+
+  let modal = null;
+  let target = null; // the field input being edited
+  let options = {};
+  let mode = "icons";
+  let scheduler = null; // icon_search.js, debounced per the search_debounce setting
+  let emojiIndex = null;
+
+  function isEmoji(text) {
+    // Same rules as django_icon_picker.classify
+    return /\p{Extended_Pictographic}(?<![\u00A9\u00AE\u203C\u2049\u2122\u2139\u2194-\u2199\u21A9\u21AA])|[\u00A9\u00AE\u203C\u2049\u2122\u2139\u2194-\u2199\u21A9\u21AA]\uFE0F|[\u{1F1E6}-\u{1F1FF}]|[#*0-9]\uFE0F?\u20E3/u.test(text);
+  }
+
+  function loadEmojiIndex() {
+    return window.IconPickerEmoji.load(options.emojiIndexUrl).then((index) => (emojiIndex = index));
+  }
+
+  function createModal() {
+    const element = document.createElement("div");
+    element.className = "icon-picker-shared-modal";
+    element.hidden = true;
+    element.innerHTML = `
+      <div class="icon-picker-shared-dialog" role="dialog" aria-modal="true" aria-label="Choose an icon">
+        <div class="icon-picker-mode-toggle">
+          <button type="button" class="mode-btn active" data-mode="icons"><span>🎨</span> Icons</button>
+          <button type="button" class="mode-btn" data-mode="emojis"><span>😀</span> Emojis</button>
+          <button type="button" class="icon-picker-close" aria-label="Close">✖</button>
+        </div>
+        <div class="icon-picker-input">
+          <input type="search" class="icon-picker-search" placeholder="Search icons..." aria-label="Search">
+          <input type="color" class="icon-picker-color" aria-label="Icon color">
+        </div>
+        <div class="icon-search-results" role="listbox" aria-live="polite"></div>
+      </div>
+    `;
+    document.body.appendChild(element);
+
+    element.addEventListener("click", (event) => {
+      const modeButton = event.target.closest(".mode-btn");
+      if (modeButton) {
+        switchMode(modeButton.dataset.mode);
+      } else if (event.target === element || event.target.closest(".icon-picker-close")) {
+        close();
+      }
+    });
+    element.addEventListener("keydown", (event) => {
+      if (event.key === "Escape") {
+        close();
+      }
+    });
+    element.querySelector(".icon-picker-search").addEventListener("input", search);
+    return element;
+  }
+
+  // Previews come from the local renderer (renderUrl, with __icon__ for
+  // the icon name) when collections are installed, else from Iconify
+  function previewUrl(icon, color) {
+    const query = `?${new URLSearchParams({ color: color })}`;
+    if (options.renderUrl) {
+      return options.renderUrl.replace("__icon__", encodeURIComponent(icon)) + query;
+    }
+    return `${ICONIFY_URL}/${icon}.svg${query}`;
+  }
+
+  function part(selector) {
+    return modal.querySelector(selector);
+  }
+
+  function switchMode(newMode) {
+    mode = newMode;
+    modal.querySelectorAll(".mode-btn").forEach((button) => {
+      button.classList.toggle("active", button.dataset.mode === mode);
+    });
+    part(".icon-picker-color").hidden = mode === "emojis";
+    part(".icon-picker-search").placeholder = mode === "emojis" ? "Search emojis..." : "Search icons...";
+    part(".icon-search-results").textContent = "";
+    search();
+  }
+
+  function open(input) {
+    if (!modal) {
+      modal = createModal();
+    }
+    target = input;
+    options = JSON.parse(input.dataset.iconPicker || "{}");
+    scheduler = window.IconPickerSearch.create({
+      url: options.searchUrl || `${ICONIFY_URL}/search`,
+      limit: 20,
+      ...options.searchOptions,
+    });
+    part(".icon-picker-color").value = options.defaultColor || "#000000";
+    part(".icon-picker-search").value = "";
+    part(".icon-search-results").textContent = "";
+    switchMode(isEmoji(input.value) ? "emojis" : "icons");
+    modal.hidden = false;
+    part(".icon-picker-search").focus();
+  }
+
+  function close() {
+    if (!modal || modal.hidden) {
+      return;
+    }
+    modal.hidden = true;
+    scheduler.cancel();
+    const opener = target && document.querySelector(`[data-icon-picker-open="${CSS.escape(target.id)}"]`);
+    if (opener) {
+      opener.focus();
+    }
+    target = null;
+  }
+
+  function showMessage(text) {
+    const results = part(".icon-search-results");
+    results.textContent = "";
+    const message = document.createElement("div");
+    message.className = "no-results";
+    message.textContent = text;
+    results.appendChild(message);
+  }
+
+  function showResults(items, render) {
+    const results = part(".icon-search-results");
+    const list = document.createElement("div");
+    list.className = mode === "emojis" ? "emoji-dropdown-list" : "icon-dropdown-list";
+    items.forEach((item) => list.appendChild(render(item)));
+    results.textContent = "";
+    results.appendChild(list);
+  }
+
+  function search() {
+    const query = part(".icon-picker-search").value.trim();
+    scheduler.cancel();
+    if (mode === "emojis") {
+      loadEmojiIndex().then(() => searchEmojis(query), () => showMessage("Error loading emojis."));
+    } else if (query.length >= 3) {
+      searchIcons(query);
+    } else {
+      part(".icon-search-results").textContent = "";
+    }
+  }
+
+  function searchEmojis(query) {
+    const matches = window.IconPickerEmoji.search(emojiIndex, query, 40);
+    if (!matches.length) {
+      showMessage("No emojis found.");
+      return;
+    }
+    showResults(matches, (item) => {
+      const element = document.createElement("button");
+      element.type = "button";
+      element.className = "emoji-dropdown-item";
+      element.title = item.name;
+      element.textContent = item.emoji;
+      element.addEventListener("click", () => select(item.emoji, null));
+      return element;
+    });
+  }
+
+  function searchIcons(query) {
+    scheduler.search({ query: query }, (result) => showIcons(query, result), (error) => {
+      console.error("Error searching icons:", error);
+      showMessage("Error loading icons.");
+    });
+  }
+
+  function showIcons(query, result) {
+    const results = part(".icon-search-results");
+    const color = part(".icon-picker-color").value;
+    const render = (icon) => {
+      const url = previewUrl(icon, color);
+      const element = document.createElement("button");
+      element.type = "button";
+      element.className = "icon-dropdown-item";
+      const image = document.createElement("img");
+      image.src = url;
+      image.className = "icon-preview";
+      image.alt = "";
+      image.loading = "lazy";
+      const name = document.createElement("span");
+      name.className = "icon-name";
+      name.textContent = icon;
+      element.append(image, name);
+      element.addEventListener("click", () => select(icon, url));
+      return element;
+    };
+    if (result.start === 0) {
+      if (!result.icons.length) {
+        showMessage("No icons found.");
+        return;
+      }
+      showResults(result.icons, render);
+    } else {
+      const list = results.querySelector(".icon-dropdown-list");
+      result.icons.forEach((icon) => list.appendChild(render(icon)));
+    }
+    results.querySelectorAll(".icon-search-more").forEach((button) => button.remove());
+    if (result.more) {
+      // Usually prefetched already, so this is answered from the cache
+      const more = document.createElement("button");
+      more.type = "button";
+      more.className = "icon-search-more";
+      more.textContent = "More icons";
+      more.addEventListener("click", () => {
+        const next = { query: query, start: result.start + scheduler.limit };
+        scheduler.load(next, (page) => showIcons(query, page), () => showMessage("Error loading icons."));
+      });
+      results.appendChild(more);
+    }
+  }
+
+  function setPreview(input, value, url) {
+    const preview = document.getElementById(`${input.id}_preview`);
+    if (!preview) {
+      return;
+    }
+    preview.textContent = "";
+    if (url) {
+      const image = document.createElement("img");
+      image.src = url;
+      image.className = "icon-display icon-preview";
+      image.alt = "";
+      preview.appendChild(image);
+    } else {
+      preview.textContent = value;
+    }
+  }
+
+  function select(value, url) {
+    const input = target;
+    const settings = options;
+    input.value = value;
+    setPreview(input, value, url);
+    close();
+    if (url && settings.savePath) {
+      // Swap the icon name for the saved SVG's path as soon as the server
+      // names it (icon_download.js); if saving fails the field keeps the
+      // icon name
+      const color = part(".icon-picker-color").value;
+      window.IconPickerDownload.save({
+        downloadUrl: settings.downloadUrl,
+        params: { icon: `${value}.svg`, color: color, id: settings.objectId, model: settings.model },
+      }).then((path) => {
+        if (path && input.value === value) {
+          input.value = path;
+        }
+      });
+    }
+    input.dispatchEvent(new Event("change", { bubbles: true }));
+  }
+
+  document.addEventListener("click", (event) => {
+    const opener = event.target.closest("[data-icon-picker-open]");
+    if (!opener) {
+      return;
+    }
+    const input = document.getElementById(opener.dataset.iconPickerOpen);
+    if (input) {
+      event.preventDefault();
+      open(input);
+    }
+  });
+})();
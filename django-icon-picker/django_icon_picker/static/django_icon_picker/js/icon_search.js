@@ -0,0 +1,200 @@
+// Icon search request scheduler shared by icon_picker.js and
+// icon_picker_lazy.js.
+//
+// Keystrokes are debounced (the search_debounce setting), a newer search
+// aborts the request of an older one so late responses never replace
+// newer results, and results are kept in a page-wide LRU (optionally
+// backed by IndexedDB) keyed by the normalized request. When a page of
+// results is full, the next page is fetched in the background so "More
+// icons" is answered from the cache.
+window.IconPickerSearch = (function () {
+  const DB_NAME = "django-icon-picker";
+  const STORE = "searches";
+
+  class LRU {
+    constructor(size) {
+      this.size = size;
+      this.entries = new Map();
+    }
+
+    get(key) {
+      const value = this.entries.get(key);
+      if (value !== undefined) {
+        // Move to the most recently used end
+        this.entries.delete(key);
+        this.entries.set(key, value);
+      }
+      return value;
+    }
+
+    set(key, value) {
+      this.entries.delete(key);
+      this.entries.set(key, value);
+      while (this.entries.size > this.size) {
+        this.entries.delete(this.entries.keys().next().value);
+      }
+    }
+  }
+
+  // Shared by every picker on the page
+  const memory = new LRU(100);
+  const inflight = new Map();
+  let database = null;
+
+  function openDatabase() {
+    if (!database) {
+      database = new Promise((resolve) => {
+        if (!window.indexedDB) {
+          resolve(null);
+          return;
+        }
+        const request = indexedDB.open(DB_NAME, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(STORE);
+        request.onsuccess = () => resolve(request.result);
+        // Private windows and blocked storage: keep the memory cache only
+        request.onerror = () => resolve(null);
+      });
+    }
+    return database;
+  }
+
+  function stored(db, key, ttl) {
+    return new Promise((resolve) => {
+      const request = db.transaction(STORE).objectStore(STORE).get(key);
+      request.onsuccess = () => {
+        const entry = request.result;
+        resolve(entry && Date.now() - entry.time < ttl ? entry.result : undefined);
+      };
+      request.onerror = () => resolve(undefined);
+    });
+  }
+
+  function store(db, key, result) {
+    db.transaction(STORE, "readwrite").objectStore(STORE).put({ time: Date.now(), result: result }, key);
+  }
+
+  function whenIdle(callback) {
+    (window.requestIdleCallback || ((fn) => setTimeout(fn, 0)))(callback);
+  }
+
+  class Scheduler {
+    constructor(options) {
+      this.url = options.url;
+      this.limit = options.limit || 20;
+      this.debounce = options.debounce ?? 300; // milliseconds
+      this.persist = Boolean(options.persist);
+      this.prefetch = options.prefetch ?? true;
+      this.ttl = (options.ttl ?? 3600) * 1000;
+      memory.size = Math.max(memory.size, options.cacheSize || 0);
+      this.timer = null;
+      this.controller = null;
+      this.generation = 0;
+    }
+
+    // Normalized like django_icon_picker.search_proxy.normalize, so the
+    // browser and server caches agree on which searches are the same
+    request(params) {
+      const query = params.query.toLowerCase().split(/\s+/).filter(Boolean).join(" ");
+      const search = new URLSearchParams({ query: query, limit: this.limit, start: params.start || 0 });
+      if (params.prefix) {
+        search.set("prefix", params.prefix);
+      }
+      return `${this.url}?${search}`;
+    }
+
+    // Debounced load() for keystrokes
+    search(params, render, fail) {
+      this.cancel();
+      const generation = this.generation;
+      const cached = memory.get(this.request(params));
+      if (cached) {
+        render(cached);
+        return;
+      }
+      this.timer = setTimeout(() => this.load(params, render, fail, generation), this.debounce);
+    }
+
+    // Fetch (or reuse) one page and render it unless a newer search started
+    load(params, render, fail, generation = ++this.generation) {
+      clearTimeout(this.timer);
+      if (this.controller) {
+        this.controller.abort();
+      }
+      const controller = (this.controller = new AbortController());
+      this.page(params, controller.signal).then(
+        (result) => {
+          if (generation !== this.generation) {
+            return;
+          }
+          render(result);
+          if (this.prefetch && result.more) {
+            const next = { ...params, start: result.start + this.limit };
+            whenIdle(() => this.page(next).catch(() => {}));
+          }
+        },
+        (error) => {
+          if (error.name !== "AbortError" && generation === this.generation) {
+            fail(error);
+          }
+        }
+      );
+    }
+
+    cancel() {
+      clearTimeout(this.timer);
+      this.generation++;
+      if (this.controller) {
+        this.controller.abort();
+        this.controller = null;
+      }
+    }
+
+    async page(params, signal) {
+      const url = this.request(params);
+      const cached = memory.get(url);
+      if (cached) {
+        return cached;
+      }
+      // A prefetch of the same page is already on its way
+      if (inflight.has(url)) {
+        return inflight.get(url);
+      }
+      const db = this.persist ? await openDatabase() : null;
+      const saved = db ? await stored(db, url, this.ttl) : undefined;
+      if (saved) {
+        memory.set(url, saved);
+        return saved;
+      }
+      const pending = fetch(url, { signal: signal })
+        .then((response) => (response.ok ? response.json() : Promise.reject(new Error(response.statusText))))
+        .then((data) => {
+          const icons = data.icons || [];
+          const result = {
+            icons: icons,
+            start: params.start || 0,
+            // The local endpoint says so; Iconify fills the page when there are more
+            more: data.more ?? icons.length >= this.limit,
+          };
+          memory.set(url, result);
+          if (db) {
+            store(db, url, result);
+          }
+          return result;
+        })
+        .finally(() => {
+          if (inflight.get(url) === pending) {
+            inflight.delete(url);
+          }
+        });
+      if (!signal) {
+        inflight.set(url, pending);
+      }
+      return pending;
+    }
+  }
+
+  return {
+    create: (options) => new Scheduler(options),
+    LRU: LRU,
+  };
+})();
@@ -0,0 +1,265 @@
+# django-icon-picker/django_icon_picker/storage.py
+"""
+Persistence of saved icon files through Django's Storage API.
+
+IconField values keep their familiar form, ``{ICON_PICKER_PATH}/<name>``;
+the ``<name>`` part is stored in the backend selected by
+``ICON_PICKER_STORAGE``:
+
+* ``None`` (default): a FileSystemStorage rooted at ``ICON_PICKER_PATH``,
+  which is exactly the old behaviour;
+* the alias of an entry in ``STORAGES`` (e.g. ``"default"``);
+* a ``{"BACKEND": ..., "OPTIONS": {...}}`` dict, like a ``STORAGES`` entry.
+
+With ``ICON_PICKER_STORAGE_CACHE`` set to a directory, every icon written
+or read is also kept there, so nodes serve hot icons from local disk while
+the backend (e.g. object storage) remains the source of truth.
+
+With ``ICON_PICKER_PRECOMPRESS = True`` every SVG written also gets
+``.gz`` (and, if the ``brotli`` package is installed, ``.br``) siblings,
+which the icon serving view hands to clients that accept them.
+
+Managed SVGs are optimized (see ``optimize``) before they are written,
+so the precompressed copies and the local cache hold the smaller file.
+
+Color variants of recolorable icons (see ``recolor``) are not stored:
+they exist, read and are served as their ``currentColor`` source file,
+recolored on the way out.
+
+Values outside ``ICON_PICKER_PATH`` (SVG paths entered by hand) are
+resolved relative to the working directory, as before.
+
+Rewriting a file never leaves it missing where the backend allows it:
+identical content is not rewritten at all, backends on the local disk get
+the new file renamed over the old one, and backends that overwrite in
+place (e.g. object storage with ``file_overwrite``) are saved to directly.
+Only other backends have the old file deleted before the new one is saved.
+"""
+import gzip
+import os
+import secrets
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils._os import safe_join
+from django.urls import NoReverseMatch, reverse
+from django.utils.module_loading import import_string
+
+from . import optimize, recolor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content-Encoding -> file suffix of precompressed variants, preferred first
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+@lru_cache(maxsize=None)
+def get_icon_storage():
+    """Return the Storage holding files under ``ICON_PICKER_PATH``."""
+    backend = getattr(settings, 'ICON_PICKER_STORAGE', None)
+    if backend is None:
+        root = getattr(settings, 'ICON_PICKER_PATH', None) or ''
+        return FileSystemStorage(location=root, base_url=f'/{root}/')
+    if isinstance(backend, str):
+        return storages[backend]
+    return import_string(backend['BACKEND'])(**backend.get('OPTIONS', {}))
+
+
+@lru_cache(maxsize=None)
+def _local_storage():
+    return FileSystemStorage(location=os.curdir, base_url='/')
+
+
+@receiver(setting_changed)
+def _reset_storage(setting, **kwargs):
+    if setting in ('ICON_PICKER_PATH', 'ICON_PICKER_STORAGE', 'STORAGES'):
+        get_icon_storage.cache_clear()
+
+
+def _resolve(path):
+    """Map a stored value to ``(storage, name, managed)``."""
+    root = getattr(settings, 'ICON_PICKER_PATH', None)
+    if root and path.startswith(f'{root}/'):
+        return get_icon_storage(), path[len(root) + 1:], True
+    return _local_storage(), path, False
+
+
+def _cache_path(name):
+    cache_dir = getattr(settings, 'ICON_PICKER_STORAGE_CACHE', None)
+    return safe_join(cache_dir, name) if cache_dir else None
+
+
+def _atomic_write(file_path, content, permissions=None):
+    """Write ``file_path`` so that readers see the old or the new file, never a partial one."""
+    temporary = f'{file_path}.{secrets.token_hex(8)}.tmp'
+    # Created like FileSystemStorage creates files, so the umask applies
+    descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(content)
+        if permissions is not None:
+            os.chmod(temporary, permissions)
+        os.replace(temporary, file_path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def _write_cache(name, content):
+    cache_path = _cache_path(name)
+    if cache_path is None:
+        return
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    _atomic_write(cache_path, content)
+
+
+def is_managed(path):
+    """Whether ``path`` lives in the icon storage (under ``ICON_PICKER_PATH``)."""
+    return _resolve(path)[2]
+
+
+def exists(path):
+    path, _ = recolor.split_variant(path)
+    storage, name, managed = _resolve(path)
+    try:
+        cache_path = _cache_path(name) if managed else None
+        if cache_path and os.path.exists(cache_path):
+            return True
+        return storage.exists(name)
+    except SuspiciousFileOperation:
+        return False
+
+
+def read(path):
+    """Return the content of ``path`` as bytes."""
+    source, color = recolor.split_variant(path)
+    if color is not None:
+        return recolor.get_render_cache().render(source, color, lambda: read(source))
+    storage, name, managed = _resolve(path)
+    cache_path = _cache_path(name) if managed else None
+    if cache_path:
+        try:
+            with open(cache_path, 'rb') as f:
+                return f.read()
+        except OSError:
+            pass
+    with storage.open(name, 'rb') as f:
+        content = f.read()
+    if cache_path:
+        _write_cache(name, content)
+    return content
+
+
+def write(path, content, raw=False):
+    """
+    Save ``content`` (bytes) as ``path``, replacing any previous file.
+    Managed SVGs are optimized first unless ``raw`` is true.
+
+    Returns the path, which is unchanged: backends that would pick an
+    alternative name for an existing file get the old one deleted first.
+    """
+    storage, name, managed = _resolve(path)
+    if managed and name.endswith('.svg') and not raw:
+        content = optimize.optimize_and_record(content)
+    saved = _replace(storage, name, content)
+    recolor.get_render_cache().discard(path)
+    if managed:
+        _write_cache(saved, content)
+    if managed and saved.endswith('.svg') and getattr(settings, 'ICON_PICKER_PRECOMPRESS', False):
+        for suffix, compressed in _compress(content):
+            _replace(storage, saved + suffix, compressed)
+    root = getattr(settings, 'ICON_PICKER_PATH', None)
+    return f'{root}/{saved}' if managed else saved
+
+
+def _replace(storage, name, content):
+    """Store ``content`` as ``name``, replacing any previous file (see the module docstring)."""
+    local_path = _local_path(storage, name)
+    if local_path is not None:
+        try:
+            with open(local_path, 'rb') as f:
+                if f.read() == content:
+                    return name
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        _atomic_write(local_path, content, getattr(storage, 'file_permissions_mode', None))
+        return name
+    if storage.exists(name):
+        with storage.open(name, 'rb') as f:
+            if f.read() == content:
+                return name
+        if storage.get_available_name(name) != name:
+            # The backend would save under another name: make room
+            storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def _local_path(storage, name):
+    """Where a local filesystem backend keeps ``name``, or None for other backends."""
+    if not isinstance(storage, FileSystemStorage):
+        return None
+    return storage.path(name)
+
+
+def _compress(content):
+    # mtime=0 keeps the gzip output (and so its ETag) deterministic
+    yield '.gz', gzip.compress(content, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress(content)
+
+
+def delete(path):
+    recolor.get_render_cache().discard(path)
+    storage, name, managed = _resolve(path)
+    names = [name]
+    if managed and getattr(settings, 'ICON_PICKER_PRECOMPRESS', False):
+        names += [name + suffix for _, suffix in PRECOMPRESSED]
+    for variant in names:
+        cache_path = _cache_path(variant) if managed else None
+        if cache_path:
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+        storage.delete(variant)
+
+
+def modified_time(path):
+    """Last modification time of ``path``, or None if the backend can't tell."""
+    path, _ = recolor.split_variant(path)
+    storage, name, managed = _resolve(path)
+    try:
+        return storage.get_modified_time(name)
+    except (NotImplementedError, OSError):
+        return None
+
+
+def url(path):
+    """
+    Public URL of ``path``.
+
+    Files in the default storage, and color variants in any storage, are
+    served by the ``icon_picker:icon`` view, which adds caching headers;
+    other backends serve their own URLs.
+    """
+    storage, name, managed = _resolve(path)
+    if not managed:
+        return f'/{path}'
+    if getattr(settings, 'ICON_PICKER_STORAGE', None) is None or recolor.split_variant(name)[1]:
+        try:
+            return reverse('icon_picker:icon', args=[name])
+        except NoReverseMatch:
+            pass
+    return storage.url(name)
@@ -0,0 +1,180 @@
+# django-icon-picker/django_icon_picker/svg_files.py
+"""
+Content-addressed SVG files.
+
+A saved icon is identified by what it looks like, not by the row that uses
+it: ``(icon, color, size)`` hashes to
+``{ICON_PICKER_PATH}/icons/ab/abcdef....svg``, so every row showing
+``mdi:home`` in red shares one file (and one CDN cache entry).
+
+Files are reference counted against the database itself: a file is only
+unlinked once no IconField column of any installed model still points to
+it. Deriving the count from the rows keeps it correct across bulk updates,
+fixtures and raw SQL, which a separate counter would silently miss.
+
+With ``ICON_PICKER_RECOLOR = True`` only the ``currentColor`` file of
+``(icon, size)`` is stored and ``(icon, color, size)`` names a color
+variant of it (see ``recolor``); a variant keeps its source file alive.
+"""
+import hashlib
+import threading
+from functools import partial
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from . import storage
+from .classify import is_svg_file_path
+from .recolor import normalize_color, split_variant, variant_path, variant_prefix
+
+# Released paths looked up per query; keeps the IN list and the OR'ed
+# variant prefixes well under every backend's parameter limit
+REFERENCE_BATCH = 100
+
+
+def icon_key(icon, color='', size=''):
+    """
+    Hash identifying the SVG of ``icon`` rendered in ``color`` at ``size``.
+
+    Raises ValueError for an invalid color.
+    """
+    data = '\0'.join((icon, normalize_color(color), str(size or '')))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()[:32]
+
+
+def _key_path(key):
+    return f"{getattr(settings, 'ICON_PICKER_PATH')}/icons/{key[:2]}/{key}.svg"
+
+
+def icon_file_path(icon, color='', size=''):
+    """Path of the shared SVG file for ``(icon, color, size)``."""
+    if getattr(settings, 'ICON_PICKER_RECOLOR', False):
+        return variant_path(_key_path(icon_key(icon, '', size)), color)
+    return _key_path(icon_key(icon, color, size))
+
+
+def source_file(icon, color='', size=''):
+    """
+    ``(path, color)`` to fetch and store so that ``icon_file_path(icon,
+    color, size)`` can be served: the file itself in the normalized color,
+    or with ICON_PICKER_RECOLOR the icon's ``currentColor`` source.
+    """
+    if getattr(settings, 'ICON_PICKER_RECOLOR', False):
+        return _key_path(icon_key(icon, '', size)), ''
+    return icon_file_path(icon, color, size), normalize_color(color)
+
+
+def source_path(file_path):
+    """The stored file behind ``file_path``: its source for color variants, else itself."""
+    return split_variant(file_path)[0]
+
+
+def saved_files():
+    """Paths of the shared SVG files in the icon storage, in sorted order."""
+    icon_storage = storage.get_icon_storage()
+    root = getattr(settings, 'ICON_PICKER_PATH')
+    try:
+        directories, _ = icon_storage.listdir('icons')
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for directory in sorted(directories):
+        _, files = icon_storage.listdir(f'icons/{directory}')
+        for filename in sorted(files):
+            if filename.endswith('.svg'):
+                yield f'{root}/icons/{directory}/{filename}'
+
+
+def icon_columns():
+    """``(model, field name)`` for every IconField of every installed model."""
+    return [
+        (model, field.attname)
+        for model in apps.get_models()
+        for field in model._meta.concrete_fields
+        if hasattr(field, 'get_icon_type')
+    ]
+
+
+def referenced_files(file_paths):
+    """
+    The paths among ``file_paths`` that a stored IconField value still
+    points to, directly or through a color variant.
+
+    Runs one query per IconField column for every ``REFERENCE_BATCH``
+    paths, however many rows released them.
+    """
+    file_paths = sorted(set(file_paths))
+    referenced = set()
+    for model, name in icon_columns():
+        for start in range(0, len(file_paths), REFERENCE_BATCH):
+            batch = [path for path in file_paths[start:start + REFERENCE_BATCH] if path not in referenced]
+            if not batch:
+                continue
+            condition = Q(**{f'{name}__in': batch})
+            for prefix in filter(None, map(variant_prefix, batch)):
+                condition |= Q(**{f'{name}__startswith': prefix})
+            values = model._base_manager.filter(condition).values_list(name, flat=True).distinct()
+            referenced.update(source_path(value) for value in values)
+    return referenced.intersection(file_paths)
+
+
+def is_referenced(file_path):
+    """Whether any stored IconField value still points to ``file_path`` or a color variant of it."""
+    return bool(referenced_files([file_path]))
+
+
+def _unlink_unreferenced(file_paths):
+    file_paths = [path for path in file_paths if storage.exists(path)]
+    if not file_paths:
+        return
+    referenced = referenced_files(file_paths)
+    for file_path in file_paths:
+        if file_path not in referenced:
+            storage.delete(file_path)
+
+
+# Per thread (like connections) and database alias: the files released
+# in the current transaction, not checked yet
+_pending = threading.local()
+
+
+def _pending_files(using):
+    if not hasattr(_pending, 'files'):
+        _pending.files = {}
+    return _pending.files.setdefault(using, set())
+
+
+def _check_pending(using):
+    pending = _pending_files(using)
+    paths = set(pending)
+    pending.clear()
+    _unlink_unreferenced(paths)
+
+
+def release_file(file_path, using=None):
+    """
+    Drop a reference to ``file_path`` and unlink the file if it was the
+    last one.
+
+    The check runs once the current transaction commits, so a rolled back
+    delete keeps its file and rows deleted together in one queryset do not
+    keep each other's files alive. Every file released in a transaction is
+    checked by the same batch of queries. Releasing a color variant
+    releases its source file.
+    """
+    if not file_path or not is_svg_file_path(file_path):
+        return
+    file_path = source_path(file_path)
+    using = using or DEFAULT_DB_ALIAS
+    pending = _pending_files(using)
+    pending.add(file_path)
+    if not transaction.get_connection(using).in_atomic_block:
+        _check_pending(using)
+        return
+    # Each release registers a check, which costs nothing once an earlier
+    # one has emptied the pending set. Checks of a rolled back savepoint are
+    # discarded, but its files are still checked by the others: the rows it
+    # kept keep them. Files left pending by a rolled back transaction are
+    # checked with the next one.
+    transaction.on_commit(partial(_check_pending, using), using=using)
@@ -0,0 +1,82 @@
+# django-icon-picker/django_icon_picker/templatetags/icon_picker.py
+"""
+Template tags for rendering icon values.
+
+    {% load icon_picker %}
+
+    {% icon object.icon css_class="item-icon" %}
+
+    {% render_icons object_list "icon" as icon_rows %}
+    {% for object, icon_html in icon_rows %}
+        {{ icon_html }} {{ object.name }}
+    {% endfor %}
+"""
+from django import template
+from django.apps import apps
+
+# Django imports every tag library when it sets up the template engine, so
+# the rendering and sprite code is only imported once a tag is used.
+
+register = template.Library()
+
+
+@register.simple_tag
+def icon(value, css_class="", style="", alt_text="", color=None):
+    """Render a single icon value."""
+    if not value:
+        return ""
+    from ..rendering import render_icon_html
+    return render_icon_html(str(value), css_class, style, alt_text, color)
+
+
+@register.simple_tag
+def render_icons(items, field_name=None, css_class="", style="", alt_text="", color=None):
+    """
+    Render the icons of a whole list or queryset in one pass.
+
+    With ``field_name`` each item is an object and the icon is read from
+    that attribute; otherwise the items are the icon values themselves.
+    Returns ``(item, html)`` pairs in the original order.
+    """
+    from ..rendering import render_icons as render_icon_column
+    items = list(items)
+    if field_name:
+        values = [getattr(item, field_name) for item in items]
+    else:
+        values = items
+    return list(zip(items, render_icon_column(values, css_class, style, alt_text, color)))
+
+
+@register.simple_tag
+def icon_sprite(items, field_name=None):
+    """
+    Collect the icons of a list or queryset into an inline sprite.
+
+        {% icon_sprite object_list "icon" as sprite %}
+        {{ sprite.svg }}
+        {% for object in object_list %}{% icon_use object.icon sprite %}{% endfor %}
+    """
+    from ..sprites import Sprite
+    if field_name:
+        values = [getattr(item, field_name) for item in items]
+    else:
+        values = list(items)
+    return Sprite.from_values(values)
+
+
+@register.simple_tag
+def model_sprite(model_label):
+    """
+    Load the cacheable sprite file of a model, e.g. ``"example.ExampleModel"``.
+    Rows reference it by URL, so ``sprite.svg`` does not need to be inlined.
+    """
+    from ..sprites import get_model_sprite
+    return get_model_sprite(apps.get_model(model_label))
+
+
+@register.simple_tag
+def icon_use(value, sprite, css_class="", style="", alt_text=""):
+    """Render ``value`` as a reference into ``sprite``."""
+    if not value:
+        return ""
+    return sprite.use(str(value), css_class, style, alt_text)
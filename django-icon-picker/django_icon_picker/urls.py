@@ -1,6 +1,15 @@
 from django.urls import path
 from . import views
 
+app_name = "icon_picker"
+
 urlpatterns = [
     path("download-svg/", views.download_and_save_svg, name="download_svg"),
+    path("download-status/", views.download_status, name="download_status"),
+    path("search/", views.search_icons, name="search"),
+    path("search/iconify/", views.search_proxy, name="search_proxy"),
+    path("api/", views.icon_catalog, name="api"),
+    path("files/<path:name>", views.serve_icon, name="icon"),
+    path("render/<str:icon>.svg", views.render_icon, name="render"),
+    path("emoji/<str:version>.json", views.emoji_index, name="emoji_index"),
 ]
@@ -0,0 +1,152 @@
+# django-icon-picker/django_icon_picker/utils.py
+"""
+Validation and download helpers used by the enhanced IconField.
+
+``validate_icon_format`` checks a value against one grammar, shared with
+django_icon_picker.classify, with a named group per kind of value:
+
+* Iconify names, ``prefix:name`` (``mdi:home``, ``fa6-solid:house``);
+* class strings of Font Awesome and of the configured ``DJANGO_ICON_SETS``,
+  ``fas fa-home`` or ``zmdi zmdi-home`` with optional modifier classes
+  (``fa-spin``, ``zmdi-hc-2x``);
+* paths of saved SVG files (``media/icons/ab/abcd.svg``,
+  ``/static/icons/home.svg``);
+* emoji, including ZWJ, skin tone, flag and keycap sequences.
+
+The grammar is compiled once per icon set configuration.
+
+A value is matched once by a single ``fullmatch`` and the result is
+memoized, so validating large imports costs a dict lookup per repeated
+value. With ``check_catalog=True`` the name must also be known locally:
+Font Awesome names are looked up in their icon set's catalog and Iconify
+names in the local collection store. Sets or prefixes without local data
+are accepted, as nothing is known about them.
+"""
+import re
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .classify import EMOJI_SEQUENCE_RE, NAME_PATTERN, SVG_PATH_PATTERN, class_family, class_prefixes
+from .icon_store import get_icon_store
+from .registry import get_registry
+
+ICONIFY = 'iconify'
+CLASS_NAME = 'class_name'
+EMOJI = 'emoji'
+SVG_PATH = 'svg_path'
+
+
+def _alternation(words):
+    # Longest first, so 'fa-solid' is tried before 'fa'
+    return '|'.join(map(re.escape, sorted(words, key=len, reverse=True)))
+
+
+@lru_cache(maxsize=4)
+def _icon_format_re(prefixes):
+    alternatives = _alternation(prefixes)
+    families = _alternation({class_family(prefix) for prefix in prefixes})
+    return re.compile(
+        rf'(?P<{ICONIFY}>(?P<iconify_prefix>{NAME_PATTERN}):(?P<iconify_name>{NAME_PATTERN}))'
+        rf'|(?P<{CLASS_NAME}>(?P<class_prefix>{alternatives})'
+        rf' +(?P<class_family>{families})-(?P<class_icon>{NAME_PATTERN})(?: +(?P=class_family)-{NAME_PATTERN})*)'
+        rf'|(?P<{SVG_PATH}>{SVG_PATH_PATTERN})'
+        rf'|(?P<{EMOJI}>{EMOJI_SEQUENCE_RE.pattern})'
+    )
+
+
+def get_icon_format_re():
+    """The compiled value grammar for the configured icon sets."""
+    return _icon_format_re(class_prefixes())
+
+
+# Largest SVG accepted by download_svg_icon
+MAX_SVG_BYTES = 1024 * 1024
+
+
+@lru_cache(maxsize=8192)
+def parse_icon(value):
+    """
+    Return ``(kind, prefix, name)`` for a well-formed icon value, where
+    ``kind`` is one of ``'iconify'``, ``'class_name'``, ``'emoji'`` or
+    ``'svg_path'`` (prefix and name are None for the last two), or None
+    when the value matches none of the formats.
+    """
+    match = get_icon_format_re().fullmatch(value)
+    if match is None:
+        return None
+    kind = match.lastgroup
+    if kind == ICONIFY:
+        return kind, match['iconify_prefix'], match['iconify_name']
+    if kind == CLASS_NAME:
+        # 'fas fa-home' and 'zmdi zmdi-home', but not 'zmdi fa-home'
+        if match['class_family'] != class_family(match['class_prefix']):
+            return None
+        return kind, match['class_prefix'], match['class_icon']
+    return kind, None, None
+
+
+@receiver(setting_changed)
+def _reset_parse_icon(setting, **kwargs):
+    if setting == 'DJANGO_ICON_SETS':
+        parse_icon.cache_clear()
+
+
+def _in_catalog(kind, prefix, name):
+    if kind == CLASS_NAME:
+        icon_set = get_registry().for_prefix(prefix)
+        if icon_set is None or not len(icon_set.catalog):
+            return True
+        return name in icon_set.catalog
+    if kind == ICONIFY:
+        store = get_icon_store()
+        if store is None or not store.has_prefix(prefix):
+            return True
+        return store.has_icon(f'{prefix}:{name}')
+    return True
+
+
+def validate_icon_format(value, check_catalog=False):
+    """
+    Whether ``value`` is a well-formed icon value (see the module
+    docstring); with ``check_catalog`` the icon must also exist in the
+    locally available icon data.
+    """
+    if not value or not isinstance(value, str):
+        return False
+    parsed = parse_icon(value)
+    if parsed is None:
+        return False
+    return not check_catalog or _in_catalog(*parsed)
+
+
+def download_svg_icon(url, save_path):
+    """
+    Download the SVG at ``url`` into ``save_path`` and return the stored
+    path.
+
+    The file is named after the URL, like the other shared SVG files, so
+    a URL is only fetched once. Raises ValueError when the response is not
+    an SVG document and ``requests`` exceptions when the download fails,
+    UpstreamUnavailable while the client's circuit breaker is open.
+    """
+    from . import storage
+    from .client import get_client
+    from .svg_files import icon_key
+
+    key = icon_key(url)
+    file_path = f'{save_path}/icons/{key[:2]}/{key}.svg'
+    if storage.exists(file_path):
+        return file_path
+
+    with get_client().fetch(url, stream=True) as response:
+        response.raise_for_status()
+        content = b''
+        for chunk in response.iter_content(chunk_size=65536):
+            content += chunk
+            if len(content) > MAX_SVG_BYTES:
+                raise ValueError('SVG file is too large')
+    if b'<svg' not in content[:4096]:
+        raise ValueError('Not an SVG document')
+    return storage.write(file_path, content)
@@ -1,45 +1,352 @@
 # views.py
 
-from django.http import HttpResponse
 from django.conf import settings
-import requests
-import os
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET, require_safe
+import hashlib
+import json
+import re
+
+from . import storage
+from .settings import get_picker_settings
+from .svg_files import icon_file_path, source_file, source_path
+
+# The download queue (and with it requests), the icon store, the search
+# index, the emoji index and the catalog are imported by the views using them, so loading
+# the URLconf does not pay for them.
+
+# Sizes accepted for downloaded SVGs: a number with an optional CSS unit
+SIZE_RE = re.compile(r"\d+(?:\.\d+)?(?:px|em|rem)?")
+
+# Colors accepted by the icon rendering view: hex codes or CSS color names
+COLOR_RE = re.compile(r"#[0-9a-fA-F]{3,8}|[a-zA-Z]+")
+
+# Names whose content never changes: content-addressed icons, their color
+# variants and sprites
+HASHED_NAME_RE = re.compile(r"(?:^|/)(?:[0-9a-f]{32}(?:\.[0-9a-z]+)?|[\w.-]+-[0-9a-f]{16})\.svg$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+RENDERED_MAX_AGE = "public, max-age=86400"
+CATALOG_MAX_AGE = "public, max-age=3600"
+# Search results are only given to staff, so shared caches must not keep them
+SEARCH_MAX_AGE = "private, max-age=300"
+
+# Upper bound for the catalog's per_page parameter
+MAX_PER_PAGE = 500
+
+
+def _conditional_response(request, content, content_type, cache_control, last_modified=None):
+    """
+    Answer with ``content`` under a strong ETag, or 304 when the client's
+    copy is current.
+    """
+    etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+    response["ETag"] = etag
+    if timestamp:
+        response["Last-Modified"] = http_date(timestamp)
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def _accepted_encodings(header):
+    """
+    Quality values of the content codings in an Accept-Encoding ``header``;
+    ``*`` stands for every coding not named.
+    """
+    accepted = {}
+    for item in header.split(","):
+        coding, _, parameters = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def _preferred_encoding(header, candidates):
+    """
+    The coding among ``candidates`` the client prefers (ties go to the
+    first), or None when it refuses all of them (``q=0``) or names none.
+    """
+    accepted = _accepted_encodings(header)
+    best, best_quality = None, 0.0
+    for candidate in candidates:
+        quality = accepted.get(candidate, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = candidate, quality
+    return best
+
+
+def _svg_response(request, content, cache_control, encoding=None, last_modified=None):
+    response = _conditional_response(
+        request, content, "image/svg+xml", cache_control, last_modified=last_modified
+    )
+    if encoding and response.status_code == 200:
+        response["Content-Encoding"] = encoding
+    # Saved SVGs are user supplied: never run their scripts
+    response["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
 
 
 def download_and_save_svg(request):
+    """
+    Materialize the chosen icon as a shared, content-addressed SVG file.
+
+    The file is named after ``(icon, color, size)``, so rows using the same
+    icon share it. With ``ICON_PICKER_RECOLOR`` the path names a color
+    variant and only the icon's ``currentColor`` source file is fetched,
+    once for every color. Files that already exist and icons installed
+    locally are answered right away; anything else is handed to the
+    background download queue and the file path is returned immediately
+    with status 202. ``download_status`` reports progress.
+    """
     model = request.GET.get("model")
     if request.user.is_superuser or request.user.has_perm(f"edit_{model}"):
         svg_icon = request.GET.get("icon")
-        color = request.GET.get("color")
-        
-        # Handle None color parameter to prevent AttributeError
-        if color is not None:
-            color = color.replace("#", "%23")
-        else:
-            color = "%23000000"  # Default to black if no color specified
-            
-        svg_url = f"https://api.iconify.design/{svg_icon}?color={color}"
-        id = request.GET.get("id")
-        # Define the path where you want to save the SVG file
-        save_path = getattr(settings, "ICON_PICKER_PATH")
-
-        save_path = f"{save_path}/{model}"
-        # Ensure the save path exists
-        os.makedirs(save_path, exist_ok=True)
-        # Download the SVG file
-        response = requests.get(svg_url)
-        if response.status_code == 200:
-            # Extract the filename from the URL
-            filename = os.path.basename(f"icon-{id}.svg")
-            file_path = os.path.join(save_path, filename)
-
-            # Save the SVG file
-            with open(file_path, "wb") as f:
-                f.write(response.content)
+        if not svg_icon:
+            return HttpResponseBadRequest("Missing icon")
+        color = request.GET.get("color") or "#000000"  # Default to black if no color specified
+        size = request.GET.get("size", "")
+        if size and not SIZE_RE.fullmatch(size):
+            return HttpResponseBadRequest("Invalid size")
+
+        icon_name = svg_icon[:-4] if svg_icon.endswith(".svg") else svg_icon
+        from .downloads import get_download_queue
+        from .icon_store import get_icon_store
+        try:
+            file_path = icon_file_path(icon_name, color, size)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid color")
+        source, source_color = source_file(icon_name, color, size)
+        if storage.exists(source):
+            return HttpResponse(file_path)
+
+        # Render from the local collection mirror when the icon is installed
+        store = get_icon_store()
+        dimension = size or "1em"
+        svg = store.render_svg(icon_name, color=source_color or None, width=dimension, height=dimension) if store else None
+        if svg is not None:
+            storage.write(source, svg.encode("utf-8"))
             return HttpResponse(file_path)
-        else:
-            return HttpResponse(
-                f"Failed to download SVG file. Status code: {response.reason}"
-            )
+
+        get_download_queue().submit(icon_name, source_color, source, size)
+        return HttpResponse(file_path, status=202)
     else:
-        return HttpResponse("Not permitted")
+        return HttpResponseForbidden("Not permitted")
+
+
+@require_GET
+def download_status(request):
+    """
+    Report the state of a background SVG download by its file path, for
+    jobs queued by any server process (see django_icon_picker.downloads).
+    """
+    from .downloads import DONE, job_status
+    file_path = request.GET.get("path", "")
+    # Only answer for files the picker manages
+    if not storage.is_managed(file_path):
+        return JsonResponse({"path": file_path, "status": "unknown"}, status=404)
+    # Color variants are ready once their source file is
+    job = job_status(source_path(file_path))
+    if job is not None:
+        return JsonResponse({**job, "path": file_path})
+    if storage.exists(file_path):
+        return JsonResponse({"path": file_path, "status": DONE})
+    return JsonResponse({"path": file_path, "status": "unknown"}, status=404)
+
+
+@require_safe
+def serve_icon(request, name):
+    """
+    Serve a saved SVG file from the icon storage with validators and cache
+    headers.
+
+    Content-hashed names are cached as immutable; anything else is
+    revalidated with its ETag. Precompressed ``.br``/``.gz`` variants are
+    used when the client accepts them.
+    """
+    root = getattr(settings, "ICON_PICKER_PATH", None)
+    path = f"{root}/{name}"
+    if not root or not name.endswith(".svg") or not storage.exists(path):
+        raise Http404("Icon not found")
+
+    encoding, variant = None, path
+    if getattr(settings, "ICON_PICKER_PRECOMPRESS", False):
+        available = {
+            candidate: path + suffix
+            for candidate, suffix in storage.PRECOMPRESSED
+            if storage.exists(path + suffix)
+        }
+        encoding = _preferred_encoding(request.headers.get("Accept-Encoding", ""), available)
+        if encoding:
+            variant = available[encoding]
+
+    cache_control = IMMUTABLE if HASHED_NAME_RE.search(name) else REVALIDATE
+    response = _svg_response(
+        request,
+        storage.read(variant),
+        cache_control,
+        encoding=encoding,
+        last_modified=storage.modified_time(variant),
+    )
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+@require_GET
+def render_icon(request, icon):
+    """Render an icon installed in the local collection store as SVG."""
+    from .icon_store import get_icon_store
+    color = request.GET.get("color", "")
+    if color and not COLOR_RE.fullmatch(color):
+        return HttpResponseBadRequest("Invalid color")
+    store = get_icon_store()
+    svg = store.render_svg(icon, color=color or None) if store else None
+    if svg is None:
+        raise Http404("Icon not installed")
+    return _svg_response(request, svg.encode("utf-8"), RENDERED_MAX_AGE)
+
+
+@require_GET
+def search_icons(request):
+    """
+    Search the locally installed icon collections.
+
+    Accepts the same parameters as the Iconify search API (``query``,
+    ``prefix``/``prefixes``, ``limit``, ``start``) and answers in the same
+    JSON shape, so the picker can use either endpoint.
+    """
+    from .search import DEFAULT_LIMIT, MAX_LIMIT, get_search_index
+    query = request.GET.get("query", "")
+    prefixes = request.GET.get("prefixes") or request.GET.get("prefix") or ""
+    prefixes = [prefix for prefix in prefixes.split(",") if prefix]
+    try:
+        limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        start = max(int(request.GET.get("start", 0)), 0)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid limit or start")
+
+    index = get_search_index()
+    if index is None:
+        icons, has_more = [], False
+    else:
+        icons, has_more = index.search(query, prefixes=prefixes, limit=limit, start=start)
+
+    return JsonResponse(
+        {
+            "icons": icons,
+            "total": len(icons),
+            "limit": limit,
+            "start": start,
+            "more": has_more,
+        }
+    )
+
+
+@require_GET
+def search_proxy(request):
+    """
+    Search the Iconify API through the server-side cache.
+
+    Takes the same parameters as ``search_icons`` and answers with the
+    upstream's JSON. The ``X-Cache`` header tells whether the result was
+    fresh, stale (and being refreshed) or fetched for this request.
+
+    Only active staff users may search, so the view cannot be used as an
+    open proxy to the Iconify API.
+    """
+    if not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden("Not permitted")
+    import requests
+    from .search import DEFAULT_LIMIT, MAX_LIMIT
+    from .search_proxy import SearchError, get_search_proxy
+    query = request.GET.get("query", "")
+    prefixes = request.GET.get("prefixes") or request.GET.get("prefix") or ""
+    try:
+        limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        start = max(int(request.GET.get("start", 0)), 0)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid limit or start")
+    if not query.strip():
+        return HttpResponseBadRequest("Missing query")
+
+    try:
+        payload, state = get_search_proxy().search(query, prefixes.split(","), limit, start)
+    except (SearchError, requests.RequestException, ValueError):
+        return JsonResponse({"error": "Icon search is unavailable"}, status=502)
+    response = JsonResponse(payload)
+    response["Cache-Control"] = SEARCH_MAX_AGE
+    response["X-Cache"] = state.upper()
+    return response
+
+
+@require_GET
+def icon_catalog(request):
+    """
+    Browse the icon set catalog.
+
+    Without ``set`` the configured icon sets are listed with their totals
+    and categories. With it, one page of that set's icons is returned as
+    ``[value, label]`` pairs; ``page`` (from 1), ``per_page`` (defaults to
+    the ``icons_per_page`` setting), ``category`` and ``q`` narrow it down.
+    Responses are compact JSON with an ETag and may be cached for an hour.
+    """
+    from .catalog import get_catalog
+    from .registry import get_registry
+    set_id = request.GET.get("set")
+    if not set_id:
+        payload = {"sets": [icon_set.catalog.describe() for icon_set in get_registry()]}
+    else:
+        catalog = get_catalog(set_id)
+        if catalog is None:
+            raise Http404("Unknown icon set")
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+            per_page = int(request.GET.get("per_page", get_picker_settings()["icons_per_page"]))
+            per_page = min(max(per_page, 1), MAX_PER_PAGE)
+        except ValueError:
+            return HttpResponseBadRequest("Invalid page or per_page")
+        category = request.GET.get("category") or None
+        if category and category not in catalog.categories:
+            return HttpResponseBadRequest("Unknown category")
+        total, icons = catalog.page(page, per_page, category, request.GET.get("q", ""))
+        payload = {
+            "set": catalog.id,
+            "page": page,
+            "pages": -(-total // per_page),
+            "total": total,
+            "icons": icons,
+        }
+    content = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _conditional_response(request, content, "application/json", CATALOG_MAX_AGE)
+
+
+@require_GET
+def emoji_index(request, version):
+    """
+    Serve the emoji search index (see django_icon_picker.emoji_index).
+
+    Widgets link to it under its content hash, which is cached as
+    immutable; any other version is answered with the current index and
+    revalidated with its ETag.
+    """
+    from .emoji_index import get_emoji_index
+    content, current = get_emoji_index()
+    cache_control = IMMUTABLE if version == current else REVALIDATE
+    return _conditional_response(request, content, "application/json", cache_control)
@@ -1,11 +1,93 @@
 # django-icon-picker/django_icon_picker/widgets.py
+import hashlib
 import json
+from contextvars import ContextVar
 from django import forms
+from django.conf import settings
+from django.forms.utils import flatatt
+from django.template.defaultfilters import escapejs
+from django.template.loader import render_to_string
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 from django.templatetags.static import static
-from django.urls import reverse
-from .settings import ICON_SETS, ICON_COLOR, ICON_PICKER_SETTINGS
+from django.core.signals import request_finished, request_started, setting_changed
+from django.dispatch import receiver
+from django.urls import get_script_prefix, reverse
+from .registry import get_registry
+from .settings import BROWSER_SETTINGS, ICON_COLOR, get_picker_settings
+
+# Stands in for the icon name in the render URL handed to the picker JS
+ICON_PLACEHOLDER = '__icon__'
+
+# Keep JSON embedded in <script> from closing the tag
+JSON_SCRIPT_ESCAPES = {ord('<'): '\\u003C', ord('>'): '\\u003E', ord('&'): '\\u0026'}
+
+# Modal HTML and JSON config per widget configuration, see _get_chrome()
+_chrome_cache = {}
+
+# Settings the chrome is built from: icon sets, picker options and URLs
+CHROME_SETTINGS = {
+    'DJANGO_ICON_SETS', 'ICON_PICKER_CATALOG_PATH', 'ICON_PICKER_SETTINGS', 'ICON_PICKER_COLOR',
+    'ICON_PICKER_RECOLOR', 'ICON_PICKER_COLLECTIONS_PATH', 'ICON_PICKER_SEARCH_PROXY',
+    'ROOT_URLCONF',
+}
+
+# Ids of the modals already emitted for the current request's page; None
+# outside requests, where every field carries its modal
+_page_modals = ContextVar('icon_picker_page_modals', default=None)
+
+
+@receiver(setting_changed)
+def _reset_chrome_cache(setting, **kwargs):
+    if setting in CHROME_SETTINGS:
+        _chrome_cache.clear()
+
+
+@receiver(request_started)
+def _start_page(**kwargs):
+    _page_modals.set(set())
+
+
+@receiver(request_finished)
+def _end_page(**kwargs):
+    _page_modals.set(None)
+
+
+def _claim_modal(modal_id):
+    """Whether the field being rendered has to emit the modal ``modal_id``."""
+    emitted = _page_modals.get()
+    if emitted is None:
+        return True
+    if modal_id in emitted:
+        return False
+    emitted.add(modal_id)
+    return True
+
+
+# Per-field part of IconPickerWidget; the modal is the cached fragment,
+# emitted by the first field of the page using it
+WIDGET_HTML = '''<div class="icon-picker-container" id="{widget_id}_container">
+    <div class="icon-picker-input-group">
+        {input}
+        <div class="icon-picker-preview" id="{widget_id}_preview">{preview}</div>
+        <button type="button" class="icon-picker-button btn btn-outline-secondary"
+                id="{widget_id}_button" data-target="#{modal_id}_modal">
+            🎨 Choose Icon
+        </button>
+        {clear}
+    </div>
+    {modal}
+</div>
+<script type="text/javascript">
+    document.addEventListener('DOMContentLoaded', function() {{
+        if (typeof IconPicker !== 'undefined') {{
+            new IconPicker('{js_id}', {config});
+        }} else {{
+            // Fallback for basic functionality
+            console.warn('IconPicker JavaScript not loaded, using basic functionality');
+        }}
+    }});
+</script>'''
 
 
 class IconPickerWidget(forms.TextInput):
@@ -16,7 +98,8 @@ class IconPickerWidget(forms.TextInput):
     Maintains backward compatibility with the original emoji/SVG functionality.
     """
     
-    template_name = 'django_icon_picker/icon_picker_widget.html'
+    template_name = 'django/forms/widgets/text.html'
+    modal_template_name = 'django_icon_picker/widgets/modal.html'
     
     def __init__(self, icon_set=None, template='default', allow_svg=True,
                  allow_custom=True, allow_emoji=True, required_prefix=None, attrs=None):
@@ -37,174 +120,134 @@ class IconPickerWidget(forms.TextInput):
         super().__init__(attrs=default_attrs)
     
     def render(self, name, value, attrs=None, renderer=None):
-        """Render the widget with enhanced UI."""
-        if attrs is None:
-            attrs = {}
-        
-        # Generate unique ID for this widget instance
-        widget_id = attrs.get('id', f'icon_picker_{name}')
-        
-        # Prepare configuration data
+        """
+        Render the widget with enhanced UI.
+
+        The modal chrome and the JSON configuration only depend on the
+        widget's settings, so they are built once per configuration (see
+        ``_get_chrome``) and shared by every field rendered with it; only the
+        small per-field part below is formatted for each field. Within a
+        request the modal itself is emitted once per configuration, by the
+        first field using it, and opened by all of them.
+        """
+        context = self.get_context(name, value, attrs)
+        widget_id = context['widget']['attrs'].get('id') or f'icon_picker_{name}'
+        chrome = self._get_chrome()
+        clear_html = format_html(
+            '<button type="button" class="icon-picker-clear btn btn-outline-danger" id="{}_clear">✖</button>',
+            widget_id,
+        ) if value else ''
+        return format_html(
+            WIDGET_HTML,
+            widget_id=widget_id,
+            input=self._render_input(context, renderer),
+            preview=self._render_preview(value) if value else '',
+            clear=clear_html,
+            modal_id=chrome['modal_id'],
+            modal=chrome['modal'] if _claim_modal(chrome['modal_id']) else '',
+            js_id=escapejs(widget_id),
+            config=chrome['config'],
+        )
+
+    def _render_input(self, context, renderer):
+        """Format the text input directly, skipping the template engine."""
+        widget = context['widget']
+        return format_html(
+            '<input type="{}" name="{}"{}{}>',
+            widget['type'],
+            widget['name'],
+            format_html(' value="{}"', widget['value']) if widget['value'] is not None else '',
+            flatatt(widget['attrs']),
+        )
+
+    def _config_key(self):
+        return (self.icon_set, self.allow_svg, self.allow_custom, self.allow_emoji, self.required_prefix)
+
+    def _get_chrome(self):
+        """Return the cached modal HTML and JSON config for this configuration."""
+        from .emoji_index import get_emoji_index
+        # URLs depend on the request's script prefix, and a rebuilt emoji
+        # index changes the config's versioned index URL
+        key = (self._config_key(), get_script_prefix(), get_emoji_index()[1])
+        chrome = _chrome_cache.get(key)
+        if chrome is None:
+            chrome = _chrome_cache[key] = self._build_chrome()
+        return chrome
+
+    def _build_chrome(self):
+        # One modal per configuration, whichever fields open it
+        modal_id = 'icon_picker_' + hashlib.sha256(repr(self._config_key()).encode()).hexdigest()[:12]
+        icon_sets = self._get_available_icon_sets()
+        default_set = get_registry().default()
+        selected_icon_set = self.icon_set or (default_set.id if default_set else None)
         config = {
-            'iconSets': self._get_available_icon_sets(),
-            'selectedIconSet': self.icon_set or (ICON_SETS[0][0] if ICON_SETS else None),
+            'iconSets': icon_sets,
+            'selectedIconSet': selected_icon_set,
             'allowSvg': self.allow_svg,
             'allowCustom': self.allow_custom,
             'allowEmoji': self.allow_emoji,  # Backward compatibility
             'requiredPrefix': self.required_prefix,
-            'color': ICON_COLOR,
-            'settings': ICON_PICKER_SETTINGS,
+            'color': getattr(settings, 'ICON_PICKER_COLOR', ICON_COLOR),
+            'settings': {key: value for key, value in get_picker_settings().items() if key in BROWSER_SETTINGS},
+            'modalId': modal_id,
             'apiUrl': self._safe_reverse('icon_picker:api', '/icon_picker/api/'),
             'searchUrl': self._safe_reverse('icon_picker:search', '/icon_picker/search/'),
+            'emojiIndexUrl': self._emoji_index_url(),
+            'searchOptions': self._search_options(),
         }
-        
-        # Base input field
-        input_html = super().render(name, value, attrs, renderer)
-        
-        # Icon preview
-        preview_html = self._render_preview(value) if value else ''
-        
-        # Picker button and modal
-        picker_html = f'''
-        <div class="icon-picker-container" id="{widget_id}_container">
-            <div class="icon-picker-input-group">
-                {input_html}
-                <div class="icon-picker-preview" id="{widget_id}_preview">
-                    {preview_html}
-                </div>
-                <button type="button" class="icon-picker-button btn btn-outline-secondary" 
-                        id="{widget_id}_button" data-target="#{widget_id}_modal">
-                    🎨 Choose Icon
-                </button>
-                {'<button type="button" class="icon-picker-clear btn btn-outline-danger" id="' + widget_id + '_clear">✖</button>' if value else ''}
-            </div>
-            
-            <!-- Icon Picker Modal -->
-            <div class="icon-picker-modal" id="{widget_id}_modal" style="display: none;">
-                <div class="icon-picker-modal-content">
-                    <div class="icon-picker-header">
-                        <h3>Choose an Icon</h3>
-                        <button type="button" class="icon-picker-close" id="{widget_id}_close">
-                            ✖
-                        </button>
-                    </div>
-                    
-                    <div class="icon-picker-toolbar">
-                        <div class="icon-picker-search">
-                            <input type="text" class="form-control" placeholder="Search icons..." 
-                                   id="{widget_id}_search">
-                            <span class="search-icon">🔍</span>
-                        </div>
-                        
-                        <div class="icon-picker-filters">
-                            <select class="form-control icon-set-selector" id="{widget_id}_iconset">
-                                {self._render_icon_set_options()}
-                            </select>
-                            
-                            <div class="icon-picker-view-options">
-                                <button type="button" class="btn btn-sm view-grid active" title="Grid View">
-                                    ⊞
-                                </button>
-                                <button type="button" class="btn btn-sm view-list" title="List View">
-                                    ☰
-                                </button>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="icon-picker-tabs">
-                        <button type="button" class="tab-button active" data-tab="all">All Icons</button>
-                        <button type="button" class="tab-button" data-tab="recent">Recent</button>
-                        <button type="button" class="tab-button" data-tab="favorites">Favorites</button>
-                        {f'<button type="button" class="tab-button" data-tab="emoji">Emojis</button>' if self.allow_emoji else ''}
-                        {f'<button type="button" class="tab-button" data-tab="custom">Custom</button>' if self.allow_custom else ''}
-                        {f'<button type="button" class="tab-button" data-tab="svg">SVG Upload</button>' if self.allow_svg else ''}
-                    </div>
-                    
-                    <div class="icon-picker-content">
-                        <div class="icon-picker-grid" id="{widget_id}_grid">
-                            <!-- Icons will be loaded here via JavaScript -->
-                        </div>
-                        
-                        <div class="icon-picker-pagination">
-                            <button type="button" class="btn btn-sm btn-outline-secondary" id="{widget_id}_prev" disabled>
-                                ← Previous
-                            </button>
-                            <span class="pagination-info" id="{widget_id}_info">Loading...</span>
-                            <button type="button" class="btn btn-sm btn-outline-secondary" id="{widget_id}_next">
-                                Next →
-                            </button>
-                        </div>
-                    </div>
-                    
-                    <div class="icon-picker-footer">
-                        <div class="selected-icon-info" id="{widget_id}_selected_info" style="display: none;">
-                            <strong>Selected:</strong> <span class="selected-icon-name"></span>
-                        </div>
-                        <div class="icon-picker-actions">
-                            <button type="button" class="btn btn-secondary" id="{widget_id}_cancel">Cancel</button>
-                            <button type="button" class="btn btn-primary" id="{widget_id}_select" disabled>Select Icon</button>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <script type="text/javascript">
-            document.addEventListener('DOMContentLoaded', function() {{
-                if (typeof IconPicker !== 'undefined') {{
-                    new IconPicker('{widget_id}', {json.dumps(config)});
-                }} else {{
-                    // Fallback for basic functionality
-                    console.warn('IconPicker JavaScript not loaded, using basic functionality');
-                }}
-            }});
-        </script>
-        '''
-        
-        return mark_safe(picker_html)
-    
+        modal = render_to_string(self.modal_template_name, {
+            'widget_id': modal_id,
+            'icon_sets': icon_sets,
+            'selected_icon_set': self.icon_set,
+            'allow_emoji': self.allow_emoji,
+            'allow_custom': self.allow_custom,
+            'allow_svg': self.allow_svg,
+        })
+        return {
+            'modal_id': modal_id,
+            'modal': mark_safe(modal),
+            'config': mark_safe(json.dumps(config).translate(JSON_SCRIPT_ESCAPES)),
+        }
+
     def _get_available_icon_sets(self):
         """Get list of available icon sets with metadata."""
-        return [
-            {
-                'id': icon_set[0],
-                'prefix': icon_set[1],
-                'name': icon_set[2],
-                'version': icon_set[3] if len(icon_set) > 3 else 'latest',
-            }
-            for icon_set in ICON_SETS
-        ]
-    
-    def _render_icon_set_options(self):
-        """Render option elements for icon set selector."""
-        options = []
-        for icon_set in ICON_SETS:
-            selected = 'selected' if icon_set[0] == self.icon_set else ''
-            options.append(f'<option value="{icon_set[0]}" {selected}>{icon_set[2]}</option>')
-        return ''.join(options)
+        return list(get_registry().as_dicts())
     
     def _render_preview(self, value):
         """Render icon preview with backward compatibility."""
         if not value:
             return ''
         
-        # Use the field methods for consistent rendering
-        try:
-            from .fields import IconField
-            field = IconField()
-            return field.get_display_html(value, css_class="icon-preview")
-        except ImportError:
-            # Fallback for basic preview
-            return f'<span class="icon-preview">{value}</span>'
+        # Use the shared renderer for consistent (and cached) rendering
+        from .rendering import render_icon_html
+        return render_icon_html(value, css_class="icon-preview")
     
-    def _safe_reverse(self, url_name, fallback):
+    def _safe_reverse(self, url_name, fallback, args=None):
         """Safely reverse URL or return fallback."""
         try:
-            return reverse(url_name)
+            return reverse(url_name, args=args)
         except:
             return fallback
     
+    def _emoji_index_url(self):
+        """URL of the emoji search index, versioned by its content hash."""
+        from .emoji_index import get_emoji_index
+        try:
+            return reverse('icon_picker:emoji_index', args=[get_emoji_index()[1]])
+        except:
+            return '/icon_picker/emoji/latest.json'
+
+    def _search_options(self):
+        """Options for the browser's search scheduler (icon_search.js)."""
+        options = get_picker_settings()
+        return {
+            'debounce': options['search_debounce'],
+            'cacheSize': options['search_cache_size'],
+            'persist': options['search_persist'],
+            'prefetch': options['search_prefetch'],
+            'ttl': options['search_ttl'],
+        }
+
     @property
     def media(self):
         """Return media files needed for the widget."""
@@ -215,6 +258,9 @@ class IconPickerWidget(forms.TextInput):
                 ]
             },
             js=[
+                static('django_icon_picker/js/emoji_index.js'),
+                static('django_icon_picker/js/icon_search.js'),
+                static('django_icon_picker/js/icon_download.js'),
                 static('django_icon_picker/js/icon_picker.js'),
             ]
         )
@@ -237,6 +283,10 @@ class IconPicker(IconPickerWidget):
         except:
             pass
 
+    def _render_input(self, context, renderer):
+        """The original template renders the input."""
+        return self._render(self.template_name, context, renderer)
+
     def get_context(self, name, value, attrs):
         """Original get_context method for template compatibility."""
         context = super().get_context(name, value, attrs)
@@ -245,10 +295,48 @@ class IconPicker(IconPickerWidget):
         context.update(
             {
                 "object_id": self.get_object_id(value),
+                "search_url": self.get_search_url(),
+                "render_url": self.get_render_url(),
+                "icon_url": self.get_icon_url(value),
+                "emoji_index_url": self._emoji_index_url(),
+                "download_url": self._safe_reverse("icon_picker:download_svg", "/icon_picker/download-svg/"),
+                "search_options": mark_safe(
+                    json.dumps(self._search_options()).translate(JSON_SCRIPT_ESCAPES)
+                ),
             }
         )
         return context
 
+    def get_search_url(self):
+        """
+        Use the local search endpoint when collections are installed, else
+        the caching Iconify proxy if enabled, else Iconify itself.
+        """
+        from .icon_store import get_icon_store
+        if get_icon_store() is not None:
+            return self._safe_reverse('icon_picker:search', '')
+        if getattr(settings, "ICON_PICKER_SEARCH_PROXY", False):
+            return self._safe_reverse('icon_picker:search_proxy', '')
+        return ""
+
+    def get_render_url(self):
+        """
+        URL of the local icon renderer, with ``ICON_PLACEHOLDER`` for the
+        icon name, when collections are installed; previews then never
+        touch Iconify. Empty otherwise.
+        """
+        from .icon_store import get_icon_store
+        if get_icon_store() is None:
+            return ""
+        return self._safe_reverse('icon_picker:render', '', args=[ICON_PLACEHOLDER])
+
+    def get_icon_url(self, value):
+        """URL of a saved SVG file, wherever the icon storage keeps it."""
+        from . import classify, storage
+        if not classify.is_svg_file_path(value):
+            return ""
+        return storage.url(value)
+
     def get_object_id(self, value):
         """Original object ID generation."""
         if value:
@@ -260,16 +348,65 @@ class IconPicker(IconPickerWidget):
         """Original media configuration."""
         css = {
             "all": (
-                "https://cdn.jsdelivr.net/gh/mdbasit/Coloris@latest/dist/coloris.min.css",
+                "https://cdn.jsdelivr.net/gh/mdbassit/Coloris@v0.24.0/dist/coloris.min.css",
                 "django_icon_picker/css/icon_picker.css",
             )
         }
         js = (
-            "https://cdn.jsdelivr.net/gh/mdbasit/Coloris@latest/dist/coloris.min.js",
+            "https://cdn.jsdelivr.net/gh/mdbassit/Coloris@v0.24.0/dist/coloris.min.js",
+            "django_icon_picker/js/emoji_index.js",
+            "django_icon_picker/js/icon_search.js",
+            "django_icon_picker/js/icon_download.js",
             "django_icon_picker/js/icon_picker.js",
         )
 
 
+class LazyIconPicker(IconPicker):
+    """
+    Lightweight variant of IconPicker for pages with many icon fields.
+
+    Each field renders only its input, a preview and an "open" button; its
+    options travel in a ``data-icon-picker`` attribute. One delegated script
+    (icon_picker_lazy.js) builds a single picker modal shared by every field
+    the first time one is opened, and loads the emoji index only when the
+    emoji tab is used.
+    """
+
+    template_name = "django_icon_picker/lazy_icon_picker.html"
+
+    def render(self, name, value, attrs=None, renderer=None):
+        """Render only the field; the modal is built client-side on demand."""
+        context = self.get_context(name, value, attrs)
+        return self._render(self.template_name, context, renderer)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        options = {
+            "model": context["widget"]["attrs"].get("model_name", ""),
+            "objectId": context["object_id"],
+            "savePath": context.get("save_path") or "",
+            "defaultColor": context.get("default_color") or ICON_COLOR,
+            "searchUrl": context["search_url"],
+            "renderUrl": context["render_url"],
+            "downloadUrl": context["download_url"],
+            "emojiIndexUrl": context["emoji_index_url"],
+            "searchOptions": self._search_options(),
+        }
+        context["widget"]["attrs"]["data-icon-picker"] = json.dumps(options)
+        context["preview"] = self._render_preview(value) if value else ""
+        return context
+
+    class Media:
+        css = {"all": ("django_icon_picker/css/icon_picker.css",)}
+        js = (
+            "django_icon_picker/js/emoji_index.js",
+            "django_icon_picker/js/icon_search.js",
+            "django_icon_picker/js/icon_download.js",
+            "django_icon_picker/js/icon_picker_lazy.js",
+        )
+        extend = False
+
+
 class SimpleIconPickerWidget(forms.Select):
     """Simplified icon picker widget for basic use cases."""
     
@@ -279,20 +416,10 @@ class SimpleIconPickerWidget(forms.Select):
         super().__init__(choices=choices, attrs=attrs)
     
     def _get_icon_choices(self):
-        """Get simplified icon choices for the select widget."""
-        return [
-            ('', '-- Select an icon --'),
-            ('😀', 'Happy'),
-            ('😎', 'Cool'),
-            ('❤️', 'Heart'),
-            ('⭐', 'Star'),
-            ('🏠', 'Home'),
-            ('👤', 'User'),
-            ('🔍', 'Search'),
-            ('⚙️', 'Settings'),
-            ('📧', 'Email'),
-            ('📞', 'Phone'),
-        ]
+        """Get the icon set's choices from its catalog."""
+        from .catalog import get_catalog
+        catalog = get_catalog(self.icon_set)
+        return [('', '-- Select an icon --'), *(catalog.choices() if catalog else ())]
 
 
 class EmojiPickerWidget(IconPickerWidget):
@@ -21,6 +21,9 @@ setup(
         "Django>=4.2,<6.0",
         "requests",
     ],
+    extras_require={
+        "brotli": ["brotli"],
+    },
     package_data={
         "django_icon_picker": ["templates/django_icon_picker/icon_picker.html"],
     },
@@ -0,0 +1,79 @@
+"""
+Management command to compare the IconField lookups with classifying rows in Python.
+"""
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from django_icon_picker import classify
+from django_icon_picker.lookups import IconType
+from example.models import ExampleModel
+
+from .benchmark_classify import SAMPLES
+
+
+class Rollback(Exception):
+    """Ends the benchmark's transaction, so its rows are never kept."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill ExampleModel with generated icon values (rolled back afterwards) and '
+        'time counting emoji and icon types with the SQL lookups, on the companion '
+        'columns and on the CASE expression, against a Python loop over the values.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Rows to create (default: 1000000)')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per INSERT (default: 10000)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.fill(options['rows'], options['batch_size'])
+                self.run()
+                raise Rollback
+        except Rollback:
+            pass
+
+    def fill(self, rows, batch_size):
+        rng = random.Random(0)
+        values = [
+            sample.replace('home', f'home-{index}') if 'home' in sample else sample
+            for index, sample in enumerate(rng.choice(SAMPLES) for _ in range(1000))
+        ]
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            ExampleModel.objects.bulk_create(
+                ExampleModel(name=value, icon=value)
+                for value in rng.choices(values, k=min(batch_size, rows - offset))
+            )
+        self.stdout.write(f'{rows} rows created in {time.perf_counter() - start:.1f} s')
+
+    def run(self):
+        objects = ExampleModel.objects
+
+        def python_emoji():
+            return sum(classify.is_emoji(icon) for icon in objects.values_list('icon', flat=True).iterator())
+
+        def python_types():
+            return Counter(classify.classify(icon) for icon in objects.values_list('icon', flat=True).iterator())
+
+        def expression_types():
+            # ``name`` has no companion column, so the CASE expression runs
+            return dict(objects.annotate(kind=IconType(F('name'))).values_list('kind').annotate(Count('pk')))
+
+        for label, run in (
+            ('emoji count, python', python_emoji),
+            ('emoji count, sql', objects.filter(icon__is_emoji=True).count),
+            ('type counts, python', python_types),
+            ('type counts, sql expression', expression_types),
+            ('type counts, sql columns', lambda: list(objects.type_counts())),
+        ):
+            start = time.perf_counter()
+            run()
+            self.stdout.write(f'{label:>28}: {(time.perf_counter() - start) * 1e3:.0f} ms')
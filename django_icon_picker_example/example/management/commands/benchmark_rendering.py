@@ -0,0 +1,45 @@
+"""
+Management command to compare rendering an icon column row by row and in one batch.
+"""
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from django_icon_picker import rendering
+
+from .benchmark_classify import SAMPLES
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering a changelist column of icon values, each row formatted from '
+        'scratch against render_icons(), in milliseconds per column.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per column (default: 10000)')
+        parser.add_argument('--distinct', type=int, default=200, help='Distinct values among them (default: 200)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs; the best is reported (default: 5)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        distinct = [
+            sample.replace('home', f'home-{index}') if 'home' in sample else sample
+            for index, sample in enumerate(rng.choice(SAMPLES) for _ in range(options['distinct']))
+        ]
+        values = [rng.choice(distinct) for _ in range(options['rows'])]
+
+        def per_row():
+            # Every row formatted again (classify stays memoized in both runs)
+            for value in values:
+                rendering._render_icon_html.__wrapped__(value, '', '', '', None, None)
+
+        def batched():
+            rendering.render_icons(values)
+
+        rendering._render_icon_html.cache_clear()
+        batched()  # warm the fragment cache, as on every page after the first
+        for label, run in (('per row', per_row), ('batched', batched)):
+            best = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+            self.stdout.write(f'{label:>7}: {best * 1e3:.1f} ms/column')
@@ -0,0 +1,51 @@
+"""
+Management command to measure validating an import-sized column of icon values.
+"""
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from django_icon_picker import utils
+
+from .benchmark_classify import SAMPLES
+
+
+class Command(BaseCommand):
+    help = (
+        'Time validate_icon_format() over a CSV-import-sized column of icon values, '
+        'with the grammar only and with catalog checks, each from an empty and a warm memo, '
+        'in milliseconds per column.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Values per column (default: 100000)')
+        parser.add_argument('--distinct', type=int, default=5000, help='Distinct values among them (default: 5000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs; the best is reported (default: 3)')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        distinct = [
+            sample.replace('home', f'home-{index}') if 'home' in sample else sample
+            for index, sample in enumerate(rng.choice(SAMPLES) for _ in range(options['distinct']))
+        ]
+        values = [rng.choice(distinct) for _ in range(options['rows'])]
+
+        def column(check_catalog, warm):
+            def run():
+                if not warm:
+                    # Every distinct value parsed once, as in a first import
+                    utils.parse_icon.cache_clear()
+                for value in values:
+                    utils.validate_icon_format(value, check_catalog=check_catalog)
+            return run
+
+        for label, run in (
+            ('grammar, cold memo', column(False, False)),
+            ('grammar, warm memo', column(False, True)),
+            ('catalog, cold memo', column(True, False)),
+            ('catalog, warm memo', column(True, True)),
+        ):
+            run()  # load the grammar, the catalogs and, for warm runs, the memo
+            best = min(timeit.repeat(run, number=1, repeat=options['repeat']))
+            self.stdout.write(f'{label:>18}: {best * 1e3:.1f} ms/column ({best * 1e6 / len(values):.2f} us/value)')
@@ -0,0 +1,61 @@
+"""
+Management command to measure rendering an inline-formset-sized page of icon picker fields.
+"""
+import contextvars
+import timeit
+
+from django import forms
+from django.core.signals import request_started
+from django.core.management.base import BaseCommand
+
+from django_icon_picker.widgets import IconPickerWidget
+
+
+class PerFieldIconPickerWidget(IconPickerWidget):
+    """The widget as it was: chrome built for every field."""
+
+    def _get_chrome(self):
+        return self._build_chrome()
+
+
+def formset_class(widget_class, rows):
+    form = type('IconForm', (forms.Form,), {
+        'name': forms.CharField(),
+        'icon': forms.CharField(required=False, widget=widget_class()),
+    })
+    return forms.formset_factory(form, extra=rows)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering a formset of icon picker fields with the chrome built '
+        'per field and with the shared chrome, in milliseconds per page.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Formset rows (default: 100)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs; the best is reported (default: 5)')
+
+    def handle(self, *args, **options):
+        for label, widget_class, page in (
+            ('per field', PerFieldIconPickerWidget, False),
+            ('shared', IconPickerWidget, True),
+        ):
+            formset = formset_class(widget_class, options['rows'])(initial=[
+                {'name': f'row {row}', 'icon': 'mdi:home' if row % 2 else ''}
+                for row in range(options['rows'])
+            ])
+
+            def render_page(page=page):
+                def render():
+                    # Within a request the modal is emitted once per page;
+                    # outside one every field emits it, as it used to
+                    if page:
+                        request_started.send(sender=self.__class__)
+                    return str(formset)
+                # A fresh context per run, so every run is a new page
+                return contextvars.Context().run(render)
+
+            size = len(render_page().encode())
+            best = min(timeit.repeat(render_page, number=1, repeat=options['repeat']))
+            self.stdout.write(f'{label:>9}: {best * 1e3:.1f} ms/page, {size / 1024:.0f} KB')
@@ -4,8 +4,8 @@ Management command to load test fixtures and verify icon picker data.
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 from django.db import transaction
+from django_icon_picker.classify import is_emoji
 from example.models import ExampleModel
-import re
 
 
 class Command(BaseCommand):
@@ -70,6 +70,8 @@ class Command(BaseCommand):
         
         try:
             call_command('loaddata', fixture_file, verbosity=0)
+            # Fixtures are saved raw, which skips IconField's icon_type/prefix
+            call_command('backfill_icon_metadata', 'example.ExampleModel', verbosity=0)
             self.stdout.write(
                 self.style.SUCCESS('   ✅ Fixtures loaded successfully')
             )
@@ -81,44 +83,20 @@ class Command(BaseCommand):
 
     def is_emoji(self, text):
         """Check if a string contains emoji characters."""
-        # Basic emoji detection pattern
-        emoji_pattern = re.compile(
-            "["
-            "\U0001F600-\U0001F64F"  # emoticons
-            "\U0001F300-\U0001F5FF"  # symbols & pictographs
-            "\U0001F680-\U0001F6FF"  # transport & map
-            "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-            "\U00002702-\U000027B0"  # misc symbols
-            "\U000024C2-\U0001F251"  # enclosed characters
-            "]+", flags=re.UNICODE
-        )
-        return bool(emoji_pattern.search(text))
+        return is_emoji(text)
 
     def categorize_icons(self):
-        """Categorize icons into emojis vs icon sets."""
-        all_objects = ExampleModel.objects.all()
-        
+        """Querysets of the emojis and of each icon set, using the indexed columns."""
         categories = {
-            'emojis': [],
-            'material-symbols': [],
-            'fa-brands': [],
-            'heroicons': [],
-            'mdi': [],
-            'other': []
+            'emojis': ExampleModel.objects.filter(icon_type='emoji'),
+            'material-symbols': ExampleModel.objects.filter(icon_prefix='material-symbols'),
+            'fa-brands': ExampleModel.objects.filter(icon_prefix='fa-brands'),
+            'heroicons': ExampleModel.objects.filter(icon_prefix='heroicons'),
+            'mdi': ExampleModel.objects.filter(icon_prefix='mdi'),
         }
-        
-        for obj in all_objects:
-            if self.is_emoji(obj.icon):
-                categories['emojis'].append(obj)
-            elif ':' in obj.icon:
-                icon_set = obj.icon.split(':')[0]
-                if icon_set in categories:
-                    categories[icon_set].append(obj)
-                else:
-                    categories['other'].append(obj)
-            else:
-                categories['other'].append(obj)
-                
+        categories['other'] = ExampleModel.objects.exclude(icon_type='emoji').exclude(
+            icon_prefix__in=['material-symbols', 'fa-brands', 'heroicons', 'mdi']
+        )
         return categories
 
     def verify_data(self):
@@ -138,23 +116,24 @@ class Command(BaseCommand):
         
         self.stdout.write(f'   📊 Total records: {total_count}')
         
-        # Report on each category
-        for category, objects in categories.items():
-            if objects:
+        # Report on each category; counted in SQL, as tables can be large
+        counts = {category: queryset.count() for category, queryset in categories.items()}
+        for category, count in counts.items():
+            if count:
                 if category == 'emojis':
-                    self.stdout.write(f'   😀 {category}: {len(objects)} emojis')
+                    self.stdout.write(f'   😀 {category}: {count} emojis')
                     # Show first few emojis as examples
-                    sample_emojis = [obj.icon for obj in objects[:5]]
+                    sample_emojis = categories['emojis'].values_list('icon', flat=True)[:5]
                     self.stdout.write(f'      Examples: {" ".join(sample_emojis)}')
                 else:
-                    self.stdout.write(f'   📁 {category}: {len(objects)} icons')
+                    self.stdout.write(f'   📁 {category}: {count} icons')
         
         # Check for any empty icons or names
         empty_icons = ExampleModel.objects.filter(icon='').count()
         empty_names = ExampleModel.objects.filter(name='').count()
         
         # Check for emoji vs icon mix
-        emoji_count = len(categories['emojis'])
+        emoji_count = counts['emojis']
         icon_count = total_count - emoji_count
         
         if emoji_count > 0 and icon_count > 0:
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:15
+
+import django_icon_picker.field
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('example', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examplemodel',
+            name='icon_prefix',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='examplemodel',
+            name='icon_type',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='examplemodel',
+            name='icon',
+            field=django_icon_picker.field.IconField(max_length=255, prefix_field='icon_prefix', type_field='icon_type'),
+        ),
+    ]
@@ -1,21 +1,21 @@
 from django.db import models
 from django_icon_picker.field import IconField
-from django.utils.html import format_html
+from django_icon_picker.managers import IconQuerySet
 
 
 class ExampleModel(models.Model):
-    icon = IconField(max_length=255)
+    icon = IconField(max_length=255, type_field="icon_type", prefix_field="icon_prefix")
     name = models.CharField(max_length=255)
+    # Maintained by IconField so icons can be filtered by kind and set in SQL
+    icon_type = models.CharField(max_length=16, blank=True, default="", editable=False, db_index=True)
+    icon_prefix = models.CharField(max_length=64, blank=True, default="", editable=False, db_index=True)
+
+    objects = IconQuerySet.as_manager()
 
     def svg_icon(self):
-        print(self.icon)
-        return format_html(
-            '<img src="{}" height="30" width="30"/>'.format(
-                f"/{self.icon}"
-                if self.icon.endswith(".svg")
-                else f"https://api.iconify.design/{self.icon}.svg"
-            )
-        )
+        # Imported here so loading the models does not load the renderer
+        from django_icon_picker.rendering import render_icon_html
+        return render_icon_html(self.icon, style="width: 30px; height: 30px;")
 
     def __str__(self):
         return self.icon
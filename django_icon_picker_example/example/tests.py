@@ -1,3 +1,1835 @@
-from django.test import TestCase
+import contextvars
+import csv
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from html import unescape
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.core.signals import request_started
+from django.db import models, transaction
+from django.db.models import F, QuerySet
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import isolate_apps
+from django.urls import clear_script_prefix, set_script_prefix
+
+import requests
+
+import django_icon_picker
+from django_icon_picker import classify, downloads, optimize, recolor, storage, utils
+from django_icon_picker.client import IconifyClient, UpstreamUnavailable
+from django_icon_picker.catalog import get_catalog
+from django_icon_picker.emoji_index import get_emoji_index
+from django_icon_picker.field import IconField
+from django_icon_picker.lookups import IconPrefix, IconPrefixExact, IconType, InIconSet
+from django_icon_picker.icon_store import get_icon_store
+from django_icon_picker.registry import IconSetRegistry, get_registry
+from django_icon_picker.rendering import render_icon_html
+from django_icon_picker.search import IconSearchIndex, _intersect, get_search_index
+from django_icon_picker import rendering, search_proxy, sprites
+from django_icon_picker.sprites import Sprite
+from django_icon_picker.svg_files import icon_file_path
+from django_icon_picker.settings import BROWSER_SETTINGS, DEFAULT_ICON_SETS
+from django_icon_picker.widgets import (
+    ICON_PLACEHOLDER, EmojiPickerWidget, IconPicker, IconPickerWidget, LazyIconPicker,
+)
+
+from .models import ExampleModel
+
+MDI = {
+    "prefix": "mdi",
+    "info": {"name": "Material Design Icons"},
+    "width": 24,
+    "height": 24,
+    "icons": {
+        "home": {"body": '<path fill="currentColor" d="M10 20v-6h4v6h5v-8h3L12 3L2 12h3v8z"/>'},
+        "home-outline": {"body": '<path fill="currentColor" d="M12 5.69l5 4.5V18h-2v-6H9v6H7v-7.81z"/>'},
+        "account": {"body": '<path fill="currentColor" d="M12 4a4 4 0 0 1 4 4a4 4 0 0 1-4 4a4 4 0 0 1-4-4a4 4 0 0 1 4-4"/>'},
+    },
+    "aliases": {"house": {"parent": "home"}},
+}
+
+
+IN_MEMORY_STORAGE = {"BACKEND": "django.core.files.storage.InMemoryStorage"}
+
+
+def temporary_directory(test):
+    """A directory removed again when ``test`` finishes."""
+    path = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def write_collection(directory, data=MDI):
+    path = os.path.join(directory, f"{data['prefix']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    return path
+
+
+SVG_CORPUS = os.path.join(os.path.dirname(__file__), "fixtures", "svg")
+
+NODE = shutil.which("node")
+SCRIPTS_DIR = os.path.join(os.path.dirname(django_icon_picker.__file__), "static", "django_icon_picker", "js")
+
+
+def run_scripts(program, *scripts):
+    """
+    Run ``program`` in Node.js after the picker's ``scripts``, with
+    ``window`` being the global object, and return what it prints as JSON.
+    """
+    sources = ["globalThis.window = globalThis;"]
+    for script in scripts:
+        with open(os.path.join(SCRIPTS_DIR, script), encoding="utf-8") as f:
+            sources.append(f.read())
+    sources.append(f"(async () => {{ {program} }})().catch((error) => {{ console.error(error); process.exit(1); }});")
+    result = subprocess.run([NODE, "-"], input="\n".join(sources), capture_output=True, text=True, timeout=60)
+    if result.returncode:
+        raise AssertionError(result.stderr)
+    return json.loads(result.stdout)
+
+
+class ClassifyTests(SimpleTestCase):
+    def test_emoji_the_old_ranges_missed(self):
+        for value in [
+            "\U0001F3E0",  # house
+            "\u2B50",  # star
+            "\u231A",  # watch
+            "\U0001F7E0",  # orange circle
+            "\u00A9\uFE0F",  # copyright with emoji presentation
+            "1\uFE0F\u20E3",  # keycap
+            "\U0001F44D\U0001F3FD",  # thumbs up, medium skin tone
+            "\U0001F468\u200D\U0001F469\u200D\U0001F467",  # family ZWJ sequence
+            "\U0001F1EB\U0001F1F7",  # flag of France
+            "\U0001F3F4\U000E0067\U000E0062\U000E0073\U000E0063\U000E0074\U000E007F",  # Scotland
+        ]:
+            with self.subTest(value):
+                self.assertEqual(classify.classify(value), classify.EMOJI)
+                self.assertTrue(classify.is_emoji_sequence(value))
+
+    def test_text_symbols_need_the_presentation_selector(self):
+        self.assertFalse(classify.is_emoji("\u00A9 2024"))
+        self.assertFalse(classify.is_emoji("#1"))
+        self.assertTrue(classify.is_emoji("Home \U0001F3E0"))
+        self.assertFalse(classify.is_emoji_sequence("Home \U0001F3E0"))
+
+    def test_kinds(self):
+        for value, kind in [
+            ("", classify.NONE),
+            (None, classify.NONE),
+            (42, classify.UNKNOWN),
+            ("mdi:home", classify.ICON_NAME),
+            ("fas fa-home", classify.ICON_NAME),
+            ("media/icons/home.svg", classify.SVG_FILE),
+            ("home.svg", classify.UNKNOWN),
+            ("home", classify.UNKNOWN),
+        ]:
+            with self.subTest(value):
+                self.assertEqual(classify.classify(value), kind)
+        self.assertEqual(classify.icon_prefix("mdi:home"), "mdi")
+        self.assertEqual(classify.icon_prefix("fas fa-home"), "fas")
+        self.assertEqual(classify.icon_prefix("\U0001F3E0"), "")
+
+    def test_fields_share_the_memoized_classifier(self):
+        classify._classify.cache_clear()
+        field = ExampleModel._meta.get_field("icon")
+        for _ in range(3):
+            self.assertEqual(field.get_icon_type("mdi:home"), classify.ICON_NAME)
+        self.assertTrue(field.is_icon_name("mdi:home"))
+        self.assertTrue(field.is_emoji("\U0001F3E0"))
+        info = classify._classify.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 2))
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_classify", "--values", "200", "--repeat", "1", stdout=output)
+        self.assertIn("us/value", output.getvalue())
+
+
+class IconStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.collections = temporary_directory(self)
+        override = override_settings(ICON_PICKER_COLLECTIONS_PATH=self.collections)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def import_mdi(self, *args):
+        source = temporary_directory(self)
+        call_command("import_icon_collections", write_collection(source), *args, stdout=StringIO())
+
+    def test_missing_index_is_not_cached(self):
+        store = get_icon_store()
+        self.assertEqual(store.prefixes(), [])
+        self.assertEqual(get_search_index().search("home"), ([], False))
+
+        self.import_mdi()
+
+        self.assertEqual(store.prefixes(), ["mdi"])
+        self.assertTrue(store.has_icon("mdi:house"))
+        icons, _ = get_search_index().search("home")
+        self.assertEqual(sorted(icons), ["mdi:home", "mdi:home-outline"])
+
+    def test_import_through_another_store_resets_the_configured_one(self):
+        store = get_icon_store()
+        self.assertFalse(store.has_icon("mdi:home"))
+
+        self.import_mdi("--path", self.collections)
+
+        self.assertTrue(store.has_icon("mdi:home"))
+        self.assertIn("viewBox=\"0 0 24 24\"", store.render_svg("mdi:home", color="red"))
+
+    def test_previews_use_the_local_renderer(self):
+        self.import_mdi()
+        render_url = IconPicker().get_context("icon", None, {"id": "id_icon"})["render_url"]
+        self.assertEqual(render_url, f"/icon_picker/render/{ICON_PLACEHOLDER}.svg")
+        lazy = LazyIconPicker().get_context("icon", None, {"id": "id_icon"})
+        self.assertEqual(json.loads(lazy["widget"]["attrs"]["data-icon-picker"])["renderUrl"], render_url)
+
+        # What the picker JS requests for a result
+        response = self.client.get(render_url.replace(ICON_PLACEHOLDER, "mdi%3Ahome"), {"color": "#ff0000"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn(b"#ff0000", response.content)
+
+        with override_settings(ICON_PICKER_COLLECTIONS_PATH=None):
+            self.assertEqual(IconPicker().get_context("icon", None, {"id": "id_icon"})["render_url"], "")
+
+    def test_collections_path_change_resets_the_store(self):
+        self.import_mdi()
+        with override_settings(ICON_PICKER_COLLECTIONS_PATH=temporary_directory(self)):
+            self.assertFalse(get_icon_store().has_icon("mdi:home"))
+        self.assertTrue(get_icon_store().has_icon("mdi:home"))
+
+
+class IconSearchIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(2)
+        words = ["arrow", "left", "right", "home", "outline", "circle", "bold", "box"]
+        words += ["".join(rng.choice("bcdfgklmnprst") for _ in range(5)) for _ in range(200)]
+        cls.icons = sorted({
+            f"set{rng.randrange(5)}:" + "-".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+            for _ in range(5000)
+        })
+        cls.index = IconSearchIndex(cls.icons)
+
+    def expected(self, query, prefixes=None):
+        keywords = query.split()
+        exact = "-".join(keywords)
+        matching = [
+            icon for icon in self.icons
+            if (not prefixes or icon.split(":")[0] in prefixes)
+            and all(any(keyword in token for token in icon.split(":")[1].split("-")) for keyword in keywords)
+        ]
+        return [icon for icon in matching if icon.endswith(f":{exact}")] + [
+            icon for icon in matching if not icon.endswith(f":{exact}")
+        ]
+
+    def test_intersect_matches_set_intersection(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            postings = [
+                sorted(rng.sample(range(20000), rng.choice((5, 300, 4000, 15000)))) for _ in range(rng.randint(2, 4))
+            ]
+            lo, hi = sorted(rng.sample(range(20000), 2))
+            expected = sorted(set.intersection(*map(set, postings)) & set(range(lo, hi)))
+            self.assertEqual(list(_intersect(postings, lo, hi)), expected)
+
+    def test_multi_keyword_pages_match_a_full_scan(self):
+        for query, prefixes in [("arrow left", None), ("home outline bold", None), ("circle box", ["set1", "set3"])]:
+            expected = self.expected(query, prefixes)
+            found, start, more = [], 0, True
+            while more:
+                page, more = self.index.search(query, prefixes=prefixes, limit=7, start=start)
+                found += page
+                start += 7
+            self.assertEqual(found, expected, query)
+
+
+class IconSetRegistryTests(SimpleTestCase):
+    SETS = (
+        ("solid", "fas", "Solid", "5.15.4"),
+        ("other", "fas", "Other solid"),
+        ("brands", "fab", "Brands"),
+    )
+
+    def test_sets_are_indexed_by_id_and_prefix(self):
+        registry = IconSetRegistry(self.SETS)
+        self.assertEqual([icon_set.id for icon_set in registry], ["solid", "other", "brands"])
+        self.assertEqual(len(registry), 3)
+        self.assertIn("brands", registry)
+        self.assertNotIn("fab", registry)
+        self.assertEqual(registry.get("other").name, "Other solid")
+        self.assertEqual(registry.get("other").version, "latest")
+        self.assertIsNone(registry.get("nope"))
+        # The first set listed for a prefix owns it
+        self.assertEqual(registry.for_prefix("fas").id, "solid")
+        self.assertEqual(registry.for_prefix("fab").id, "brands")
+        self.assertIsNone(registry.for_prefix("mdi"))
+        self.assertEqual(set(registry.prefixes()), {"fas", "fab"})
+        self.assertEqual(registry.default().id, "solid")
+        self.assertIsNone(IconSetRegistry(()).default())
+        self.assertEqual(
+            registry.as_dicts()[0], {"id": "solid", "prefix": "fas", "name": "Solid", "version": "5.15.4"}
+        )
+
+    def test_catalogs_load_on_first_use(self):
+        with mock.patch("django_icon_picker.catalog.load_catalog", return_value="catalog") as load_catalog:
+            registry = IconSetRegistry(self.SETS)
+            registry.for_prefix("fas")
+            load_catalog.assert_not_called()
+            icon_set = registry.get("brands")
+            self.assertEqual(icon_set.catalog, "catalog")
+            self.assertEqual(icon_set.catalog, "catalog")
+            load_catalog.assert_called_once_with(icon_set)
+
+    def test_registry_is_shared_and_follows_the_settings(self):
+        registry = get_registry()
+        self.assertIs(get_registry(), registry)
+        self.assertEqual([icon_set.id for icon_set in registry], [entry[0] for entry in DEFAULT_ICON_SETS])
+        with override_settings(DJANGO_ICON_SETS=self.SETS):
+            self.assertEqual(get_registry().for_prefix("fab").id, "brands")
+            self.assertNotIn("fontawesome5solid", get_registry())
+        self.assertIsNot(get_registry(), registry)
+        self.assertIn("fontawesome5solid", get_registry())
+        registry = get_registry()
+        with override_settings(ICON_PICKER_CATALOG_PATH=temporary_directory(self)):
+            self.assertIsNot(get_registry(), registry)
+
+
+class CatalogTests(SimpleTestCase):
+    def api(self, **params):
+        response = self.client.get("/icon_picker/api/", params)
+        return response.status_code, json.loads(response.content) if response.status_code == 200 else None
+
+    def test_every_default_set_ships_a_catalog(self):
+        for icon_set in get_registry():
+            with self.subTest(icon_set.id):
+                self.assertGreater(len(icon_set.catalog), 100)
+                self.assertTrue(icon_set.catalog.categories)
+
+    def test_catalog_loading(self):
+        catalog = get_catalog("fontawesome5solid")
+        self.assertIn("home", catalog)
+        self.assertNotIn("github", catalog)
+        self.assertIn("github", get_catalog("fontawesome5brands"))
+        position = catalog.names.index("address-book")
+        self.assertEqual(catalog.value(position), "fas fa-address-book")
+        self.assertEqual(catalog.label(position), "Address Book")
+        self.assertIn(position, catalog.categories["Business"])
+        self.assertIsNone(get_catalog("materialdesign"))
+
+    def test_category_filter(self):
+        status, everything = self.api(set="fontawesome5solid", per_page=500)
+        status, animals = self.api(set="fontawesome5solid", category="Animals", per_page=500)
+        self.assertEqual(status, 200)
+        self.assertLess(animals["total"], everything["total"])
+        values = [value for value, label in animals["icons"]]
+        self.assertIn("fas fa-cat", values)
+        self.assertNotIn("fas fa-home", values)
+        status, cats = self.api(set="fontawesome5solid", category="Animals", q="cat")
+        self.assertEqual([value for value, label in cats["icons"]], ["fas fa-cat"])
+        self.assertEqual(self.api(set="fontawesome5solid", category="Nope")[0], 400)
+        sets = {entry["id"]: entry for entry in self.api()[1]["sets"]}
+        self.assertIn("Animals", sets["fontawesome5solid"]["categories"])
+
+    def test_catalog_path_overrides_the_packaged_files(self):
+        directory = temporary_directory(self)
+        with open(os.path.join(directory, "fontawesome5solid.json"), "w") as f:
+            json.dump({"icons": ["a", "b"], "categories": {"Letters": [1]}}, f)
+        with override_settings(ICON_PICKER_CATALOG_PATH=directory):
+            catalog = get_catalog("fontawesome5solid")
+            self.assertEqual(catalog.names, ("a", "b"))
+            self.assertEqual(catalog.page(category="Letters"), (1, [("b", "B")]))
+
+    def test_former_default_fonts_stay_valid(self):
+        self.assertTrue(utils.validate_icon_format("zmdi zmdi-home"))
+        self.assertEqual(classify.classify("wi wi-day-sunny"), classify.ICON_NAME)
+
+    def test_build_icon_catalog(self):
+        metadata, output = temporary_directory(self), temporary_directory(self)
+        with open(os.path.join(metadata, "icons.yml"), "w") as f:
+            f.write(
+                "cat:\n  label: Cat\n  styles: [solid]\n"
+                "github:\n  label: GitHub\n  styles: [brands]\n"
+                "smile:\n  label: Smiling Face\n  styles: [solid, regular]\n"
+            )
+        with open(os.path.join(metadata, "categories.yml"), "w") as f:
+            f.write("animals:\n  icons: [cat]\n  label: Animals\nemoji:\n  icons: [smile, cat]\n  label: Emoji\n")
+        call_command("build_icon_catalog", "--metadata", metadata, "--output-dir", output, stdout=StringIO())
+        with open(os.path.join(output, "fontawesome5solid.json")) as f:
+            solid = json.load(f)
+        self.assertEqual(solid["icons"], ["cat", "smile"])
+        self.assertEqual(solid["labels"], {"1": "Smiling Face"})
+        self.assertEqual(solid["categories"], {"Animals": [0], "Emoji": [0, 1]})
+        with open(os.path.join(output, "fontawesome5brands.json")) as f:
+            brands = json.load(f)
+        self.assertEqual((brands["icons"], brands["labels"], brands["categories"]), (["github"], {"0": "GitHub"}, {}))
+
+
+class EmojiIndexTests(SimpleTestCase):
+    def test_index_file(self):
+        from django_icon_picker.management.commands.build_emoji_index import tokenize
+
+        index = json.loads(get_emoji_index()[0])
+        self.assertGreater(len(index["emoji"]), 1000)
+        for token, positions in index["tokens"].items():
+            self.assertEqual(tokenize(token), [token])
+            self.assertEqual(positions, sorted(set(positions)))
+            self.assertLess(positions[-1], len(index["emoji"]))
+
+    def test_view_caching(self):
+        content, version = get_emoji_index()
+        response = self.client.get(f"/icon_picker/emoji/{version}.json")
+        self.assertEqual((response.status_code, response.content), (200, content))
+        self.assertIn("immutable", response["Cache-Control"])
+        stale = self.client.get("/icon_picker/emoji/0000000000000000.json")
+        self.assertEqual((stale.content, stale["Cache-Control"]), (content, "no-cache"))
+        revalidated = self.client.get("/icon_picker/emoji/latest.json", HTTP_IF_NONE_MATCH=stale["ETag"])
+        self.assertEqual(revalidated.status_code, 304)
+
+    @skipUnless(NODE, "Node.js runs the picker's scripts")
+    def test_search_script(self):
+        results = run_scripts(
+            f"""
+            const data = {get_emoji_index()[0].decode()};
+            let fetches = 0;
+            window.fetch = async () => {{ fetches++; return {{ ok: true, json: async () => data }}; }};
+            const search = window.IconPickerEmoji.search;
+            const index = await window.IconPickerEmoji.load("/emoji.json");
+            await window.IconPickerEmoji.load("/emoji.json");
+            // Keystrokes reuse the sets built with the index
+            const BuiltSet = Set;
+            window.Set = function () {{ throw new Error("Set built while searching"); }};
+            const names = (query) => search(index, query, 50).map((item) => item.name);
+            console.log(JSON.stringify({{
+                fetches: fetches,
+                smiling: names("Smiling  Face"),
+                prefix: names("smil fa"),
+                exact: names("\u2764\ufe0f"),
+                bare: names("\u2764"),
+                missing: names("smiling zzzz"),
+                stopwords: names("the of"),
+                limited: search(index, "face", 3).length,
+                first: search(index, "", 2).length,
+            }}));
+            window.Set = BuiltSet;
+            """,
+            "emoji_index.js",
+        )
+        self.assertEqual(results["fetches"], 1)
+        self.assertIn("slightly smiling face", results["smiling"])
+        self.assertIn("slightly smiling face", results["prefix"])
+        self.assertEqual(results["exact"], ["red heart"])
+        self.assertEqual(results["bare"], ["red heart"])
+        self.assertEqual((results["missing"], results["stopwords"]), ([], []))
+        self.assertEqual((results["limited"], results["first"]), (3, 2))
+
+
+class RenderIconHtmlTests(SimpleTestCase):
+    def test_imported_collections_replace_remote_images(self):
+        collections = temporary_directory(self)
+        with override_settings(ICON_PICKER_COLLECTIONS_PATH=collections):
+            self.assertIn("api.iconify.design/mdi:home.svg", render_icon_html("mdi:home"))
+            call_command("import_icon_collections", write_collection(temporary_directory(self)), stdout=StringIO())
+            html = render_icon_html("mdi:home")
+        self.assertTrue(html.startswith("<svg"), html)
+
+    def test_settings_changes_are_not_served_from_the_cache(self):
+        value = "icons/ab/" + "a" * 32 + ".svg"
+        with override_settings(ICON_PICKER_PATH="icons-one"):
+            first = render_icon_html(f"icons-one/{value}")
+        with override_settings(ICON_PICKER_PATH="icons-two"):
+            # Outside ICON_PICKER_PATH now: served relative to the site root
+            self.assertNotEqual(render_icon_html(f"icons-one/{value}"), first)
+
+
+    def test_render_icons_formats_each_distinct_value_once(self):
+        values = ["mdi:home", "\U0001F600", "mdi:home", "", None, "fas fa-home", "\U0001F600"]
+        with mock.patch("django_icon_picker.rendering.render_icon_html", wraps=render_icon_html) as render:
+            html = rendering.render_icons(values, css_class="cell")
+        self.assertEqual(render.call_count, 5)
+        self.assertEqual(len(html), len(values))
+        self.assertEqual(html[0], html[2])
+        self.assertEqual(html[1], render_icon_html("\U0001F600", css_class="cell"))
+        self.assertEqual((html[3], html[4]), ("", ""))
+        self.assertIn('<i class="fas fa-home icon-display cell"', html[5])
+
+    def test_template_tags(self):
+        rows = [ExampleModel(name="a", icon="fas fa-home"), ExampleModel(name="b", icon="")]
+        output = Template(
+            "{% load icon_picker %}{% icon 'mdi:home' css_class='big' %}|"
+            "{% render_icons rows 'icon' as icon_rows %}"
+            "{% for row, html in icon_rows %}{{ row.name }}={{ html }};{% endfor %}"
+        ).render(Context({"rows": rows}))
+        single, column = output.split("|")
+        self.assertEqual(single, render_icon_html("mdi:home", css_class="big"))
+        self.assertEqual(column, f"a={render_icon_html('fas fa-home')};b=;")
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_rendering", "--rows", "100", "--repeat", "1", stdout=output)
+        self.assertIn("per row:", output.getvalue())
+        self.assertIn("batched:", output.getvalue())
+
+
+@override_settings(ICON_PICKER_PATH="media", ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+class SpriteTests(SimpleTestCase):
+    HOSTILE = (
+        b'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        b'viewBox="0 0 24 24" onload="alert(1)">'
+        b'<script>alert(2)</script>'
+        b'<path d="M0 0h24v24z" fill="url(#g)" onclick="alert(3)" style="background:url(//evil)"/>'
+        b'<foreignObject><div xmlns="http://www.w3.org/1999/xhtml">x</div></foreignObject>'
+        b'<use xlink:href="https://evil.example/x.svg#a"/><use href="#g"/>'
+        b'<a href="javascript:alert(4)"><rect width="1" height="1"/></a>'
+        b'<animate attributeName="href" to="javascript:alert(5)"/>'
+        b'<rect fill="url(https://evil.example/t)" width="2" height="2"/>'
+        b"</svg>"
+    )
+
+    def test_saved_files_are_reduced_to_safe_markup(self):
+        path = storage.write("media/icons/ab/" + "b" * 32 + ".svg", self.HOSTILE)
+        sprite = Sprite.from_values([path])
+
+        self.assertIn(path, sprite)
+        _, viewbox, body = sprite.symbols[path]
+        self.assertEqual(viewbox, "0 0 24 24")
+        self.assertIn('<path d="M0 0h24v24z" fill="url(#g)">', body)
+        self.assertIn('<use href="#g">', body)
+        for marker in ("alert", "script", "onload", "onclick", "style", "foreignObject", "evil", "<a", "animate"):
+            self.assertNotIn(marker, sprite.svg.replace('style="display: none;"', ""))
+
+    def test_paths_outside_the_icon_storage_are_not_read(self):
+        value = "example/static/hostile.svg"
+        with mock.patch.object(storage, "read") as read:
+            sprite = Sprite.from_values([value])
+        read.assert_not_called()
+        self.assertNotIn(value, sprite)
+        self.assertIn("<img", str(sprite.use(value)))
+
+
+@override_settings(ICON_PICKER_PATH="media", ICON_PICKER_SPRITES=True)
+class ModelSpriteTests(TestCase):
+    def setUp(self):
+        storage_override = override_settings(ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+        self.files = [
+            storage.write(
+                f"media/icons/{c * 2}/{c * 32}.svg",
+                f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M{i} 0h1"/></svg>'.encode(),
+            )
+            for i, c in enumerate("678")
+        ]
+
+    def manifest(self):
+        return json.loads(storage.read("media/sprites/example.examplemodel.json"))
+
+    def test_sprite_follows_the_icons_in_use(self):
+        first, second, third = self.files
+        with self.captureOnCommitCallbacks(execute=True):
+            one = ExampleModel.objects.create(name="one", icon=first)
+            two = ExampleModel.objects.create(name="two", icon=second)
+        self.assertEqual(self.manifest()["values"], [first, second])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            two.icon = third
+            two.save()
+        self.assertEqual(self.manifest()["values"], [first, third])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            one.delete()
+        self.assertEqual(self.manifest()["values"], [third])
+        sprite_files = storage.get_icon_storage().listdir("sprites")[1]
+        self.assertEqual(sorted(sprite_files), sorted(["example.examplemodel.json", self.manifest()["file"]]))
+
+    def test_saves_that_keep_the_icons_do_not_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            row = ExampleModel.objects.create(name="row", icon=self.files[0])
+        with self.captureOnCommitCallbacks() as callbacks:
+            row.name = "renamed"
+            row.save()
+        self.assertEqual(callbacks, [])
+
+    @override_settings(ICON_PICKER_SETTINGS={"svg_optimize": 2, "svg_precision": 2})
+    def test_file_is_named_after_its_stored_content(self):
+        path = storage.write(
+            "media/icons/99/" + "9" * 32 + ".svg",
+            b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M0.123456 0h1"/></svg>',
+            raw=True,
+        )
+        sprite = sprites.write_sprite(ExampleModel, [path])
+        name = self.manifest()["file"]
+        content = storage.read(f"media/sprites/{name}")
+        self.assertEqual(name, f"example.examplemodel-{hashlib.sha256(content).hexdigest()[:16]}.svg")
+        self.assertLess(len(content), len(sprite.svg.encode()))
+
+    def test_rebuild_reads_the_rows_again_after_writing(self):
+        first, second, _ = self.files
+        # Another process saved `second` while this rebuild was writing
+        with mock.patch.object(sprites, "_stored_values", side_effect=[{first}, {first, second}, {first, second}]):
+            sprites.rebuild_model_sprite(ExampleModel)
+        self.assertEqual(self.manifest()["values"], [first, second])
+
+
+@override_settings(ICON_PICKER_PATH="media", ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+class DownloadViewTests(TestCase):
+    SVG = b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M0 0h24v24z"/></svg>'
+
+    def setUp(self):
+        self.fetched = []
+        queue = downloads.DownloadQueue(max_workers=1, retries=0, fetch=self.fetch)
+        patcher = mock.patch.object(downloads, "_queue", queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.queue = queue
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "admin"))
+
+    def fetch(self, icon, color, size):
+        self.fetched.append((icon, color, size))
+        if icon == "mdi:missing":
+            raise downloads.DownloadError("Status code: 404 Not Found", retry=False)
+        return self.SVG
+
+    def download(self, icon, **params):
+        return self.client.get("/icon_picker/download-svg/", {"icon": f"{icon}.svg", "model": "example", **params})
+
+    def status(self, path):
+        return self.client.get("/icon_picker/download-status/", {"path": path})
+
+    def wait(self, path):
+        self.assertTrue(self.queue.status(path).done.wait(5))
+
+    def test_queued_download_is_reported_done(self):
+        response = self.download("mdi:home", color="#ff0000")
+        self.assertEqual(response.status_code, 202)
+        path = response.content.decode()
+        self.assertTrue(path.startswith("media/icons/") and path.endswith(".svg"), path)
+
+        self.wait(path)
+        self.assertEqual(self.status(path).json()["status"], downloads.DONE)
+        self.assertEqual(storage.read(path), self.SVG)
+        self.assertEqual(self.fetched, [("mdi:home", "#ff0000", "")])
+        # The file exists now: answered without another fetch
+        self.assertEqual(self.download("mdi:home", color="#ff0000").status_code, 200)
+        self.assertEqual(len(self.fetched), 1)
+
+    def test_failed_download_is_reported_failed(self):
+        path = self.download("mdi:missing").content.decode()
+        self.wait(path)
+        job = self.status(path).json()
+        self.assertEqual(job["status"], downloads.FAILED)
+        self.assertIn("404", job["error"])
+        self.assertFalse(storage.exists(path))
+
+    def test_status_is_shared_with_other_processes(self):
+        path = self.download("mdi:missing").content.decode()
+        self.wait(path)
+        # Another server process: its queue never saw the job
+        with mock.patch.object(downloads, "_queue", downloads.DownloadQueue(max_workers=1)):
+            job = self.status(path).json()
+        self.assertEqual((job["path"], job["status"], job["icon"]), (path, downloads.FAILED, "mdi:missing"))
+
+    def test_existing_files_are_done(self):
+        path = storage.write("media/icons/ab/" + "d" * 32 + ".svg", self.SVG)
+        self.assertEqual(self.status(path).json()["status"], downloads.DONE)
+
+    def test_unknown_paths(self):
+        response = self.status("media/icons/ab/" + "c" * 32 + ".svg")
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()["status"], "unknown")
+        # Files outside ICON_PICKER_PATH are never reported
+        self.assertEqual(self.status("example/models.py").status_code, 404)
+
+    def test_errors_are_not_successful_responses(self):
+        self.assertEqual(self.download("mdi:home", color="url(x)").status_code, 400)
+        self.assertEqual(self.client.get("/icon_picker/download-svg/", {"model": "example"}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.download("mdi:home").status_code, 403)
+        self.assertEqual(self.fetched, [])
+
+
+@override_settings(ICON_PICKER_PATH="media")
+class ReleaseFileTests(TestCase):
+    def setUp(self):
+        # A fresh storage per test, for the orphaned files report
+        storage_override = override_settings(ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+
+    def save_file(self, character):
+        return storage.write(f"media/icons/{character * 2}/{character * 32}.svg", b"<svg/>")
+
+    def test_files_released_together_are_checked_together(self):
+        shared, single, other = self.save_file("a"), self.save_file("b"), self.save_file("c")
+        for name, icon in [("one", shared), ("two", shared), ("three", single), ("four", other)]:
+            ExampleModel.objects.create(name=name, icon=icon)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            ExampleModel.objects.filter(name__in=["one", "three", "four"]).delete()
+        # The first check covers every released file; the others find nothing left
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+
+        self.assertTrue(storage.exists(shared))
+        self.assertFalse(storage.exists(single))
+        self.assertFalse(storage.exists(other))
+
+    def test_rolled_back_deletes_keep_their_files(self):
+        kept, released = self.save_file("d"), self.save_file("e")
+        ExampleModel.objects.create(name="kept", icon=kept)
+        ExampleModel.objects.create(name="released", icon=released)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    ExampleModel.objects.filter(name="kept").delete()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            ExampleModel.objects.filter(name="released").delete()
+
+        self.assertTrue(storage.exists(kept))
+        self.assertFalse(storage.exists(released))
+
+    def test_replacing_an_icon_releases_the_old_file(self):
+        old, shared, new = self.save_file("f"), self.save_file("1"), self.save_file("2")
+        row = ExampleModel.objects.create(name="row", icon=old)
+        other = ExampleModel.objects.create(name="other", icon=shared)
+        ExampleModel.objects.create(name="sharing", icon=shared)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            row.icon = new
+            row.save()
+            # Saving again releases nothing more
+            row.save()
+        self.assertFalse(storage.exists(old))
+        self.assertTrue(storage.exists(new))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = ExampleModel.objects.get(pk=other.pk)
+            other.icon = "mdi:home"
+            other.save()
+        self.assertTrue(storage.exists(shared))
+
+    def test_saves_that_do_not_write_the_icon_keep_the_file(self):
+        kept = self.save_file("3")
+        row = ExampleModel.objects.create(name="row", icon=kept)
+        with self.captureOnCommitCallbacks(execute=True):
+            row.icon = "mdi:home"
+            row.save(update_fields=["name"])
+        self.assertTrue(storage.exists(kept))
+
+    def test_report_deletes_files_orphaned_by_bulk_updates(self):
+        orphaned, kept = self.save_file("4"), self.save_file("5")
+        ExampleModel.objects.create(name="row", icon=orphaned)
+        ExampleModel.objects.create(name="kept", icon=kept)
+        ExampleModel.objects.filter(name="row").update(icon="mdi:home")
+        self.assertTrue(storage.exists(orphaned))
+
+        output = StringIO()
+        call_command("icon_report", "--delete-orphaned", stdout=output)
+        self.assertIn("1 deleted file(s)", output.getvalue())
+        self.assertFalse(storage.exists(orphaned))
+        self.assertTrue(storage.exists(kept))
+
+
+@override_settings(ICON_PICKER_PATH="media")
+class IconReportTests(TestCase):
+    MISSING = "media/icons/ff/" + "f" * 32 + ".svg"
+
+    def setUp(self):
+        storage_override = override_settings(ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+        self.saved = storage.write("media/icons/aa/" + "a" * 32 + ".svg", b"<svg/>", raw=True)
+        self.orphaned = storage.write("media/icons/bb/" + "b" * 32 + ".svg", b"<svg/>", raw=True)
+        for icon in ["mdi:home"] * 3 + ["mdi:account", "fas fa-home", "\U0001F600", "", self.saved, self.MISSING]:
+            ExampleModel.objects.create(name="row", icon=icon)
+
+    def report(self, *args):
+        output = StringIO()
+        call_command("icon_report", *args, stdout=output)
+        return output.getvalue()
+
+    def test_json_histograms_and_files(self):
+        data = json.loads(self.report("--format", "json"))
+        field, = data["fields"]
+        self.assertEqual((field["model"], field["field"], field["rows"]), ("example.ExampleModel", "icon", 9))
+        self.assertEqual(
+            field["types"],
+            {classify.ICON_NAME: 5, classify.SVG_FILE: 2, classify.EMOJI: 1, classify.NONE: 1},
+        )
+        self.assertEqual(field["prefixes"], {"mdi": 4, "fas": 1})
+        self.assertEqual(field["icons"][0], ["mdi:home", 3])
+        self.assertEqual(field["distinct_icons"], 6)
+        self.assertEqual(field["missing_files"], [[self.MISSING, 1]])
+        self.assertEqual(data["orphaned_files"], [self.orphaned])
+        self.assertFalse(data["deleted_orphaned"])
+        self.assertTrue(storage.exists(self.orphaned))
+
+        field, = json.loads(self.report("--format", "json", "--top", "1"))["fields"]
+        self.assertEqual(field["icons"], [["mdi:home", 3]])
+        data = json.loads(self.report("--format", "json", "--skip-files"))
+        self.assertEqual(data["fields"][0]["missing_files"], [])
+        self.assertIsNone(data["orphaned_files"])
+
+    def test_csv_histograms(self):
+        rows = list(csv.reader(StringIO(self.report("--format", "csv"))))
+        self.assertEqual(rows[0], ["model", "field", "histogram", "key", "count"])
+        self.assertIn(["example.ExampleModel", "icon", "rows", "", "9"], rows)
+        self.assertIn(["example.ExampleModel", "icon", "types", classify.ICON_NAME, "5"], rows)
+        self.assertIn(["example.ExampleModel", "icon", "prefixes", "mdi", "4"], rows)
+        self.assertIn(["example.ExampleModel", "icon", "icons", "mdi:home", "3"], rows)
+        self.assertIn(["example.ExampleModel", "icon", "missing_files", self.MISSING, "1"], rows)
+        self.assertIn(["", "", "orphaned_files", self.orphaned, ""], rows)
+
+    def test_text_summary(self):
+        output = self.report("example.ExampleModel")
+        self.assertIn("example.ExampleModel.icon: 9 rows", output)
+        self.assertIn(f"missing file: {self.MISSING} (1 rows)", output)
+        self.assertIn(f"Orphaned file: {self.orphaned}", output)
+
+    def test_rows_are_streamed_in_chunks(self):
+        chunk_sizes = []
+        iterator = QuerySet.iterator
+
+        def recording_iterator(queryset, chunk_size=None):
+            chunk_sizes.append(chunk_size)
+            return iterator(queryset, chunk_size=chunk_size)
+
+        with mock.patch.object(QuerySet, "iterator", recording_iterator):
+            field, = json.loads(self.report("--format", "json", "--chunk-size", "2"))["fields"]
+        self.assertEqual(field["rows"], 9)
+        self.assertEqual(chunk_sizes[0], 2)
+
+    def test_invalid_arguments(self):
+        for args in (["--chunk-size", "0"], ["--top", "-1"], ["example.Nope"], ["auth.User"]):
+            with self.subTest(args=args), self.assertRaises(CommandError):
+                self.report(*args)
+        with self.assertRaises(CommandError):
+            self.report("--skip-files", "--delete-orphaned")
+
+
+class FakeSession:
+    """Answers requests with the queued outcomes: status codes or exceptions."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.urls = []
+
+    def get(self, url, params=None, timeout=None, stream=False):
+        self.urls.append(url)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response._content = b"<svg/>"
+        response._content_consumed = True
+        return response
+
+    def close(self):
+        pass
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def client_for(self, *outcomes):
+        self.now = 0
+        client = IconifyClient(
+            base_url="https://iconify.test", failure_threshold=2, reset_timeout=30, session=FakeSession(*outcomes)
+        )
+        client.breaker.clock = lambda: self.now
+        return client
+
+    def test_trips_after_consecutive_failures_and_recovers(self):
+        client = self.client_for(requests.ConnectionError(), 503, 200)
+        with self.assertRaises(requests.ConnectionError):
+            client.get_svg("mdi:home")
+        self.assertEqual(client.get_svg("mdi:home").status_code, 503)
+        self.assertTrue(client.breaker.is_open)
+
+        self.now = 29
+        with self.assertRaises(UpstreamUnavailable):
+            client.get_svg("mdi:home")
+        self.assertEqual(len(client.session.urls), 2)
+
+        self.now = 30
+        self.assertEqual(client.get_svg("mdi:home").status_code, 200)
+        self.assertFalse(client.breaker.is_open)
+        self.assertEqual(client.breaker.failures, 0)
+
+    def test_failed_trial_reopens_and_only_one_trial_runs(self):
+        client = self.client_for(503, 503, requests.Timeout())
+        client.get_svg("mdi:home")
+        client.get_svg("mdi:home")
+
+        self.now = 30
+        self.assertTrue(client.breaker.allow())
+        # The trial is in flight: everyone else still fails fast
+        self.assertFalse(client.breaker.allow())
+        client.breaker.record_failure()
+        self.assertEqual(client.breaker.opened_at, 30)
+        with self.assertRaises(UpstreamUnavailable):
+            client.get_svg("mdi:home")
+
+        self.now = 60
+        with self.assertRaises(requests.Timeout):
+            client.get_svg("mdi:home")
+        self.assertTrue(client.breaker.is_open)
+
+    def test_unexpected_error_ends_the_trial(self):
+        client = self.client_for(503, 503, ValueError("bad URL"), 200)
+        client.get_svg("mdi:home")
+        client.get_svg("mdi:home")
+
+        self.now = 30
+        with self.assertRaises(ValueError):
+            client.get_svg("mdi:home")
+        self.assertEqual(client.breaker.opened_at, 30)
+
+        self.now = 60
+        self.assertEqual(client.get_svg("mdi:home").status_code, 200)
+        self.assertFalse(client.breaker.is_open)
+
+    def test_client_errors_do_not_trip(self):
+        client = self.client_for(404, 404, 404)
+        for _ in range(3):
+            self.assertEqual(client.get_svg("mdi:missing").status_code, 404)
+        self.assertFalse(client.breaker.is_open)
+
+    def test_open_circuit_fails_downloads_without_retrying(self):
+        client = self.client_for(503, 503)
+        client.get_svg("mdi:home")
+        client.get_svg("mdi:home")
+        with mock.patch.object(downloads, "get_client", return_value=client), \
+                mock.patch.object(downloads.time, "sleep") as sleep:
+            with self.assertRaises(downloads.DownloadError) as raised:
+                downloads.fetch_with_retry("mdi:home", "#000000", retries=3)
+        self.assertFalse(raised.exception.retry)
+        sleep.assert_not_called()
+        self.assertEqual(len(client.session.urls), 2)
+
+
+class StorageTestsMixin:
+    """Storage behaviour every backend must share; subclasses pick the backend."""
+
+    NAME = "icons/ab/" + "e" * 32 + ".svg"
+    PATH = f"media/{NAME}"
+    OLD = b'<svg xmlns="http://www.w3.org/2000/svg"><path d="M0 0h1"/></svg>'
+    NEW = b'<svg xmlns="http://www.w3.org/2000/svg"><path d="M0 0h2"/></svg>'
+
+    def get_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        storage_override = override_settings(ICON_PICKER_PATH="media", ICON_PICKER_STORAGE=self.get_backend())
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+        self.backend = storage.get_icon_storage()
+
+    def test_write_read_delete(self):
+        self.assertEqual(storage.write(self.PATH, self.OLD, raw=True), self.PATH)
+        self.assertTrue(storage.exists(self.PATH))
+        self.assertEqual(storage.read(self.PATH), self.OLD)
+        storage.delete(self.PATH)
+        self.assertFalse(storage.exists(self.PATH))
+
+    def test_overwrite_keeps_the_name(self):
+        storage.write(self.PATH, self.OLD, raw=True)
+        self.assertEqual(storage.write(self.PATH, self.NEW, raw=True), self.PATH)
+        self.assertEqual(storage.read(self.PATH), self.NEW)
+        self.assertEqual(self.backend.listdir("icons/ab")[1], [os.path.basename(self.NAME)])
+
+    def test_identical_content_is_not_rewritten(self):
+        storage.write(self.PATH, self.OLD, raw=True)
+        with mock.patch.object(self.backend, "save") as save, \
+                mock.patch.object(self.backend, "delete") as delete, \
+                mock.patch.object(storage, "_atomic_write") as atomic_write:
+            self.assertEqual(storage.write(self.PATH, self.OLD, raw=True), self.PATH)
+        save.assert_not_called()
+        delete.assert_not_called()
+        atomic_write.assert_not_called()
+
+    def test_write_through_cache(self):
+        cache_dir = temporary_directory(self)
+        with self.settings(ICON_PICKER_STORAGE_CACHE=cache_dir):
+            cached = os.path.join(cache_dir, self.NAME)
+            storage.write(self.PATH, self.OLD, raw=True)
+            with open(cached, "rb") as f:
+                self.assertEqual(f.read(), self.OLD)
+            # The cache answers even once the backend lost its copy
+            self.backend.delete(self.NAME)
+            self.assertTrue(storage.exists(self.PATH))
+            self.assertEqual(storage.read(self.PATH), self.OLD)
+            # Files read from the backend are cached on the way
+            os.remove(cached)
+            self.backend.save(self.NAME, ContentFile(self.NEW))
+            self.assertEqual(storage.read(self.PATH), self.NEW)
+            with open(cached, "rb") as f:
+                self.assertEqual(f.read(), self.NEW)
+            storage.delete(self.PATH)
+            self.assertFalse(os.path.exists(cached))
+            self.assertFalse(storage.exists(self.PATH))
+
+
+class FileSystemStorageTests(StorageTestsMixin, SimpleTestCase):
+    def get_backend(self):
+        return {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": temporary_directory(self)},
+        }
+
+    def test_overwrite_renames_over_the_old_file(self):
+        storage.write(self.PATH, self.OLD, raw=True)
+        # Readers see the old or the new file, never a missing one
+        with mock.patch.object(self.backend, "delete") as delete:
+            storage.write(self.PATH, self.NEW, raw=True)
+        delete.assert_not_called()
+        with open(self.backend.path(self.NAME), "rb") as f:
+            self.assertEqual(f.read(), self.NEW)
+        self.assertEqual(os.listdir(os.path.dirname(self.backend.path(self.NAME))), [os.path.basename(self.NAME)])
+
+
+class InMemoryStorageTests(StorageTestsMixin, SimpleTestCase):
+    def get_backend(self):
+        return IN_MEMORY_STORAGE
+
+
+@override_settings(ICON_PICKER_PATH="media", ICON_PICKER_STORAGE=IN_MEMORY_STORAGE, ICON_PICKER_PRECOMPRESS=True)
+class ServeIconTests(SimpleTestCase):
+    def setUp(self):
+        self.name = "icons/ab/" + "f" * 32 + ".svg"
+        storage.write(f"media/{self.name}", b'<svg xmlns="http://www.w3.org/2000/svg"><path d="M0 0h9"/></svg>')
+        # Stand-in for a brotli file, whether or not brotli is installed
+        storage.write(f"media/{self.name}.br", b"brotli", raw=True)
+
+    def encoding(self, accept_encoding):
+        response = self.client.get(f"/icon_picker/files/{self.name}", HTTP_ACCEPT_ENCODING=accept_encoding)
+        self.assertEqual(response.status_code, 200)
+        return response.get("Content-Encoding")
+
+    def test_accept_encoding_quality_values(self):
+        for header, expected in [
+            ("gzip, deflate, br", "br"),
+            ("br;q=0, gzip", "gzip"),
+            ("br;q=0.5, gzip;q=0.8", "gzip"),
+            ("gzip;q=0, br;q=0", None),
+            ("*", "br"),
+            ("*;q=0, gzip", "gzip"),
+            ("identity", None),
+            ("brotli", None),
+            ("", None),
+        ]:
+            with self.subTest(header):
+                self.assertEqual(self.encoding(header), expected)
+
+    def test_head_is_allowed(self):
+        response = self.client.head(f"/icon_picker/files/{self.name}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertEqual(self.client.post(f"/icon_picker/files/{self.name}").status_code, 405)
+
+
+class WidgetChromeTests(SimpleTestCase):
+    CONFIG_RE = re.compile(r"new IconPicker\('([^']*)', (\{.*?\})\);")
+
+    def render(self, name="icon", value="", widget=None):
+        return (widget or IconPickerWidget()).render(name, value, attrs={"id": f"id_{name}"})
+
+    def config(self, html):
+        js_id, config = self.CONFIG_RE.search(html).groups()
+        return js_id, json.loads(config)
+
+    def test_fields_share_the_chrome_with_their_own_ids(self):
+        first, second = self.render("first"), self.render("second", "mdi:home")
+        modal_id = self.config(first)[1]["modalId"]
+        self.assertIn(f'id="{modal_id}_modal"', first)
+        self.assertIn(f'data-target="#{modal_id}_modal"', second)
+        self.assertNotIn("id_first", second)
+        self.assertEqual(self.config(first)[1], self.config(second)[1])
+        self.assertNotIn("id_first_clear", first)
+        self.assertIn("id_second_clear", second)
+        self.assertIn("api.iconify.design/mdi:home.svg", second)
+
+    def test_modal_is_emitted_once_per_page(self):
+        def page():
+            request_started.send(sender=self.__class__)
+            return [self.render(f"row{row}") for row in range(3)] + [self.render("emoji", widget=EmojiPickerWidget())]
+
+        first, *others, emoji = contextvars.Context().run(page)
+        self.assertEqual(first.count('class="icon-picker-modal"'), 1)
+        for html in others:
+            self.assertNotIn('class="icon-picker-modal"', html)
+            self.assertIn(f'data-target="#{self.config(first)[1]["modalId"]}_modal"', html)
+        # Another configuration has a modal of its own
+        self.assertEqual(emoji.count('class="icon-picker-modal"'), 1)
+        self.assertNotEqual(self.config(emoji)[1]["modalId"], self.config(first)[1]["modalId"])
+        # The next page emits it again
+        self.assertIn('class="icon-picker-modal"', contextvars.Context().run(page)[0])
+        # Outside requests every field carries the modal
+        self.assertIn('class="icon-picker-modal"', self.render())
+
+    def test_ids_and_config_are_escaped(self):
+        html = IconPickerWidget(required_prefix="</script>").render("icon", "", attrs={"id": "a'b<"})
+        self.assertNotIn("</script>\"", html)
+        self.assertNotIn("a'b<", html)
+        self.assertEqual(self.config(html)[1]["requiredPrefix"], "</script>")
+
+    def test_config_follows_the_settings(self):
+        self.render()
+        options = {"icons_per_page": 7, "search_debounce": 50}
+        with override_settings(ICON_PICKER_SETTINGS=options, ICON_PICKER_COLOR="#123456"):
+            config = self.config(self.render())[1]
+        self.assertEqual(config["settings"]["icons_per_page"], 7)
+        self.assertEqual(config["settings"]["search_debounce"], 50)
+        self.assertEqual(config["searchOptions"]["debounce"], 50)
+        self.assertEqual(config["color"], "#123456")
+        config = self.config(self.render())[1]
+        self.assertEqual(config["settings"]["icons_per_page"], 50)
+        self.assertEqual(config["color"], "#00bcc9")
+
+    def test_config_only_carries_browser_settings(self):
+        settings = self.config(self.render())[1]["settings"]
+        self.assertEqual(set(settings), set(BROWSER_SETTINGS))
+        for server_only in ("read_timeout", "search_cache", "download_status_cache", "svg_stats_cache"):
+            self.assertNotIn(server_only, settings)
+
+    def test_chrome_follows_the_urls_and_the_emoji_index(self):
+        self.render()
+        set_script_prefix("/prefix/")
+        self.addCleanup(clear_script_prefix)
+        self.assertTrue(self.config(self.render())[1]["searchUrl"].startswith("/prefix/"))
+        clear_script_prefix()
+        self.assertFalse(self.config(self.render())[1]["searchUrl"].startswith("/prefix/"))
+        with mock.patch("django_icon_picker.emoji_index.get_emoji_index", return_value=(b"{}", "0123456789abcdef")):
+            self.assertIn("/emoji/0123456789abcdef.json", self.config(self.render())[1]["emojiIndexUrl"])
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_widgets", "--rows", "3", "--repeat", "1", stdout=output)
+        self.assertIn("per field:", output.getvalue())
+        self.assertIn("shared:", output.getvalue())
+
+
+class LazyIconPickerTests(SimpleTestCase):
+    OPTIONS_RE = re.compile(r'data-icon-picker="([^"]*)"')
+
+    def render(self, name="icon", value="", widget=None):
+        return (widget or LazyIconPicker(attrs={"model_name": "examplemodel"})).render(
+            name, value, attrs={"id": f"id_{name}"}
+        )
+
+    def options(self, html):
+        return json.loads(unescape(self.OPTIONS_RE.search(html).group(1)))
+
+    def test_renders_only_the_field(self):
+        html = self.render(value="mdi:home")
+        self.assertNotIn("icon-picker-modal", html)
+        self.assertNotIn("<script", html)
+        self.assertIn('name="icon"', html)
+        self.assertIn('value="mdi:home"', html)
+        self.assertIn('data-icon-picker-open="id_icon"', html)
+        self.assertIn('id="id_icon_preview"', html)
+        self.assertIn("api.iconify.design/mdi:home.svg", html)
+        self.assertNotIn("<svg", self.render())
+
+    def test_options_travel_in_the_data_attribute(self):
+        options = self.options(self.render())
+        self.assertEqual(options["model"], "examplemodel")
+        self.assertEqual(options["searchUrl"], IconPicker().get_search_url())
+        self.assertEqual(options["renderUrl"], IconPicker().get_render_url())
+        self.assertIn("/emoji/", options["emojiIndexUrl"])
+        self.assertEqual(options["defaultColor"], "#00bcc9")
+        with override_settings(ICON_PICKER_SETTINGS={"search_debounce": 50}):
+            self.assertEqual(self.options(self.render())["searchOptions"]["debounce"], 50)
+
+    def test_page_weight_does_not_grow_with_the_modal(self):
+        eager = contextvars.Context().run(lambda: [IconPickerWidget().render(f"row{row}", "") for row in range(3)])
+        lazy = [self.render(f"row{row}") for row in range(3)]
+        self.assertLess(len(lazy[0]) * 5, len(eager[0]))
+        self.assertEqual(len({len(html.replace(f"row{row}", "")) for row, html in enumerate(lazy)}), 1)
+
+    def test_media_loads_only_the_lazy_bootstrap(self):
+        js = [str(path) for path in LazyIconPicker().media._js]
+        self.assertIn("django_icon_picker/js/icon_picker_lazy.js", js)
+        self.assertNotIn("django_icon_picker/js/icon_picker.js", js)
+
+    def test_icon_field_uses_it_when_configured(self):
+        field = ExampleModel._meta.get_field("icon")
+        self.assertIs(type(field.formfield().widget), IconPicker)
+        with override_settings(ICON_PICKER_LAZY_WIDGET=True):
+            widget = field.formfield().widget
+        self.assertIs(type(widget), LazyIconPicker)
+        self.assertEqual(widget.attrs["model_name"], "examplemodel")
+
+
+@skipUnless(NODE, "Node.js runs the picker's scripts")
+class IconSearchSchedulerTests(SimpleTestCase):
+    # A search endpoint answering after 10 ms ("slow" queries: 30 ms) with
+    # one icon per request, "query:start"; "many" queries always have more
+    # results, "broken" ones fail and "deaf" ones ignore being aborted
+    PRELUDE = """
+        const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+        const fetches = [];
+        const rendered = [];
+        const failed = [];
+        const render = (result) => rendered.push(result.icons);
+        const fail = (error) => failed.push(error.message);
+        const create = (options) => window.IconPickerSearch.create({ url: "/search/", limit: 2, ...options });
+        window.fetch = (url, options = {}) => {
+            const signal = options.signal || null;
+            const params = new URL(url, "http://testserver").searchParams;
+            const query = params.get("query");
+            fetches.push({ url: url, aborted: () => Boolean(signal && signal.aborted) });
+            return new Promise((resolve, reject) => {
+                if (signal && !query.startsWith("deaf")) {
+                    signal.addEventListener("abort", () => reject(Object.assign(new Error("aborted"), { name: "AbortError" })));
+                }
+                setTimeout(() => resolve({
+                    ok: !query.startsWith("broken"),
+                    statusText: "Bad Gateway",
+                    json: async () => ({ icons: [`${query}:${params.get("start")}`], more: query.startsWith("many") }),
+                }), query.includes("slow") ? 30 : 10);
+            });
+        };
+    """
+
+    def run_search(self, program):
+        return run_scripts(self.PRELUDE + program, "icon_search.js")
+
+    def test_lru_evicts_the_least_recently_used(self):
+        result = self.run_search("""
+            const lru = new window.IconPickerSearch.LRU(2);
+            lru.set("a", 1);
+            lru.set("b", 2);
+            lru.get("a");
+            lru.set("c", 3);
+            lru.set("c", 4);
+            console.log(JSON.stringify({ keys: [...lru.entries.keys()], b: lru.get("b") ?? null, c: lru.get("c") }));
+        """)
+        self.assertEqual(result, {"keys": ["a", "c"], "b": None, "c": 4})
+
+    def test_keystrokes_are_debounced_and_normalized_queries_cached(self):
+        result = self.run_search("""
+            const scheduler = create({ debounce: 30, prefetch: false });
+            for (const query of ["h", "ho", "hom", "  Home "]) {
+                scheduler.search({ query: query }, render, fail);
+                await sleep(5);
+            }
+            await sleep(80);
+            // The same search, spelled differently, from another picker
+            create({ prefetch: false }).search({ query: "HOME" }, render, fail);
+            const renderedSynchronously = rendered.length;
+            console.log(JSON.stringify({
+                fetches: fetches.map((fetch) => fetch.url),
+                rendered: rendered,
+                renderedSynchronously: renderedSynchronously,
+                failed: failed,
+            }));
+        """)
+        self.assertEqual(result["fetches"], ["/search/?query=home&limit=2&start=0"])
+        self.assertEqual(result["rendered"], [["home:0"], ["home:0"]])
+        self.assertEqual(result["renderedSynchronously"], 2)
+        self.assertEqual(result["failed"], [])
+
+    def test_newer_searches_cancel_older_ones(self):
+        result = self.run_search("""
+            const scheduler = create({ prefetch: false });
+            scheduler.load({ query: "slow" }, render, fail);
+            scheduler.load({ query: "fast" }, render, fail);
+            // Answered although aborted: its late response is dropped
+            scheduler.load({ query: "deaf slow" }, render, fail);
+            scheduler.load({ query: "second" }, render, fail);
+            await sleep(60);
+            const aborted = fetches.map((fetch) => fetch.aborted());
+            scheduler.load({ query: "broken" }, render, fail);
+            await sleep(30);
+            console.log(JSON.stringify({
+                aborted: aborted,
+                rendered: rendered,
+                failed: failed,
+            }));
+        """)
+        self.assertEqual(result["aborted"], [True, True, True, False])
+        self.assertEqual(result["rendered"], [["second:0"]])
+        self.assertEqual(result["failed"], ["Bad Gateway"])
+
+    def test_next_page_is_prefetched_and_shared(self):
+        result = self.run_search("""
+            const scheduler = create({ debounce: 0 });
+            scheduler.load({ query: "many" }, render, fail);
+            while (fetches.length < 2) {
+                await sleep(1);
+            }
+            // "More icons" while the prefetch is on its way
+            scheduler.load({ query: "many", start: 2 }, render, fail);
+            await sleep(50);
+            scheduler.load({ query: "many", start: 2 }, render, fail);
+            await sleep(5);
+            scheduler.load({ query: "few" }, render, fail);
+            await sleep(50);
+            console.log(JSON.stringify({ fetches: fetches.map((fetch) => fetch.url), rendered: rendered }));
+        """)
+        self.assertEqual(result["fetches"], [
+            "/search/?query=many&limit=2&start=0",
+            "/search/?query=many&limit=2&start=2",
+            "/search/?query=many&limit=2&start=4",
+            "/search/?query=few&limit=2&start=0",
+        ])
+        self.assertEqual(result["rendered"], [["many:0"], ["many:2"], ["many:2"], ["few:0"]])
+
+    def test_results_persist_in_indexeddb(self):
+        result = self.run_search("""
+            // Just enough of IndexedDB for the scheduler
+            const data = new Map();
+            const request = (result) => {
+                const pending = {};
+                setTimeout(() => { pending.result = result(); pending.onsuccess && pending.onsuccess(); }, 0);
+                return pending;
+            };
+            const db = {
+                createObjectStore() {},
+                transaction() {
+                    return { objectStore: () => ({
+                        get: (key) => request(() => data.get(key)),
+                        put: (value, key) => request(() => data.set(key, value)),
+                    }) };
+                },
+            };
+            window.indexedDB = {
+                open() {
+                    const opening = {};
+                    setTimeout(() => { opening.result = db; opening.onupgradeneeded(); opening.onsuccess(); }, 0);
+                    return opening;
+                },
+            };
+            const scheduler = create({ persist: true, ttl: 60, prefetch: false });
+            const key = (query) => scheduler.request({ query: query });
+            data.set(key("saved"), { time: Date.now(), result: { icons: ["saved:db"], start: 0, more: false } });
+            data.set(key("stale"), { time: 0, result: { icons: ["stale:db"], start: 0, more: false } });
+            for (const query of ["saved", "stale", "new"]) {
+                scheduler.load({ query: query }, render, fail);
+                await sleep(40);
+            }
+            console.log(JSON.stringify({
+                fetches: fetches.map((fetch) => fetch.url),
+                rendered: rendered,
+                stored: [...data.keys()],
+                refreshed: data.get(key("stale")).result.icons,
+            }));
+        """)
+        self.assertEqual(result["fetches"], [
+            "/search/?query=stale&limit=2&start=0",
+            "/search/?query=new&limit=2&start=0",
+        ])
+        self.assertEqual(result["rendered"], [["saved:db"], ["stale:0"], ["new:0"]])
+        self.assertIn("/search/?query=new&limit=2&start=0", result["stored"])
+        self.assertEqual(result["refreshed"], ["stale:0"])
+
+    def test_widgets_pass_the_search_settings(self):
+        options = {
+            "search_debounce": 120, "search_cache_size": 7, "search_persist": True,
+            "search_prefetch": False, "search_ttl": 60,
+        }
+        expected = {"debounce": 120, "cacheSize": 7, "persist": True, "prefetch": False, "ttl": 60}
+        with override_settings(ICON_PICKER_SETTINGS=options):
+            html = IconPickerWidget().render("icon", "", attrs={"id": "id_icon"})
+            config = json.loads(WidgetChromeTests.CONFIG_RE.search(html).group(2))
+            self.assertEqual(config["searchOptions"], expected)
+            html = LazyIconPicker().render("icon", "", attrs={"id": "id_icon"})
+            self.assertEqual(LazyIconPickerTests().options(html)["searchOptions"], expected)
+
+
+class ValidateIconFormatTests(SimpleTestCase):
+    VALID = [
+        ("mdi:home", utils.ICONIFY),
+        ("fa6-solid:house", utils.ICONIFY),
+        ("fas fa-home", utils.CLASS_NAME),
+        ("fa-solid fa-house fa-spin fa-2x", utils.CLASS_NAME),
+        ("fa fa-home", utils.CLASS_NAME),
+        ("zmdi zmdi-home", utils.CLASS_NAME),
+        ("zmdi zmdi-home zmdi-hc-2x", utils.CLASS_NAME),
+        ("ion ion-ios-home", utils.CLASS_NAME),
+        ("octicon octicon-mark-github", utils.CLASS_NAME),
+        ("typcn typcn-home", utils.CLASS_NAME),
+        ("wi wi-day-sunny", utils.CLASS_NAME),
+        ("glyphicon glyphicon-home", utils.CLASS_NAME),
+        ("media/icons/ab/abcd.svg", utils.SVG_PATH),
+        ("/static/icons/home.svg", utils.SVG_PATH),
+        ("\U0001F600", utils.EMOJI),
+        ("\U0001F44D\U0001F3FD", utils.EMOJI),
+        ("\U0001F468\u200D\U0001F469\u200D\U0001F467", utils.EMOJI),
+        ("\U0001F1EB\U0001F1F7", utils.EMOJI),
+        ("#\uFE0F\u20E3", utils.EMOJI),
+    ]
+    INVALID = [
+        "", "home", "mdi:", ":home", "MDI:home", "mdi:home:outline", "mdi: home",
+        "fas", "fas home", "fas fa-", "zmdi fa-home", "fas zmdi-home", "xyz xyz-home", "fas fa-home zmdi-spin",
+        "icons/../secret.svg", "./icon.svg", "/etc/../x.svg", "icon.svg", "media/icons/x.png", "media/ic ons/x.svg",
+        "a\U0001F600", "\u00A9",
+        "<script>", "javascript:alert(1)",
+    ]
+
+    def test_valid_values(self):
+        for value, kind in self.VALID:
+            with self.subTest(value=value):
+                self.assertTrue(utils.validate_icon_format(value))
+                self.assertEqual(utils.parse_icon(value)[0], kind)
+
+    def test_invalid_values(self):
+        for value in self.INVALID:
+            with self.subTest(value=value):
+                self.assertFalse(utils.validate_icon_format(value))
+
+    def test_valid_values_classify_as_their_kind(self):
+        kinds = {
+            utils.ICONIFY: classify.ICON_NAME,
+            utils.CLASS_NAME: classify.ICON_NAME,
+            utils.SVG_PATH: classify.SVG_FILE,
+            utils.EMOJI: classify.EMOJI,
+        }
+        for value, kind in self.VALID:
+            with self.subTest(value=value):
+                self.assertEqual(classify.classify(value), kinds[kind])
+        self.assertEqual(classify.icon_prefix("zmdi zmdi-home"), "zmdi")
+
+    def test_grammar_follows_the_configured_sets(self):
+        self.assertFalse(utils.validate_icon_format("bi bi-house"))
+        with override_settings(DJANGO_ICON_SETS=[("bootstrap", "bi", "Bootstrap Icons")]):
+            self.assertEqual(utils.parse_icon("bi bi-house"), (utils.CLASS_NAME, "bi", "house"))
+            self.assertEqual(classify.classify("bi bi-house"), classify.ICON_NAME)
+            self.assertFalse(utils.validate_icon_format("zmdi zmdi-home"))
+            # Font Awesome styles are always known
+            self.assertTrue(utils.validate_icon_format("fas fa-home"))
+        self.assertFalse(utils.validate_icon_format("bi bi-house"))
+        self.assertEqual(classify.classify("bi bi-house"), classify.UNKNOWN)
+
+    def test_catalog_check(self):
+        for value, known in (
+            ("fas fa-home", True),
+            ("fas fa-no-such-icon", False),
+            ("fab fa-github", True),
+            ("fab fa-home", False),
+            # Nothing is known locally about these: accepted
+            ("zmdi zmdi-no-such-icon", True),
+            ("mdi:no-such-icon", True),
+            ("\U0001F600", True),
+            ("media/icons/ab/abcd.svg", True),
+        ):
+            with self.subTest(value=value):
+                self.assertTrue(utils.validate_icon_format(value))
+                self.assertEqual(utils.validate_icon_format(value, check_catalog=True), known)
+
+        collections = temporary_directory(self)
+        with override_settings(ICON_PICKER_COLLECTIONS_PATH=collections):
+            call_command(
+                "import_icon_collections", write_collection(temporary_directory(self)), stdout=StringIO()
+            )
+            self.assertTrue(utils.validate_icon_format("mdi:home", check_catalog=True))
+            self.assertFalse(utils.validate_icon_format("mdi:no-such-icon", check_catalog=True))
+            self.assertTrue(utils.validate_icon_format("bi:no-such-icon", check_catalog=True))
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_validation", "--rows", "100", "--distinct", "10", "--repeat", "1", stdout=output)
+        self.assertIn("grammar, cold memo:", output.getvalue())
+        self.assertIn("catalog, warm memo:", output.getvalue())
+
+
+@override_settings(ICON_PICKER_PATH="media", ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+class DownloadSvgIconTests(SimpleTestCase):
+    def test_goes_through_the_circuit_breaker(self):
+        client = IconifyClient(failure_threshold=1, session=FakeSession(200, 503))
+        with mock.patch("django_icon_picker.client.get_client", return_value=client):
+            path = utils.download_svg_icon("https://icons.test/a.svg", "media")
+            self.assertEqual(storage.read(path), b"<svg/>")
+            # Already saved: not fetched again
+            self.assertEqual(utils.download_svg_icon("https://icons.test/a.svg", "media"), path)
+
+            with self.assertRaises(requests.HTTPError):
+                utils.download_svg_icon("https://icons.test/b.svg", "media")
+            self.assertTrue(client.breaker.is_open)
+            with self.assertRaises(UpstreamUnavailable):
+                utils.download_svg_icon("https://icons.test/c.svg", "media")
+        self.assertEqual(client.session.urls, ["https://icons.test/a.svg", "https://icons.test/b.svg"])
+
+
+class IconMetadataTests(TestCase):
+    @isolate_apps("example")
+    def test_companions_declared_first_are_saved_with_the_icon(self):
+        class Tagged(models.Model):
+            icon_type = models.CharField(max_length=16, blank=True, default="")
+            icon_prefix = models.CharField(max_length=64, blank=True, default="")
+            icon = IconField(type_field="icon_type", prefix_field="icon_prefix")
+
+        def saved_values(instance, add):
+            # What the INSERT/UPDATE writes: pre_save() in declaration order
+            return [field.pre_save(instance, add) for field in Tagged._meta.concrete_fields if not field.primary_key]
+
+        tagged = Tagged(icon="mdi:home")
+        self.assertEqual(saved_values(tagged, True), ["icon_name", "mdi", "mdi:home"])
+        tagged.icon = "\U0001F600"
+        self.assertEqual(saved_values(tagged, False), ["emoji", "", "\U0001F600"])
+        tagged.icon = "zmdi zmdi-home"
+        self.assertEqual((tagged.icon_type, tagged.icon_prefix), ("icon_name", "zmdi"))
+
+    def test_backfill_fixes_stale_rows(self):
+        current = ExampleModel.objects.create(name="current", icon="mdi:home")
+        stale = ExampleModel.objects.create(name="stale", icon="fas fa-home")
+        ExampleModel.objects.filter(pk=stale.pk).update(icon="\U0001F600")
+        blank = ExampleModel.objects.create(name="blank", icon="mdi:account")
+        ExampleModel.objects.filter(pk=blank.pk).update(icon_type="", icon_prefix="")
+
+        out = StringIO()
+        with self.assertNumQueries(4):
+            call_command("backfill_icon_metadata", "example.ExampleModel", stdout=out)
+        self.assertIn("updated 2 of 3 rows", out.getvalue())
+        rows = dict(ExampleModel.objects.values_list("name", "icon_type"))
+        self.assertEqual(rows, {"current": "icon_name", "stale": "emoji", "blank": "icon_name"})
+        current.refresh_from_db()
+        self.assertEqual(current.icon_prefix, "mdi")
+
+
+class IconLookupTests(TestCase):
+    VALUES = [
+        "", "mdi:home", "fa6-solid:house", "fas fa-home", "zmdi zmdi-home", "fa-solid fa-house",
+        "media/icons/ab/abcd.svg", "/static/home.svg", "\U0001F600", "\u2764\uFE0F", "#\uFE0F\u20E3",
+        "home", "xyz abc", "icon.svg",
+        # classify is case-sensitive, and so must the SQL be on every backend
+        "MDI:home", "FAS fa-home", "media/icons/ab/ABCD.SVG",
+    ]
+
+    def test_sql_matches_classify(self):
+        # ``name`` has no companion columns, so the CASE expressions are used
+        ExampleModel.objects.bulk_create(ExampleModel(name=value, icon="") for value in self.VALUES)
+        rows = ExampleModel.objects.annotate(
+            kind=IconType(F("name")), set_prefix=IconPrefix(F("name"))
+        ).values_list("name", "kind", "set_prefix")
+        for value, kind, prefix in rows:
+            with self.subTest(value=value):
+                self.assertEqual((kind, prefix), (classify.classify(value), classify.icon_prefix(value)))
+
+    def test_filters_and_counts(self):
+        for icon in ["mdi:home", "mdi:home", "mdi:account", "fas fa-home", "\U0001F600", "media/icons/ab/x.svg"]:
+            ExampleModel.objects.create(name=icon, icon=icon)
+        objects = ExampleModel.objects
+
+        self.assertEqual(objects.filter(icon__is_emoji=True).count(), 1)
+        self.assertEqual(objects.filter(icon__prefix="mdi").count(), 3)
+        # ``name`` has no companion columns: the prefix filters match patterns
+        ExampleModel.objects.create(name="MDI:home", icon="MDI:home")
+        for prefix, expected in [("mdi", 3), ("MDI", 1), ("md%", 0), ("md_", 0)]:
+            with self.subTest(prefix=prefix):
+                self.assertEqual(objects.filter(IconPrefixExact(IconPrefix(F("name")), prefix)).count(), expected)
+        with override_settings(DJANGO_ICON_SETS=[("mdi", "mdi", "Material Design Icons")]):
+            self.assertEqual(objects.filter(InIconSet(F("name"), "mdi")).count(), 3)
+        objects.filter(name="MDI:home").delete()
+        self.assertEqual(objects.filter(icon__icon_set="fontawesome5solid").get().icon, "fas fa-home")
+        with self.assertRaises(ValueError):
+            objects.filter(icon__icon_set="nope")
+        with self.assertNumQueries(1):
+            self.assertEqual(list(objects.usage_counts()[:2]), [
+                {"icon": "mdi:home", "count": 2}, {"icon": "fas fa-home", "count": 1},
+            ])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                {row["icon__icon_type"]: row["count"] for row in objects.type_counts()},
+                {"icon_name": 4, "emoji": 1, "svg_file": 1},
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(list(objects.prefix_counts()), [
+                {"icon__prefix": "mdi", "count": 3}, {"icon__prefix": "fas", "count": 1},
+            ])
+
+
+    def test_benchmark_command(self):
+        output = StringIO()
+        call_command("benchmark_lookups", "--rows", "50", "--batch-size", "20", stdout=output)
+        self.assertIn("type counts, sql columns", output.getvalue())
+        self.assertFalse(ExampleModel.objects.exists())
+
+
+@override_settings(ICON_PICKER_PATH="media")
+class MaterializeIconsTests(TestCase):
+    def setUp(self):
+        # A new in-memory storage for every test
+        override = override_settings(
+            ICON_PICKER_COLLECTIONS_PATH=temporary_directory(self), ICON_PICKER_STORAGE=IN_MEMORY_STORAGE
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        call_command("import_icon_collections", write_collection(temporary_directory(self)), stdout=StringIO())
+        for name, icon in [("a", "mdi:home"), ("b", "mdi:home"), ("c", "mdi:account"), ("d", "\U0001F600")]:
+            ExampleModel.objects.create(name=name, icon=icon)
+
+    def materialize(self, *args):
+        out = StringIO()
+        call_command("materialize_icons", "--offline", "--color", "#ff0000", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_writes_each_icon_once_and_points_rows_at_it(self):
+        out = self.materialize("--update-rows")
+        self.assertIn("2 SVG file(s) for 2 icon name(s) in 1 column(s): 2 to write", out)
+        home = ExampleModel.objects.get(name="a")
+        self.assertEqual(home.icon, ExampleModel.objects.get(name="b").icon)
+        self.assertTrue(storage.is_managed(home.icon))
+        self.assertIn(b'fill="#ff0000"', storage.read(home.icon))
+        self.assertEqual((home.icon_type, home.icon_prefix), (classify.SVG_FILE, ""))
+        self.assertEqual(ExampleModel.objects.get(name="d").icon, "\U0001F600")
+
+        # Nothing left to do: a second run writes nothing
+        self.assertIn("Wrote 0 file(s), 0 already present", self.materialize())
+
+    def test_resumes_and_verifies(self):
+        self.materialize()
+        path = icon_file_path("mdi:home", "#ff0000")
+        storage.write(path, b"<svg><path d=", raw=True)
+
+        self.assertIn("0 to write", self.materialize())
+        self.assertIn("1 to write", self.materialize("--verify"))
+        self.assertTrue(storage.read(path).endswith(b"</svg>"))
+
+    def test_icons_that_cannot_be_rendered_fail_and_keep_their_rows(self):
+        ExampleModel.objects.create(name="e", icon="mdi:missing")
+        with self.assertRaisesMessage(CommandError, "1 file(s) could not be written"):
+            self.materialize("--update-rows")
+        self.assertEqual(ExampleModel.objects.get(name="e").icon, "mdi:missing")
+        self.assertTrue(storage.is_managed(ExampleModel.objects.get(name="c").icon))
+
+
+SEARCH_CACHE = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "search-proxy-tests"}
+
+
+@override_settings(CACHES={"default": SEARCH_CACHE})
+class SearchProxyTests(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.calls = []
+        self.results = iter([])
+        self.proxy = search_proxy.SearchProxy(fetch=self.fetch, ttl=60, stale_ttl=600, clock=lambda: self.now)
+        self.addCleanup(self.proxy._executor.shutdown)
+        self.addCleanup(self.proxy.cache.clear)
+
+    def fetch(self, **params):
+        self.calls.append(params)
+        result = next(self.results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def revalidated(self):
+        # Wait for the background revalidation
+        self.proxy._executor.submit(lambda: None).result(5)
+
+    def test_hits_share_normalized_queries(self):
+        self.results = iter([{"icons": ["mdi:home"]}])
+        self.assertEqual(self.proxy.search("Home ", ["mdi", "fa"]), ({"icons": ["mdi:home"]}, search_proxy.MISS))
+        self.assertEqual(self.proxy.search("home", ["fa", "mdi"]), ({"icons": ["mdi:home"]}, search_proxy.HIT))
+        self.assertEqual(self.calls, [{"query": "home", "prefixes": ["fa", "mdi"], "limit": 64, "start": 0}])
+
+    def test_stale_entries_are_served_while_one_request_revalidates(self):
+        self.results = iter([{"icons": ["old"]}, {"icons": ["new"]}])
+        self.proxy.search("home")
+        self.now += 61
+
+        self.assertEqual(self.proxy.search("home"), ({"icons": ["old"]}, search_proxy.STALE))
+        self.revalidated()
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.proxy.search("home"), ({"icons": ["new"]}, search_proxy.HIT))
+
+    def test_failed_revalidation_keeps_the_stale_entry(self):
+        self.results = iter([{"icons": ["old"]}, search_proxy.SearchError("Status code: 503"), {"icons": ["new"]}])
+        self.proxy.search("home")
+        self.now += 61
+        self.assertEqual(self.proxy.search("home")[1], search_proxy.STALE)
+        self.revalidated()
+        self.assertEqual(self.proxy.search("home"), ({"icons": ["old"]}, search_proxy.STALE))
+        self.revalidated()
+        self.assertEqual(self.proxy.search("home"), ({"icons": ["new"]}, search_proxy.HIT))
+
+    def test_concurrent_misses_share_one_fetch(self):
+        started, release = threading.Event(), threading.Event()
+
+        def fetch(**params):
+            self.calls.append(params)
+            started.set()
+            release.wait(5)
+            return {"icons": ["mdi:home"]}
+
+        self.proxy.fetch = fetch
+        results = []
+        first = threading.Thread(target=lambda: results.append(self.proxy.search("home")))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(self.proxy.search("home")))
+        second.start()
+        release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(results, [({"icons": ["mdi:home"]}, search_proxy.MISS)] * 2)
+
+    def test_view_is_staff_only(self):
+        with mock.patch.object(search_proxy, "_proxy", self.proxy):
+            self.assertEqual(self.client.get("/icon_picker/search/iconify/", {"query": "home"}).status_code, 403)
+            self.client.force_login(User.objects.create_user("editor"))
+            self.assertEqual(self.client.get("/icon_picker/search/iconify/", {"query": "home"}).status_code, 403)
+        self.assertEqual(self.calls, [])
+
+    def test_view_reports_the_cache_state_and_upstream_errors(self):
+        self.results = iter([{"icons": ["mdi:home"]}])
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        with mock.patch.object(search_proxy, "_proxy", self.proxy):
+            response = self.client.get("/icon_picker/search/iconify/", {"query": "home"})
+            self.assertEqual((response.status_code, response["X-Cache"]), (200, "MISS"))
+            self.assertTrue(response["Cache-Control"].startswith("private"))
+            self.assertEqual(self.client.get("/icon_picker/search/iconify/", {"query": "home"})["X-Cache"], "HIT")
+            self.results = iter([search_proxy.SearchError("Status code: 503")])
+            self.assertEqual(self.client.get("/icon_picker/search/iconify/", {"query": "other"}).status_code, 502)
+            self.assertEqual(self.client.get("/icon_picker/search/iconify/", {"query": " "}).status_code, 400)
+
+
+@override_settings(ICON_PICKER_PATH="media", ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+class RecolorTests(SimpleTestCase):
+    SOURCE = "media/icons/ab/" + "a" * 32 + ".svg"
+    VARIANT = "media/icons/ab/" + "a" * 32 + ".ff0000.svg"
+
+    def setUp(self):
+        storage.write(self.SOURCE, b'<svg><path fill="currentColor" d="M0 0h1"/></svg>', raw=True)
+
+    def test_variants_render_from_their_source(self):
+        with override_settings(ICON_PICKER_RECOLOR=True):
+            self.assertEqual(recolor.split_variant(self.VARIANT), (self.SOURCE, "#ff0000"))
+            self.assertEqual(recolor.variant_prefix(self.SOURCE), self.SOURCE[:-3])
+            self.assertTrue(storage.exists(self.VARIANT))
+            self.assertIn(b'fill="#ff0000"', storage.read(self.VARIANT))
+
+    def test_paths_are_only_files_with_recoloring_off(self):
+        self.assertEqual(recolor.split_variant(self.VARIANT), (self.VARIANT, None))
+        self.assertIsNone(recolor.variant_prefix(self.SOURCE))
+        self.assertFalse(storage.exists(self.VARIANT))
+        # A stored file that looks like a variant is served as itself
+        storage.write(self.VARIANT, b"<svg>own</svg>", raw=True)
+        self.assertEqual(storage.read(self.VARIANT), b"<svg>own</svg>")
+
+
+STATS_CACHE = {"stats": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "optimize-tests"}}
+
+EDITOR_SVG = (
+    b'<?xml version="1.0" encoding="UTF-8"?>\n'
+    b'<!-- Generator: Inkscape -->\n'
+    b'<!--! Font Awesome license -->\n'
+    b'<svg xmlns="http://www.w3.org/2000/svg"\n'
+    b'     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"\n'
+    b'     inkscape:version="1.3" viewBox="0 0 24 24">\n'
+    b'  <metadata><rdf:RDF>author</rdf:RDF></metadata>\n'
+    b'  <inkscape:grid spacing="1"/>\n'
+    b'  <path d="M 10.123456 , 20.000 L -0.50000 0.25" fill="currentColor"/>\n'
+    b'</svg>\n'
+)
+
+
+@override_settings(
+    ICON_PICKER_PATH="media",
+    CACHES={**STATS_CACHE, "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    ICON_PICKER_SETTINGS={"svg_stats_cache": "stats"},
+)
+class OptimizeTests(SimpleTestCase):
+    def setUp(self):
+        storage_override = override_settings(ICON_PICKER_STORAGE=IN_MEMORY_STORAGE)
+        storage_override.enable()
+        self.addCleanup(storage_override.disable)
+        caches["stats"].clear()
+
+    def test_level_off_keeps_the_bytes(self):
+        self.assertEqual(optimize.optimize_svg(EDITOR_SVG, level=optimize.OFF), EDITOR_SVG)
+
+    def test_safe_level_strips_editor_data(self):
+        optimized = optimize.optimize_svg(EDITOR_SVG, level=optimize.SAFE)
+        self.assertLess(len(optimized), len(EDITOR_SVG))
+        for removed in (b"<?xml", b"Generator", b"metadata", b"inkscape", b"\n"):
+            self.assertNotIn(removed, optimized)
+        self.assertIn(b"<!--! Font Awesome license -->", optimized)
+        # Lossless: coordinates are untouched
+        self.assertIn(b'd="M 10.123456 , 20.000 L -0.50000 0.25"', optimized)
+
+    def test_precision_level_rounds_path_data(self):
+        optimized = optimize.optimize_svg(EDITOR_SVG, level=optimize.PRECISION, precision=2)
+        self.assertIn(b'd="M10.12 20L-.5.25"', optimized)
+        self.assertEqual(optimize.optimize_path("a1 1 0 01.5 2", 3), "a1 1 0 01.5 2")
+
+    def test_never_larger_than_the_input(self):
+        for content in (b"<svg/>", b"\xff\xfe not utf-8", b'<svg><path d="M1 1"/></svg>'):
+            for level in (optimize.SAFE, optimize.PRECISION):
+                self.assertLessEqual(len(optimize.optimize_svg(content, level=level)), len(content))
+
+    def test_writes_record_the_bytes_saved(self):
+        optimized = optimize.optimize_svg(EDITOR_SVG)
+        storage.write("media/icons/optimized.svg", EDITOR_SVG)
+        storage.write("media/icons/raw.svg", EDITOR_SVG, raw=True)
+        self.assertEqual(storage.read("media/icons/optimized.svg"), optimized)
+        self.assertEqual(storage.read("media/icons/raw.svg"), EDITOR_SVG)
+        self.assertEqual(optimize.totals(), {
+            "files": 1,
+            "original": len(EDITOR_SVG),
+            "optimized": len(optimized),
+            "saved": len(EDITOR_SVG) - len(optimized),
+        })
+
+    def test_command_reports_savings_without_rewriting_on_dry_run(self):
+        storage.write("media/icons/ab/" + "a" * 32 + ".svg", EDITOR_SVG, raw=True)
+        optimized = optimize.optimize_svg(EDITOR_SVG, level=optimize.SAFE)
+        output = StringIO()
+        call_command("optimize_icons", "--dry-run", "--level", "1", stdout=output)
+        self.assertIn("Would optimize 1 of 1 SVG file(s) at level 1", output.getvalue())
+        self.assertIn(f"bytes: {len(EDITOR_SVG)} -> {len(optimized)}", output.getvalue())
+        self.assertEqual(storage.read("media/icons/ab/" + "a" * 32 + ".svg"), EDITOR_SVG)
+        self.assertEqual(optimize.totals()["files"], 0)
+
+        call_command("optimize_icons", "--level", "1", stdout=StringIO())
+        self.assertEqual(storage.read("media/icons/ab/" + "a" * 32 + ".svg"), optimized)
+        self.assertEqual(optimize.totals()["saved"], len(EDITOR_SVG) - len(optimized))
+
+    def test_fixture_corpus(self):
+        files = sorted(Path(SVG_CORPUS).rglob("*.svg"))
+        self.assertGreater(len(files), 20)
+        for path in files:
+            content = path.read_bytes()
+            safe = optimize.optimize_svg(content, level=optimize.SAFE)
+            rounded = optimize.optimize_svg(content, level=optimize.PRECISION)
+            with self.subTest(path.name):
+                self.assertLessEqual(len(rounded), len(safe))
+                self.assertLessEqual(len(safe), len(content))
+                # Still a well-formed SVG document
+                self.assertTrue(ElementTree.fromstring(rounded).tag.endswith("svg"))
+                if "editors" in path.parts:
+                    self.assertLess(len(safe), len(content))
+                    for removed in (b"inkscape:", b"sodipodi:", b"sketch:", b"<metadata", b"<!--"):
+                        self.assertNotIn(removed, safe)
+
+    def test_benchmark_on_the_fixture_corpus(self):
+        output = StringIO()
+        call_command("optimize_icons", SVG_CORPUS, "--level", "2", stdout=output)
+        count = len(list(Path(SVG_CORPUS).rglob("*.svg")))
+        self.assertRegex(output.getvalue(), rf"Would optimize \d+ of {count} SVG file\(s\) at level 2 in \d+ ms")
+        self.assertIn("bytes:", output.getvalue())
+        self.assertIn("gzip:", output.getvalue())
+        self.assertEqual(optimize.totals()["files"], 0)